@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CardsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cards'
+
+    def ready(self):
+        from cards import catalogue, shards
+
+        shards.connect_signals()
+        catalogue.connect_signals()
@@ -0,0 +1,275 @@
+"""
+판매가 끝난(판매완료/판매취소/판매만료) 판매 등록 정보를 월별 보관 테이블로 옮기는 작업과, 판매 등록 조회가
+보관 테이블을 함께 읽도록 하는 조회 함수입니다.
+
+판매 등록 테이블(cards_cardsellregister)에 판매가 끝난 등록 정보가 계속 쌓이면 주문장 적재/최저가 조회의 테이블과
+인덱스가 누적 거래량만큼 커진다. 판매 정리 작업(cards.listings.sweep_listings, archive_listings 명령어)이
+판매가 끝난 등록 정보를 옮겨 판매 등록 테이블에는 판매중인 등록 정보만 남긴다.
+
+- 보관 테이블은 등록 월(created_at, UTC)마다 cards_sellarchive_YYYYMM으로 나누고, 각 샤드 DB에 처음 옮길 때
+  만든다(마이그레이션으로 관리하지 않음). 오래된 월은 테이블째 지운다(drop_partitions).
+- 보관 테이블 모델(partition_model)은 Django 앱 레지스트리와 분리된 레지스트리에 등록하므로 makemigrations/
+  관리자 화면에 나타나지 않으며, 카드/사용자는 외래 키 없이 id만 보관한다.
+- sell_registers는 판매 등록 테이블과 보관 테이블을 최신 월부터 읽어 합치므로, 판매 등록이 옮겨졌는지와
+  관계없이 같은 결과를 반환한다.
+- 보관 테이블의 월 목록은 샤드별로 프로세스 메모리에 두고(partition_list), 보관 테이블을 만들거나 지우면 캐시(CACHES)의
+  버전 번호를 올려 다른 프로세스도 다음 조회 때 다시 읽게 한다.
+- 이전 판매/구매 이력(CardSellHistory/CardBuyHistory)이 외래 키로 참조하는 등록 정보는 옮기지 않는다.
+- 보관 테이블을 함께 읽는 곳은 판매 등록 목록(sell_registers)뿐이다. 판매 취소(DELETE /cards/<id>/sells/<id>)는
+  판매중인 등록 정보만 대상으로 하므로 옮겨지기 전이든 후든 판매가 끝난 등록 정보에는 404로 응답하고, 주문 조회
+  (GET /cards/orders/<id>)는 주문(CardOrder)에 저장한 처리 결과를 읽으므로 등록 정보가 옮겨져도 영향이 없다.
+"""
+import datetime
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+from django.apps.registry import Apps
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from cards import shards
+from cards.models import CARD_SELL_STATE, CardBuyHistory, CardSellHistory, CardSellRegister
+from cards.order_book import _incr
+
+PARTITION_TABLE = "cards_sellarchive_{month}"
+PARTITION_TABLE_PATTERN = re.compile(r"^cards_sellarchive_(\d{6})$")
+PARTITIONS_VERSION_CACHE_KEY = "sell_archive:partitions:{alias}"
+ARCHIVED_STATES = ("selled", "cancelled", "expired")
+ARCHIVED_FIELDS = (
+    "id", "created_at", "modified_at", "deleted_at", "selled_at", "expires_at", "state",
+    "card_id", "user_id", "price", "fee", "quantity", "remaining_quantity",
+)
+
+# 보관 테이블 모델 전용 레지스트리(cards 앱 모델 목록에 섞이지 않도록)
+partition_apps = Apps()
+
+
+class ArchivedSellRegister(models.Model):
+    """
+    월별 보관 테이블 모델의 공통 필드. id는 원래 등록 정보의 id를 그대로 사용합니다.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField(verbose_name="등록 날짜")
+    modified_at = models.DateTimeField(verbose_name="수정 날짜")
+    deleted_at = models.DateTimeField(null=True, verbose_name="등록삭제 날짜")
+    selled_at = models.DateTimeField(null=True, verbose_name="판매완료 날짜")
+    expires_at = models.DateTimeField(null=True, verbose_name="판매 만료 시각")
+    state = models.CharField(max_length=10, verbose_name="상태", choices=CARD_SELL_STATE)
+    card_id = models.BigIntegerField(verbose_name="카드")
+    user_id = models.BigIntegerField(verbose_name="판매자")
+    price = models.PositiveIntegerField(verbose_name="가격")
+    fee = models.PositiveIntegerField(verbose_name="수수료")
+    quantity = models.PositiveIntegerField(verbose_name="수량")
+    remaining_quantity = models.PositiveIntegerField(verbose_name="남은 수량")
+    archived_at = models.DateTimeField(verbose_name="보관 날짜")
+
+    class Meta:
+        abstract = True
+        apps = partition_apps
+
+
+_partition_models = {}
+_partition_models_lock = threading.Lock()
+
+
+def partition_month(created_at):
+    """
+    등록 날짜가 속한 보관 테이블의 월(UTC 기준 "YYYYMM")
+    """
+    return created_at.astimezone(datetime.timezone.utc).strftime("%Y%m")
+
+
+def partition_model(month):
+    """
+    month("YYYYMM") 보관 테이블의 모델(프로세스에서 한 번만 만든다)
+    """
+    model = _partition_models.get(month)
+    if model is not None:
+        return model
+    with _partition_models_lock:
+        if month not in _partition_models:
+            meta = type("Meta", (), {
+                "app_label": "cards",
+                "apps": partition_apps,
+                "db_table": PARTITION_TABLE.format(month=month),
+                "managed": False,
+                "indexes": [
+                    # 판매자별 카드 판매 등록 조회(최신순)
+                    models.Index(
+                        fields=["user_id", "card_id", "-created_at", "-id"], name=f"cards_sellarch{month}_user"
+                    ),
+                ],
+            })
+            _partition_models[month] = type(
+                f"CardSellRegisterArchive{month}",
+                (ArchivedSellRegister,),
+                {"__module__": __name__, "Meta": meta},
+            )
+        return _partition_models[month]
+
+
+class PartitionList:
+    """
+    샤드별 보관 테이블 월 목록 캐시. 모듈 하단의 partition_list 인스턴스를 프로세스 전역에서 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._months = {}
+
+    def clear(self):
+        with self._lock:
+            self._months = {}
+
+    def get(self, alias):
+        """
+        alias 샤드 DB에 있는 보관 테이블의 월 목록(최신 월부터). 버전 번호가 바뀌었을 때만 테이블 목록을 다시 읽는다.
+        """
+        version = cache.get(PARTITIONS_VERSION_CACHE_KEY.format(alias=alias), 0)
+        cached = self._months.get(alias)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with connections[alias].cursor() as cursor:
+            table_names = connections[alias].introspection.table_names(cursor)
+        months = sorted(
+            (match.group(1) for match in map(PARTITION_TABLE_PATTERN.match, table_names) if match), reverse=True
+        )
+        with self._lock:
+            self._months[alias] = (version, months)
+        return months
+
+    def invalidate(self, alias):
+        """
+        alias 샤드의 보관 테이블이 바뀌었다: 이 프로세스는 바로, 다른 프로세스는 커밋 후 버전 번호로 다시 읽는다.
+        """
+        with self._lock:
+            self._months.pop(alias, None)
+        transaction.on_commit(lambda: _incr(PARTITIONS_VERSION_CACHE_KEY.format(alias=alias)), using=alias)
+
+
+partition_list = PartitionList()
+
+
+def partitions(alias):
+    """
+    alias 샤드 DB에 있는 보관 테이블의 월 목록(최신 월부터)
+    """
+    return partition_list.get(alias)
+
+
+def create_partition(alias, month):
+    """
+    alias 샤드 DB에 month 보관 테이블과 인덱스를 만든다(없을 때만, 트랜잭션 안에서 호출해도 됨).
+    SQLite 스키마 편집기는 트랜잭션 안에서 열 수 없으므로, SQL만 만들어 현재 연결로 실행한다.
+    """
+    connection = connections[alias]
+    if PARTITION_TABLE.format(month=month) in connection.introspection.table_names():
+        return
+    model = partition_model(month)
+    editor = connection.schema_editor()
+    sql, params = editor.table_sql(model)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for index in model._meta.indexes:
+            cursor.execute(str(index.create_sql(model, editor)))
+    partition_list.invalidate(alias)
+
+
+def _move(alias, month, ids, archived_at):
+    """
+    판매 등록 테이블의 ids 행을 month 보관 테이블로 복사하고(DB 안에서 INSERT ... SELECT) 판매 등록 테이블에서 지운다.
+    복사와 삭제가 한 트랜잭션이므로 보관 테이블에 같은 id가 있을 수 없어 DB별 충돌 무시 구문을 쓰지 않는다.
+    """
+    connection = connections[alias]
+    quote_name = connection.ops.quote_name
+    source = quote_name(CardSellRegister._meta.db_table)
+    columns = ", ".join(map(quote_name, ARCHIVED_FIELDS))
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote_name(PARTITION_TABLE.format(month=month))} ({columns}, archived_at) "
+            f"SELECT {columns}, %s FROM {source} WHERE id IN ({placeholders})",
+            [connection.ops.adapt_datetimefield_value(archived_at), *ids]
+        )
+        cursor.execute(f"DELETE FROM {source} WHERE id IN ({placeholders})", ids)
+
+
+def archive_registers(batch_size=500, before=None):
+    """
+    판매가 끝난 등록 정보를 id 순으로 batch_size개씩 보관 테이블로 옮기고(배치마다 트랜잭션), 옮긴 수를 반환한다.
+    before가 있으면 그 이전에 판매가 끝난(마지막으로 수정된) 등록 정보만 옮긴다.
+    """
+    archived = 0
+    for alias in shards.shard_aliases():
+        with shards.using_shard(alias):
+            closed = CardSellRegister.objects.filter(state__in=ARCHIVED_STATES).filter(
+                ~Exists(CardSellHistory.objects.filter(card_sell_register=OuterRef("pk"))),
+                ~Exists(CardBuyHistory.objects.filter(card_sell_register=OuterRef("pk")))
+            )
+            if before is not None:
+                closed = closed.filter(modified_at__lt=before)
+            last_id = 0
+            while True:
+                rows = list(closed.filter(id__gt=last_id).order_by("id").values_list("id", "created_at")[:batch_size])
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                by_month = defaultdict(list)
+                for register_id, created_at in rows:
+                    by_month[partition_month(created_at)].append(register_id)
+                archived_at = timezone.now()
+                with transaction.atomic(using=alias):
+                    for month, ids in by_month.items():
+                        create_partition(alias, month)
+                        _move(alias, month, ids, archived_at)
+                archived += len(rows)
+    return archived
+
+
+def drop_partitions(before_month):
+    """
+    before_month("YYYYMM")보다 이전 월의 보관 테이블을 모든 샤드에서 지우고, 지운 (샤드, 월) 목록을 반환한다.
+    """
+    dropped = []
+    for alias in shards.shard_aliases():
+        for month in partitions(alias):
+            if month >= before_month:
+                continue
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f"DROP TABLE {connections[alias].ops.quote_name(PARTITION_TABLE.format(month=month))}")
+            partition_list.invalidate(alias)
+            dropped.append((alias, month))
+    return dropped
+
+
+def sell_registers(card_id, user_id, cursor=None, limit=100):
+    """
+    user_id가 등록한 card_id 판매 등록 정보를 판매 등록 테이블과 보관 테이블에서 등록 날짜 최신순(같으면 id 역순)으로
+    limit개까지 조회해 ARCHIVED_FIELDS의 dict 목록으로 반환한다. cursor((created_at, id))가 있으면 그 다음부터 조회한다.
+    보관 테이블은 등록 월로 나뉘어 있으므로 최신 월부터 읽고, limit개를 채우면 이전 월은 읽지 않는다.
+    """
+    alias = shards.shard_alias(card_id)
+
+    def page(queryset):
+        queryset = queryset.filter(card_id=card_id, user_id=user_id)
+        if cursor is not None:
+            created_at, register_id = cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=register_id))
+        return list(queryset.order_by("-created_at", "-id").values(*ARCHIVED_FIELDS)[:limit])
+
+    rows = page(CardSellRegister.objects.using(alias))
+    archived = []
+    for month in partitions(alias):
+        if len(archived) >= limit:
+            break
+        if cursor is not None and month > partition_month(cursor[0]):
+            continue
+        archived += page(partition_model(month).objects.using(alias))
+
+    def key(row):
+        return row["created_at"], row["id"]
+    return list(heapq.merge(rows, archived, key=key, reverse=True))[:limit]
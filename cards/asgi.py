@@ -0,0 +1,123 @@
+"""
+ASGI 앞단에서 GET /cards/sells와 GET /cards/<card_id>/stream을 처리합니다(markets/asgi.py에서 Django 앱을 감쌉니다).
+
+판매 목록은 주기적으로 조회(ETag/304)하는 클라이언트가 많아 요청 수가 가장 많다. Django 3.2의 ASGI 핸들러는
+요청 시작/종료 신호와 미들웨어 단계마다 스레드 전환(sync_to_async)이 필요하므로, 캐시에 최신 판매 게시판이
+있으면 Django를 거치지 않고 이벤트 루프에서 바로 응답한다(캐시가 LocMemCache가 아니면 캐시 조회만 스레드에서 한다,
+cards.board.CardSellBoard.apeek). 없거나(주문장을 다시 읽어야 하면) 조회 조건/페이지가
+있으면 Django의 async 뷰(cards.views.card_sell_list)로 넘긴다.
+
+/cards/<card_id>/stream은 카드의 최저가 호가와 체결을 Server-Sent Events로 보낸다(cards.streams). 연결마다
+스레드나 DB 연결을 잡지 않고 이벤트 루프에서 대기하며, 연결 직후 현재 최저가 호가를 한 번 보낸다.
+"""
+import asyncio
+import re
+
+from asgiref.sync import sync_to_async
+from django.utils.http import parse_etags
+
+from cards.board import card_sell_board
+from cards.catalogue import card_catalogue
+from cards.order_book import order_book
+from cards.streams import ask_data, market_stream, stream_settings
+from utilities.renderers import render_json
+
+CARD_SELL_LIST_PATH = "/cards/sells"
+CARD_STREAM_PATH = re.compile(r"^/cards/(?P<card_id>\d+)/stream$")
+
+
+class CardSellBoardFastPath:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["method"] in ("GET", "HEAD")
+            and scope["path"] == CARD_SELL_LIST_PATH
+            and not scope.get("query_string")
+        ):
+            board = await card_sell_board.apeek()
+            if board is not None:
+                await self.respond(scope, send, *board)
+                return
+        await self.app(scope, receive, send)
+
+    async def respond(self, scope, send, etag, body):
+        if_none_match = next(
+            (value.decode("latin1") for name, value in scope["headers"] if name == b"if-none-match"), ""
+        )
+        headers = [(b"etag", etag.encode("latin1"))]
+        if etag in parse_etags(if_none_match):
+            status, body = 304, b""
+        else:
+            status = 200
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+def sse_event(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + render_json(data) + b"\n\n"
+
+
+class CardMarketStream:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        match = scope["type"] == "http" and scope["method"] == "GET" and CARD_STREAM_PATH.match(scope["path"])
+        if not match:
+            await self.app(scope, receive, send)
+            return
+
+        card_id = int(match["card_id"])
+        if not await sync_to_async(card_catalogue.exists)(card_id):
+            # 없는 카드는 구독하지 않고 Django로 넘긴다(404)
+            await self.app(scope, receive, send)
+            return
+        subscriber = market_stream.subscribe(card_id)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        pending = None
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            })
+            best_ask = await sync_to_async(order_book.best_ask)(card_id)
+            await self.send_body(send, sse_event("best_ask", ask_data(card_id, best_ask)))
+
+            keepalive = stream_settings()["KEEPALIVE"]
+            while True:
+                pending = pending or asyncio.ensure_future(subscriber.get())
+                done, _ = await asyncio.wait(
+                    {pending, disconnected}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected in done:
+                    break
+                if pending in done:
+                    body = b"".join(sse_event(event, data) for event, data in pending.result())
+                    pending = None
+                else:
+                    body = b": keepalive\n\n"
+                await self.send_body(send, body)
+        finally:
+            market_stream.unsubscribe(card_id, subscriber)
+            for task in (pending, disconnected):
+                if task is not None:
+                    task.cancel()
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    @staticmethod
+    async def send_body(send, body):
+        await send({"type": "http.response.body", "body": body, "more_body": True})
@@ -0,0 +1,161 @@
+"""
+GET /cards/sells 응답(카드별 최저가 판매 등록 목록)을 캐시에 유지하는 판매 게시판입니다.
+
+- 응답 바이트와 ETag를 주문장 세대 번호별로 캐시에 저장해, 변경이 없으면 조회는 캐시 조회 한 번으로 끝난다.
+- 판매 등록 행의 직렬화 결과는 등록 id별로 캐시에 저장한다. 부분 체결로 남은 수량이 바뀐 등록 정보는
+  forget()으로 지우므로, 호가가 바뀌어도 새로 최저가가 되거나 수량이 바뀐 등록 정보만 DB에서 읽는다.
+- 판매 등록/구매/취소 시 커밋 이후 refresh()로 새 세대의 응답을 미리 만들어 둔다. 카드별 행(JSON 바이트)을
+  프로세스 메모리에 두고, 주문장 변경 기록으로 이전 세대 이후 최저가가 바뀐 카드만 찾아 그 카드의 행만 고친다
+  (처음이거나 변경 기록으로 알 수 없을 때만 전체를 다시 만든다).
+- 응답에 담긴 호가 중 가장 이른 만료 시각을 함께 저장해, 그 시각이 지나면 세대가 같아도 만료된 카드의 행을 고친다.
+- peek()은 DB를 조회하지 않고 캐시만 조회한다. 이벤트 루프에서는 apeek()을 사용한다: 캐시가 프로세스 메모리
+  (LocMemCache)면 스레드 전환 없이 바로 응답하고, 네트워크 캐시(Redis/Memcached 등)면 루프를 막지 않도록 스레드에서 조회한다.
+"""
+import bisect
+import hashlib
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+from cards import shards
+from cards.models import CardSellRegister
+from cards.order_book import order_book
+from cards.serializers import CardSellRegisterListValues
+from utilities.renderers import render_json
+
+BOARD_CACHE_KEY = "card_sell_board:{generation}"
+ROW_CACHE_KEY = "card_sell_board:row:{card_sell_register_id}"
+
+
+def _is_expired(board, now):
+    return board[2] is not None and board[2] <= now
+
+
+class CardSellBoard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        # 카드 id별 최저가 판매 등록 행(JSON 바이트)과 정렬된 카드 id 목록(세대 _generation 기준),
+        # 만료 시각이 있는 최저가 호가의 카드 id별 만료 시각
+        self._entries = {}
+        self._card_ids = []
+        self._expiry = {}
+
+    def clear(self):
+        with self._lock:
+            self._generation = None
+            self._entries = {}
+            self._card_ids = []
+            self._expiry = {}
+
+    def get(self):
+        """
+        (ETag, 응답 바이트)
+        """
+        with self._lock:
+            now = timezone.now()
+            generation, card_ids = order_book.changes(self._generation)
+            board = cache.get(BOARD_CACHE_KEY.format(generation=generation))
+            if board is None or _is_expired(board, now):
+                if card_ids is None:
+                    generation, asks = order_book.snapshot()
+                    self._rebuild(asks)
+                else:
+                    expired = {card_id for card_id, expires_at in self._expiry.items() if expires_at <= now}
+                    self._patch(card_ids | expired)
+                self._generation = generation
+                board = self._build(generation)
+            return board[:2]
+
+    def peek(self):
+        """
+        DB를 조회하지 않고 캐시에 있는 최신 세대의 (ETag, 응답 바이트)를 반환한다(없으면 None).
+        캐시 조회가 동기 호출이므로 이벤트 루프에서는 apeek()을 사용한다.
+        """
+        generation = order_book.current_generation()
+        if generation is None:
+            return None
+        board = cache.get(BOARD_CACHE_KEY.format(generation=generation))
+        if board is None or _is_expired(board, timezone.now()):
+            return None
+        return board[:2]
+
+    async def apeek(self):
+        """
+        이벤트 루프용 peek(): 캐시가 LocMemCache일 때만 루프에서 바로 조회한다.
+        """
+        if isinstance(caches["default"], LocMemCache):
+            return self.peek()
+        return await sync_to_async(self.peek)()
+
+    def refresh(self):
+        self.get()
+
+    def forget(self, card_sell_register_ids):
+        cache.delete_many([
+            ROW_CACHE_KEY.format(card_sell_register_id=card_sell_register_id)
+            for card_sell_register_id in card_sell_register_ids
+        ])
+
+    def refresh_on_commit(self):
+        transaction.on_commit(self.refresh)
+
+    def rows(self, asks):
+        """
+        호가 순서대로 판매 등록 행(캐시에 없는 행만 DB에서 읽어 캐시에 저장)
+        """
+        keys = {ROW_CACHE_KEY.format(card_sell_register_id=ask.id): ask.id for ask in asks}
+        cached = cache.get_many(keys)
+        missing_ids = [card_sell_register_id for key, card_sell_register_id in keys.items() if key not in cached]
+
+        if missing_ids:
+            # 호가에는 카드 id가 없으므로 샤드마다 조회(샤드가 하나면 한 번)
+            rows = {}
+            for alias in shards.shard_aliases():
+                with shards.using_shard(alias):
+                    rows.update(
+                        (ROW_CACHE_KEY.format(card_sell_register_id=row["id"]), row)
+                        for row in CardSellRegisterListValues.rows(CardSellRegister.objects.filter(id__in=missing_ids))
+                    )
+            cache.set_many(rows)
+            cached.update(rows)
+        return [cached[key] for key in keys if key in cached]
+
+    def _rebuild(self, asks):
+        expiry = {ask.id: ask.expires_at for ask in asks if ask.expires_at is not None}
+        rows = self.rows(asks)
+        self._entries = {row["cardId"]: render_json(row) for row in rows}
+        self._card_ids = sorted(self._entries)
+        self._expiry = {row["cardId"]: expiry[row["id"]] for row in rows if row["id"] in expiry}
+
+    def _patch(self, card_ids):
+        """
+        card_ids의 행만 현재 최저가 호가로 바꾼다(호가가 없어진 카드는 뺀다).
+        """
+        best_asks = [ask for ask in map(order_book.best_ask, card_ids) if ask is not None]
+        expiry = {ask.id: ask.expires_at for ask in best_asks}
+        rows = {row["cardId"]: row for row in self.rows(best_asks)}
+        for card_id in card_ids:
+            self._expiry.pop(card_id, None)
+            row = rows.get(card_id)
+            if row is not None:
+                if card_id not in self._entries:
+                    bisect.insort(self._card_ids, card_id)
+                self._entries[card_id] = render_json(row)
+                if expiry[row["id"]] is not None:
+                    self._expiry[card_id] = expiry[row["id"]]
+            elif self._entries.pop(card_id, None) is not None:
+                del self._card_ids[bisect.bisect_left(self._card_ids, card_id)]
+
+    def _build(self, generation):
+        body = b"[" + b",".join(self._entries[card_id] for card_id in self._card_ids) + b"]"
+        board = (f'"{hashlib.md5(body).hexdigest()}"', body, min(self._expiry.values(), default=None))
+        cache.set(BOARD_CACHE_KEY.format(generation=generation), board)
+        return board
+
+
+card_sell_board = CardSellBoard()
@@ -0,0 +1,60 @@
+"""
+카드 체결가 캔들(시가/고가/저가/종가/거래량) 집계 단위와 구간 계산입니다.
+
+캔들은 CardCandle 테이블에 단위(1m/1h/1d)별로 미리 집계해 두며, 체결할 때마다 settlement.settle()이
+CardCandle.objects.record()로 갱신한다. 차트 조회는 CardCandle만 읽고 체결 이력은 읽지 않는다.
+가격은 수수료를 제외한 카드 1장 기준 체결가이며, 거래량은 체결 수량의 합이다.
+"""
+import datetime
+
+from django.utils import timezone
+
+CANDLE_INTERVALS = {
+    "1m": datetime.timedelta(minutes=1),
+    "1h": datetime.timedelta(hours=1),
+    "1d": datetime.timedelta(days=1),
+}
+
+
+def candle_start(executed_at, interval):
+    """
+    executed_at이 속한 캔들의 시작 시각(현재 시간대 기준으로 분/시/일 단위 절삭)
+    """
+    executed_at = timezone.localtime(executed_at)
+    if interval == "1m":
+        return executed_at.replace(second=0, microsecond=0)
+    if interval == "1h":
+        return executed_at.replace(minute=0, second=0, microsecond=0)
+    return timezone.make_aware(datetime.datetime.combine(executed_at.date(), datetime.time()))
+
+
+def candle_starts(executed_at):
+    return {interval: candle_start(executed_at, interval) for interval in CANDLE_INTERVALS}
+
+
+class Candle:
+    """
+    메모리에서 집계 중인 캔들(체결 시각 순서로 add()해야 한다)
+    """
+    __slots__ = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, price, quantity):
+        self.open = self.high = self.low = self.close = price
+        self.volume = quantity
+
+    def add(self, price, quantity):
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        self.volume += quantity
+
+
+def aggregate(trades):
+    """
+    체결 순서대로 나열한 (가격, 수량) 목록을 캔들 하나로 집계
+    """
+    (price, quantity), *rest = trades
+    candle = Candle(price, quantity)
+    for price, quantity in rest:
+        candle.add(price, quantity)
+    return candle
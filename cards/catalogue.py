@@ -0,0 +1,100 @@
+"""
+카드 id → 이름을 프로세스 메모리에 보관하는 카드 목록 캐시입니다.
+
+카드 행은 작고 거의 바뀌지 않으므로, 판매 이력 등 목록 응답이 카드 이름을 얻으려고 cards_card를 매번 조인하지
+않고 이 캐시에서 이름을 채운다(cards.serializers.TradeListValues).
+
+- 첫 요청(request_started) 때 전체 카드를 읽고, 이후에는 없는 id를 찾을 때만 다시 읽는다.
+- Card가 저장/삭제되면(post_save/post_delete) 캐시(CACHES)의 버전 번호를 올린다. 요청이 시작될 때 버전이
+  바뀌었으면 다시 읽으므로, 다른 프로세스에서 바꾼 이름도 다음 요청부터 반영된다.
+"""
+import bisect
+import threading
+from array import array
+
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
+
+from cards.models import Card
+from cards.order_book import _incr
+
+VERSION_CACHE_KEY = "card_catalogue:version"
+
+
+class CardCatalogue:
+    """
+    모듈 하단의 card_catalogue 인스턴스를 프로세스 전역에서 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = None
+        self._ids = array("q")
+        self._version = None
+
+    def clear(self):
+        with self._lock:
+            self._names = None
+            self._ids = array("q")
+            self._version = None
+
+    def load(self):
+        """
+        전체 카드를 다시 읽는다(읽기 전에 버전을 확인하므로 읽는 중에 바뀐 카드는 다음 확인 때 다시 읽음).
+        """
+        with self._lock:
+            version = cache.get(VERSION_CACHE_KEY, 0)
+            names = dict(Card.objects.order_by("id").values_list("id", "name"))
+            self._ids = array("q", names)
+            self._names = names
+            self._version = version
+            return names
+
+    def refresh(self):
+        """
+        다른 프로세스에서 카드가 바뀌었으면(버전이 다르면) 다시 읽는다. 읽은 적이 없으면 처음 읽는다.
+        """
+        if self._names is None or self._version != cache.get(VERSION_CACHE_KEY, 0):
+            self.load()
+
+    def name(self, card_id):
+        """
+        카드 이름. 조회한 행의 card_id처럼 있는 카드가 목록에 없으면 그 사이 추가된 카드이므로 다시 읽는다.
+        """
+        names = self._names
+        if names is None or card_id not in names:
+            names = self.load()
+        return names.get(card_id)
+
+    def exists(self, card_id):
+        """
+        요청이 시작될 때 확인한 버전 기준으로 카드가 있는지 반환한다(없는 id로 다시 읽지는 않음).
+        """
+        if self._names is None:
+            self.load()
+        ids = self._ids
+        index = bisect.bisect_left(ids, card_id)
+        return index < len(ids) and ids[index] == card_id
+
+    def invalidate(self):
+        _incr(VERSION_CACHE_KEY)
+        with self._lock:
+            self._names = None
+
+
+card_catalogue = CardCatalogue()
+
+
+def preload(sender, **kwargs):
+    card_catalogue.refresh()
+
+
+def invalidate(sender, **kwargs):
+    card_catalogue.invalidate()
+
+
+def connect_signals():
+    request_started.connect(preload, dispatch_uid="card_catalogue_preload")
+    post_save.connect(invalidate, sender=Card, dispatch_uid="card_catalogue_invalidate_save")
+    post_delete.connect(invalidate, sender=Card, dispatch_uid="card_catalogue_invalidate_delete")
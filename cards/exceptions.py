@@ -11,3 +11,21 @@ class InvalidData(exceptions.APIException):
     status_code = 422
     default_detail = "잘못 입력된 데이터입니다."
     default_code = "InvalidData"
+
+
+class NotExistData(exceptions.APIException):
+    status_code = 404
+    default_detail = "존재하지 않는 데이터입니다."
+    default_code = "NotExistData"
+
+
+class RequestInProgress(exceptions.APIException):
+    status_code = 409
+    default_detail = "같은 Idempotency-Key의 요청을 처리하고 있습니다. 잠시 후 다시 시도해주세요."
+    default_code = "IdempotencyKeyInProgress"
+
+
+class OrderQueueFull(exceptions.APIException):
+    status_code = 503
+    default_detail = "주문이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+    default_code = "OrderQueueFull"
@@ -0,0 +1,174 @@
+"""
+판매/구매 요청(POST)의 Idempotency-Key 처리입니다.
+
+클라이언트가 시간 초과 등으로 같은 요청을 다시 보내면 체결 트랜잭션이 다시 실행되어 부하가 늘고 두 번 체결될 수
+있다. 요청에 Idempotency-Key 헤더가 있으면 처음 처리한 응답을 (사용자, 키)별로 저장해 두고, 같은 키로 다시 온
+요청에는 판매 등록/보유 수량 등 시장 테이블을 읽지 않고 저장한 응답을 돌려준다(Idempotent-Replayed 헤더).
+
+- 저장소는 IdempotencyKey 테이블(주 DB)이고, 처리가 끝난 응답은 프로세스 메모리의 LRU에도 둬 다시 온 요청은
+  대부분 DB를 읽지 않는다. 보관 기간은 settings.IDEMPOTENCY["TTL"](초)이다.
+- 처리 전에 키를 먼저 저장(선점)하므로 같은 키의 요청이 동시에 오면 하나만 처리하고 나머지는 409로 응답한다.
+  처리 중 오류가 나면(체결 트랜잭션은 롤백됨) 키를 지워 다시 요청할 수 있게 한다.
+- 같은 키로 요청 내용(주문 종류, 카드, 수량/가격)이 다른 요청이 오면 422로 응답한다.
+- 응답을 저장하기 전에 프로세스가 죽으면 키는 보관 기간 동안 처리 중으로 남는다(체결 여부는 주문/이력으로 확인).
+"""
+import datetime
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from cards.exceptions import InvalidData, RequestInProgress
+from cards.models import IdempotencyKey
+from utilities.sqlite import retry_on_busy
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+DEFAULT_IDEMPOTENCY_SETTINGS = {
+    # 응답 보관 기간(초)
+    "TTL": 24 * 60 * 60,
+    # 프로세스 메모리(LRU)에 두는 응답 수
+    "CACHE_SIZE": 10000,
+}
+
+Stored = namedtuple("Stored", ["fingerprint", "status_code", "response", "expires_at"])
+
+
+def idempotency_settings():
+    return {**DEFAULT_IDEMPOTENCY_SETTINGS, **getattr(settings, "IDEMPOTENCY", {})}
+
+
+def fingerprint(payload):
+    """
+    요청 내용(JSON으로 바꿀 수 있는 값)의 SHA-256 해시
+    """
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    모듈 하단의 idempotency_store 인스턴스를 프로세스 전역에서 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+
+    def _recall(self, user_id, key, now):
+        with self._lock:
+            stored = self._responses.get((user_id, key))
+            if stored is None:
+                return None
+            if stored.expires_at <= now:
+                del self._responses[(user_id, key)]
+                return None
+            self._responses.move_to_end((user_id, key))
+            return stored
+
+    def _remember(self, user_id, key, stored):
+        size = idempotency_settings()["CACHE_SIZE"]
+        if size <= 0:
+            return
+        with self._lock:
+            self._responses[(user_id, key)] = stored
+            self._responses.move_to_end((user_id, key))
+            while len(self._responses) > size:
+                self._responses.popitem(last=False)
+
+    @retry_on_busy
+    def claim(self, user_id, key, request_fingerprint, now):
+        """
+        (user_id, key)를 선점하고 None을 반환한다. 보관 기간 안에 저장된 키가 있으면 그 키의 Stored를 반환한다
+        (처리 중이면 status_code가 None). 다시 온 요청은 조회 한 번으로 끝나도록 쓰기 전에 먼저 조회한다.
+        """
+        keys = IdempotencyKey.objects.filter(user_id=user_id, key=key)
+        row = keys.values_list("fingerprint", "status_code", "response", "expires_at").first()
+        if row is not None and row[3] > now:
+            return Stored(*row)
+
+        expires_at = now + datetime.timedelta(seconds=idempotency_settings()["TTL"])
+        claimed = {
+            "fingerprint": request_fingerprint, "status_code": None, "response": None,
+            "created_at": now, "expires_at": expires_at,
+        }
+        if row is not None:
+            # 보관 기간이 지난 키는 새 요청으로 다시 선점(동시에 다른 요청이 먼저 선점했으면 그 요청의 키를 조회)
+            if keys.filter(expires_at__lte=now).update(**claimed):
+                return None
+            return self.claim(user_id, key, request_fingerprint, now)
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(user_id=user_id, key=key, **claimed)
+            return None
+        except IntegrityError:
+            # 동시에 같은 키의 요청이 먼저 선점함
+            return self.claim(user_id, key, request_fingerprint, now)
+
+    @retry_on_busy
+    def complete(self, user_id, key, stored):
+        IdempotencyKey.objects.filter(user_id=user_id, key=key).update(
+            status_code=stored.status_code, response=stored.response
+        )
+        self._remember(user_id, key, stored)
+
+    @retry_on_busy
+    def release(self, user_id, key):
+        IdempotencyKey.objects.filter(user_id=user_id, key=key, status_code__isnull=True).delete()
+
+    def respond(self, request, user_id, payload, execute):
+        """
+        Idempotency-Key 헤더가 없으면 execute()의 응답을 그대로 반환한다. 있으면 처음 요청만 execute()를 실행해
+        응답을 저장하고, 같은 키로 다시 온 요청에는 저장한 응답을 반환한다. payload는 요청 내용(같은 키의 요청인지 비교)이다.
+        """
+        key = request.headers.get(HEADER)
+        if key is None:
+            return execute()
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            raise InvalidData(
+                **{
+                    "detail": f"{HEADER}는 1자 이상 {MAX_KEY_LENGTH}자 이하여야 합니다",
+                    "code": "InvalidIdempotencyKey"
+                }
+            )
+
+        now = timezone.now()
+        request_fingerprint = fingerprint(payload)
+        stored = self._recall(user_id, key, now) or self.claim(user_id, key, request_fingerprint, now)
+        if stored is not None:
+            return self.replay(user_id, key, request_fingerprint, stored)
+
+        try:
+            response = execute()
+        except Exception:
+            self.release(user_id, key)
+            raise
+        expires_at = now + datetime.timedelta(seconds=idempotency_settings()["TTL"])
+        self.complete(user_id, key, Stored(request_fingerprint, response.status_code, response.data, expires_at))
+        return response
+
+    def replay(self, user_id, key, request_fingerprint, stored):
+        if stored.fingerprint != request_fingerprint:
+            raise InvalidData(
+                **{
+                    "detail": f"같은 {HEADER}로 내용이 다른 요청을 보낼 수 없습니다",
+                    "code": "IdempotencyKeyReused"
+                }
+            )
+        if stored.status_code is None:
+            raise RequestInProgress()
+        self._remember(user_id, key, stored)
+        return Response(data=stored.response, status=stored.status_code, headers={REPLAYED_HEADER: "true"})
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,125 @@
+"""
+판매 등록 정보의 취소/만료와 정리 작업입니다.
+
+- 판매자가 취소하거나(cards.orders.cancel) 만료 시각(expires_at)이 지나면 판매취소/판매만료로 바꾸고, 팔리지 않은
+  남은 수량을 판매자의 보유 수량으로 돌려준다(close).
+- 판매 정리 작업(sweep_listings 명령어 또는 ListingSweeper 스레드)은 만료된 등록 정보를 판매만료로 바꾸고,
+  판매가 끝난 등록 정보를 월별 보관 테이블로 옮겨(cards.archive) 판매 등록 테이블에는 판매중인 등록 정보만 남긴다.
+- settings.LISTING_SWEEP_INTERVAL(초)이 0보다 크면 첫 판매 등록 때 ListingSweeper를 시작한다.
+"""
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from cards import archive, shards
+from cards.board import card_sell_board
+from cards.models import CardPossesionStatus, CardSellRegister
+from cards.order_book import order_book
+from cards.streams import market_stream
+
+logger = logging.getLogger(__name__)
+
+
+def close(card_id, card_sell_register_id, state, user_id=None):
+    """
+    판매중인 등록 정보를 state(판매취소/판매만료)로 바꾸고 남은 수량을 판매자 보유 수량으로 돌려준다.
+    판매중이 아니거나 user_id의 등록 정보가 아니면 None을 반환한다. cards.shards.atomic(card_id) 안에서 호출한다.
+    """
+    now = timezone.now()
+    registers = CardSellRegister.objects.filter(id=card_sell_register_id, card_id=card_id, state="selling")
+    if user_id is not None:
+        registers = registers.filter(user_id=user_id)
+    # 조건부 UPDATE로 먼저 상태를 바꿔, 동시에 체결된 수량을 제외한 남은 수량만 돌려준다
+    if not registers.update(state=state, deleted_at=now, modified_at=now):
+        return None
+
+    card_sell_register = CardSellRegister.objects.get(id=card_sell_register_id)
+    if card_sell_register.remaining_quantity:
+        CardPossesionStatus.objects.credit(
+            card_id, card_sell_register.user_id, card_sell_register.remaining_quantity
+        )
+
+    order_book.remove(card_id, card_sell_register_id)
+    transaction.on_commit(lambda: card_sell_board.forget([card_sell_register_id]))
+    card_sell_board.refresh_on_commit()
+    market_stream.publish_on_commit(card_id)
+    return card_sell_register
+
+
+def expire_listings(batch_size=500):
+    """
+    만료 시각이 지난 판매중 등록 정보를 카드별 트랜잭션으로 판매만료 처리하고, 처리한 수를 반환한다.
+    """
+    expired = 0
+    for alias in shards.shard_aliases():
+        with shards.using_shard(alias):
+            while True:
+                rows = list(
+                    CardSellRegister.objects.filter(state="selling", expires_at__lte=timezone.now())
+                    .order_by("expires_at").values_list("card_id", "id")[:batch_size]
+                )
+                if not rows:
+                    break
+                by_card = defaultdict(list)
+                for card_id, card_sell_register_id in rows:
+                    by_card[card_id].append(card_sell_register_id)
+                for card_id, card_sell_register_ids in by_card.items():
+                    with shards.atomic(card_id):
+                        for card_sell_register_id in card_sell_register_ids:
+                            expired += close(card_id, card_sell_register_id, "expired") is not None
+    return expired
+
+
+def sweep_listings(batch_size=500):
+    """
+    (판매만료 처리한 수, 보관 테이블로 옮긴 수)
+    """
+    return expire_listings(batch_size), archive.archive_registers(batch_size)
+
+
+class ListingSweeper:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return getattr(settings, "LISTING_SWEEP_INTERVAL", 0)
+
+    def start(self):
+        """
+        LISTING_SWEEP_INTERVAL마다 정리하는 데몬 스레드를 시작한다(처음 한 번만, 설정이 0이면 시작하지 않음).
+        """
+        if self._thread is not None or self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._work, name="listing-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _work(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                sweep_listings()
+            except DatabaseError:
+                # 잠금 충돌 등은 다음 주기에 다시 정리
+                logger.exception("listing sweep failed")
+            finally:
+                close_old_connections()
+
+
+listing_sweeper = ListingSweeper()
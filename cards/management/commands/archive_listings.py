@@ -0,0 +1,36 @@
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cards import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "판매가 끝난(판매완료/판매취소/판매만료) 판매 등록을 id 순으로 일정 개수씩 등록 월별 보관 테이블"
+        "(cards_sellarchive_YYYYMM)로 옮기고, --drop-before보다 이전 월의 보관 테이블을 지웁니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="한 트랜잭션에서 옮길 판매 등록 수")
+        parser.add_argument(
+            "--older-than", type=int, default=0, help="판매가 끝난 지 이 시간(초)이 지난 판매 등록만 옮김"
+        )
+        parser.add_argument("--drop-before", help="이 월(YYYYMM)보다 이전 월의 보관 테이블을 지움")
+
+    def handle(self, *args, **options):
+        drop_before = options["drop_before"]
+        if drop_before is not None and not re.fullmatch(r"\d{6}", drop_before):
+            raise CommandError("--drop-before는 YYYYMM 형식이어야 합니다")
+
+        before = None
+        if options["older_than"] > 0:
+            before = timezone.now() - datetime.timedelta(seconds=options["older_than"])
+        archived = archive.archive_registers(options["batch_size"], before)
+        self.stdout.write(self.style.SUCCESS(f"archived {archived} listings"))
+
+        if drop_before is not None:
+            dropped = archive.drop_partitions(drop_before)
+            self.stdout.write(self.style.SUCCESS(f"dropped {len(dropped)} archive partitions"))
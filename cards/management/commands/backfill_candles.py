@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from cards import shards
+from cards.candles import CANDLE_INTERVALS, Candle, candle_starts
+from cards.models import CardCandle, Trade
+
+
+class Command(BaseCommand):
+    help = (
+        "체결 원장으로 체결가 캔들(1m/1h/1d)을 다시 만듭니다. 기존 캔들을 지운 시점 이전의 체결을 체결 시각 순으로 "
+        "일정 개수씩 읽어 집계하고, 그 이후의 체결은 구매 처리(settle)가 캔들에 반영합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--card-id", type=int, default=None, help="지정한 카드의 캔들만 다시 만듭니다")
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if options["card_id"] is not None:
+            aliases = [shards.shard_alias(options["card_id"])]
+        else:
+            aliases = shards.shard_aliases()
+
+        totals = [0, 0, 0]
+        for alias in aliases:
+            with shards.using_shard(alias):
+                totals = [total + count for total, count in zip(totals, self.backfill(alias, options))]
+
+        deleted, aggregated, created = totals
+        self.stdout.write(self.style.SUCCESS(
+            f"deleted {deleted} candles, aggregated {aggregated} trades into {created} candles"
+        ))
+
+    def backfill(self, alias, options):
+        """
+        alias 샤드의 캔들을 다시 만들고 (삭제한 캔들 수, 집계한 체결 수, 만든 캔들 수)를 반환한다.
+        """
+        candles = CardCandle.objects.all()
+        trades = Trade.objects.all()
+        if options["card_id"] is not None:
+            candles = candles.filter(card_id=options["card_id"])
+            trades = trades.filter(card_id=options["card_id"])
+
+        with transaction.atomic(using=alias):
+            cutoff = timezone.now()
+            deleted, _ = candles.delete()
+        trades = trades.filter(executed_at__lt=cutoff).values_list(
+            "executed_at", "id", "card_id", "price", "quantity"
+        ).order_by("executed_at", "id")
+
+        # 집계 중인 캔들: 체결 시각 순으로 읽으므로 구간이 끝난 캔들은 더 바뀌지 않아 바로 저장한다
+        open_candles = {}
+        after = None
+        aggregated = created = 0
+        while True:
+            batch = trades
+            if after is not None:
+                batch = batch.filter(Q(executed_at__gt=after[0]) | Q(executed_at=after[0], id__gt=after[1]))
+            rows = list(batch[:options["batch_size"]])
+            if not rows:
+                break
+
+            for executed_at, _, card_id, price, quantity in rows:
+                for interval, started_at in candle_starts(executed_at).items():
+                    candle = open_candles.get((card_id, interval, started_at))
+                    if candle is None:
+                        open_candles[(card_id, interval, started_at)] = Candle(price, quantity)
+                    else:
+                        candle.add(price, quantity)
+            after = rows[-1][:2]
+            aggregated += len(rows)
+
+            closed = [
+                key for key in open_candles if key[2] + CANDLE_INTERVALS[key[1]] <= after[0]
+            ]
+            CardCandle.objects.bulk_create(
+                [self.build(key, open_candles.pop(key)) for key in closed], batch_size=options["batch_size"]
+            )
+            created += len(closed)
+
+        # 마지막 구간은 cutoff 이후 체결로 이미 캔들이 생겼을 수 있으므로 이전 체결로 합친다
+        for (card_id, interval, started_at), candle in open_candles.items():
+            CardCandle.objects.record_earlier(card_id, interval, started_at, candle)
+        created += len(open_candles)
+        return deleted, aggregated, created
+
+    @staticmethod
+    def build(key, candle):
+        card_id, interval, started_at = key
+        return CardCandle(
+            card_id=card_id,
+            interval=interval,
+            started_at=started_at,
+            open=candle.open,
+            high=candle.high,
+            low=candle.low,
+            close=candle.close,
+            volume=candle.volume
+        )
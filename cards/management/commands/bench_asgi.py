@@ -0,0 +1,193 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from cards.board import card_sell_board
+from cards.models import Card
+from cards.urls import read_urlpatterns
+from utilities.benchmark import format_summary
+
+
+class ReadUrls:
+    """
+    ROOT_URLCONF로 사용할 판매 목록/판매 이력 조회 URL 모음
+    """
+
+    def __init__(self, async_views):
+        self.urlpatterns = read_urlpatterns(async_views)
+
+
+class Command(BaseCommand):
+    help = (
+        "판매 목록/판매 이력 조회를 WSGI 경로(markets.wsgi, sync 뷰, 연결마다 스레드 하나)와 "
+        "ASGI 경로(markets.asgi, async 뷰, 이벤트 루프 하나)로 동시 연결 수만큼 한꺼번에 요청해 "
+        "초당 처리량, 응답 시간, 1,000 연결당 메모리(tracemalloc 기준, 스레드 스택 제외)를 비교합니다. "
+        "서버 없이 프로세스 안에서 WSGI/ASGI application을 직접 호출합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=1000, help="동시 연결 수")
+        parser.add_argument("--rounds", type=int, default=3, help="경로별 반복 횟수")
+        parser.add_argument("--endpoint", choices=("list", "history"), default="list")
+        parser.add_argument("--card-id", type=int, default=None, help="판매 이력을 조회할 카드(기본: 첫 카드)")
+        parser.add_argument(
+            "--poll", action="store_true", help="판매 목록을 ETag(If-None-Match)와 함께 조회(304 응답)"
+        )
+
+    def handle(self, *args, **options):
+        from markets.asgi import application as asgi_application
+        from markets.wsgi import application as wsgi_application
+
+        path, headers = self.request_for(options)
+        connections = options["connections"]
+        paths = (
+            ("wsgi", False, lambda: self.wsgi_round(wsgi_application, path, headers, connections)),
+            ("asgi", True, lambda: self.asgi_round(asgi_application, path, headers, connections)),
+        )
+
+        for label, async_views, run in paths:
+            with override_settings(
+                ROOT_URLCONF=ReadUrls(async_views),
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "localhost"]
+            ):
+                run()  # 준비(캐시/주문장/DB 연결)
+
+                samples, statuses, elapsed = [], Counter(), 0.0
+                for _ in range(options["rounds"]):
+                    round_samples, round_statuses, round_elapsed, _ = run()
+                    samples += round_samples
+                    statuses.update(round_statuses)
+                    elapsed += round_elapsed
+
+                tracemalloc.start()
+                baseline = tracemalloc.get_traced_memory()[0]
+                *_, threads = run()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            self.stdout.write(format_summary(f"{label} {path} x {connections}", samples, elapsed))
+            self.stdout.write(
+                f"{'':<40} status: {dict(statuses)} "
+                f"memory/1k connections: {(peak - baseline) * 1000 / connections / 1024 / 1024:.1f}MiB "
+                f"threads: {threads}"
+            )
+
+    def request_for(self, options):
+        if options["endpoint"] == "history":
+            card_id = options["card_id"] or Card.objects.values_list("id", flat=True).first()
+            if card_id is None:
+                raise CommandError("no cards: run `manage.py seed_market` first")
+            return f"/cards/{card_id}/sells/histories", {}
+
+        headers = {}
+        if options["poll"]:
+            etag, _ = card_sell_board.get()
+            headers["If-None-Match"] = etag
+        return "/cards/sells", headers
+
+    def wsgi_round(self, application, path, headers, connections):
+        """
+        WSGI 서버의 연결당 스레드 모델: 스레드마다 WSGI application을 호출
+        """
+        samples, statuses = [], Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(connections + 1)
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "localhost",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()},
+        }
+
+        def request():
+            statuses_seen = []
+            barrier.wait()
+            started_at = time.perf_counter()
+            result = application(
+                {**environ, "wsgi.input": io.BytesIO()},
+                lambda status, response_headers, exc_info=None: statuses_seen.append(int(status.split()[0]))
+            )
+            try:
+                b"".join(result)
+            finally:
+                result.close()
+            with lock:
+                samples.append(time.perf_counter() - started_at)
+                statuses[statuses_seen[0]] += 1
+
+        threads = [threading.Thread(target=request) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        thread_count = threading.active_count()
+        barrier.wait()
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return samples, statuses, time.perf_counter() - started_at, thread_count
+
+    def asgi_round(self, application, path, headers, connections):
+        """
+        ASGI 서버의 이벤트 루프 모델: 한 스레드에서 ASGI application을 동시에 호출
+        """
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"localhost")] + [
+                (name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers.items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+
+        async def request():
+            status_code = None
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+
+            started_at = time.perf_counter()
+            await application(dict(scope), receive, send)
+            return time.perf_counter() - started_at, status_code
+
+        async def run():
+            started_at = time.perf_counter()
+            results = await asyncio.gather(*(request() for _ in range(connections)))
+            return results, time.perf_counter() - started_at, threading.active_count()
+
+        results, elapsed, thread_count = asyncio.run(run())
+        return (
+            [latency for latency, _ in results],
+            Counter(status_code for _, status_code in results),
+            elapsed,
+            thread_count
+        )
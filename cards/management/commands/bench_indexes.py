@@ -0,0 +1,132 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import OuterRef
+from django.utils import timezone
+
+from cards.models import (
+    Card,
+    CardSellHistory,
+    CardSellRegister
+)
+from users.models import User
+from utilities.benchmark import format_summary, measure
+
+INDEXED_MODELS = (CardSellRegister, CardSellHistory)
+
+
+class Command(BaseCommand):
+    help = (
+        "카드 판매 등록 인덱스 적용 전/후의 쿼리 실행 계획과 소요 시간을 비교합니다. "
+        "대량의 데이터를 추가하므로 DJANGO_DATABASE_NAME으로 별도 DB를 지정해 실행하세요."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="판매 등록 행 수")
+        parser.add_argument("--cards", type=int, default=1000, help="카드 종류 수")
+        parser.add_argument("--selling-ratio", type=float, default=0.1, help="판매중인 등록 비율")
+        parser.add_argument("--repeat", type=int, default=50, help="쿼리별 반복 횟수")
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.seed(options)
+        card_ids = list(Card.objects.values_list("id", flat=True))
+
+        for phase in ("before", "after"):
+            self.set_indexes(enabled=phase == "after")
+            self.stdout.write(self.style.MIGRATE_HEADING(f"[{phase}] indexes {'on' if phase == 'after' else 'off'}"))
+            for label, build in self.queries():
+                queryset = build(random.choice(card_ids))
+                self.stdout.write(f"{label}\n  plan: {queryset.explain()}")
+                samples = measure(lambda: list(build(random.choice(card_ids))), options["repeat"])
+                self.stdout.write("  " + format_summary(label, samples))
+
+    def queries(self):
+        def best_ask(card_id):
+            return CardSellRegister.objects.filter(
+                card_id=card_id,
+                state="selling",
+                deleted_at__isnull=True
+            ).order_by("price", "created_at", "id")[:1]
+
+        def minimum_price_list(card_id):
+            minumum_price_card_ids = CardSellRegister.objects.filter(
+                card_id=OuterRef("card_id"),
+                state="selling",
+                deleted_at__isnull=True
+            ).order_by("price", "-modified_at").values("id")[:1]
+            return CardSellRegister.objects.filter(id__in=minumum_price_card_ids, card_id=card_id)
+
+        def recent_histories(card_id):
+            return CardSellHistory.objects.filter(
+                card_sell_register__card_id=card_id
+            ).order_by("-created_at")[:5]
+
+        return (
+            ("best ask", best_ask),
+            ("minimum price list", minimum_price_list),
+            ("recent sell histories", recent_histories),
+        )
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as schema_editor:
+            for model in INDEXED_MODELS:
+                with connection.cursor() as cursor:
+                    existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                for index in model._meta.indexes:
+                    # 이미 생성/삭제된 인덱스는 건너뛴다
+                    if enabled and index.name not in existing:
+                        schema_editor.add_index(model, index)
+                    elif not enabled and index.name in existing:
+                        schema_editor.remove_index(model, index)
+
+    def seed(self, options):
+        existing = CardSellRegister.objects.count()
+        if existing >= options["rows"]:
+            return
+
+        cards = Card.objects.count()
+        if cards < options["cards"]:
+            Card.objects.bulk_create(
+                [Card(name=f"bench card {i}") for i in range(cards, options["cards"])],
+                batch_size=options["batch_size"]
+            )
+        card_ids = list(Card.objects.values_list("id", flat=True))
+        User.objects.bulk_create(
+            [User(email=f"bench{i}@bench.com", nickname=f"bench{i}", password="!") for i in range(100)],
+            ignore_conflicts=True
+        )
+        user_ids = list(User.objects.filter(email__endswith="@bench.com").values_list("id", flat=True))
+
+        self.stdout.write(f"seeding {options['rows'] - existing} sell registers...")
+        now = timezone.now()
+        last_id = CardSellRegister.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        remaining = options["rows"] - existing
+        while remaining > 0:
+            size = min(options["batch_size"], remaining)
+            registers = []
+            for _ in range(size):
+                selling = random.random() < options["selling_ratio"]
+                price = random.randint(1000, 100000)
+                registers.append(CardSellRegister(
+                    card_id=random.choice(card_ids),
+                    user_id=random.choice(user_ids),
+                    price=price,
+                    fee=price // 5,
+                    state="selling" if selling else "selled",
+                    remaining_quantity=1 if selling else 0,
+                    selled_at=None if selling else now,
+                ))
+            with transaction.atomic():
+                CardSellRegister.objects.bulk_create(registers)
+            remaining -= size
+
+        # 판매 완료된 등록 정보의 판매 이력
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {CardSellHistory._meta.db_table} (created_at, modified_at, card_sell_register_id, quantity) "
+                f"SELECT selled_at, selled_at, id, quantity FROM {CardSellRegister._meta.db_table} "
+                "WHERE state = 'selled' AND id > %s",
+                [last_id]
+            )
@@ -0,0 +1,182 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_auth.utils import jwt_encode
+from rest_framework.test import APIClient
+
+from cards.management.commands.seed_market import seed_users
+from cards.models import Card, CardPossesionStatus
+from users.models import UserBalance
+from utilities.benchmark import format_summary
+
+OPERATIONS = ("list", "history", "buy", "sell")
+
+
+class TestClientDriver:
+    """
+    서버 없이 프로세스 안에서 요청을 처리(스레드마다 하나씩 생성)
+    """
+
+    def __init__(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.raise_request_exception = False
+
+    def request(self, method, path, user, data=None):
+        self.client.force_authenticate(user=user)
+        return getattr(self.client, method)(path, data, format="json").status_code
+
+    def close(self):
+        connection.close()
+
+
+class HttpDriver:
+    """
+    실행 중인 서버(--url)에 JWT 토큰으로 HTTP 요청
+    """
+
+    def __init__(self, base_url, tokens, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.tokens = tokens
+        self.timeout = timeout
+
+    def request(self, method, path, user, data=None):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if method == "post" else None,
+            method=method.upper(),
+            headers={
+                "Authorization": f"JWT {self.tokens[user.id]}",
+                "Content-Type": "application/json",
+            }
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "seed_market으로 생성한 데이터에 판매 목록/판매 이력 조회, 구매, 판매 요청을 섞어 보내고 "
+        "요청 종류별 p50/p95/p99 응답 시간과 초당 처리량을 출력합니다. "
+        "--url을 지정하면 실행 중인 서버에 HTTP로, 지정하지 않으면 테스트 클라이언트로 요청합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default=None, help="요청할 서버 주소(예: http://127.0.0.1:8000)")
+        parser.add_argument("--threads", type=int, default=8, help="동시 요청 스레드 수")
+        parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+        parser.add_argument(
+            "--mix", default="list=40,history=30,buy=20,sell=10",
+            help=f"요청 종류별 비중({', '.join(OPERATIONS)})"
+        )
+        parser.add_argument("--users", type=int, default=100, help="요청에 사용할 seed 사용자 수")
+        parser.add_argument("--cards", type=int, default=100, help="구매/판매/이력 조회에 사용할 카드 수")
+        parser.add_argument("--timeout", type=float, default=10.0, help="HTTP 요청 제한 시간(초)")
+        parser.add_argument("--seed", type=int, default=None, help="난수 시드(재현용)")
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options["mix"])
+        users, card_ids = self.prepare(options)
+
+        if options["url"]:
+            tokens = {user.id: jwt_encode(user) for user in users}
+            make_driver = lambda: HttpDriver(options["url"], tokens, options["timeout"])  # noqa: E731
+        else:
+            make_driver = TestClientDriver
+
+        samples = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        lock = threading.Lock()
+        barrier = threading.Barrier(options["threads"])
+        seed = options["seed"]
+
+        def run(index):
+            rng = random.Random(None if seed is None else seed + index)
+            driver = make_driver()
+            operations, weights = zip(*mix.items())
+            barrier.wait()
+            deadline = time.perf_counter() + options["duration"]
+            try:
+                while time.perf_counter() < deadline:
+                    operation = rng.choices(operations, weights)[0]
+                    user = rng.choice(users)
+                    card_id = rng.choice(card_ids)
+                    started_at = time.perf_counter()
+                    status_code = self.send(driver, operation, user, card_id, rng)
+                    latency = time.perf_counter() - started_at
+                    with lock:
+                        statuses[operation][status_code] += 1
+                        if status_code < 400:
+                            samples[operation].append(latency)
+            finally:
+                driver.close()
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(options["threads"])]
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+
+        target = options["url"] or "test client"
+        self.stdout.write(f"{target}, {options['threads']} threads, {elapsed:.1f}s")
+        for operation in mix:
+            self.stdout.write(format_summary(operation, samples[operation], elapsed))
+            self.stdout.write(f"{'':<40} status: {dict(sorted(statuses[operation].items()))}")
+        total = [sample for operation in mix for sample in samples[operation]]
+        self.stdout.write(format_summary("total", total, elapsed))
+
+    def parse_mix(self, value):
+        mix = {}
+        for item in value.split(","):
+            operation, _, weight = item.partition("=")
+            if operation not in OPERATIONS or not weight.isdigit():
+                raise CommandError(f"invalid --mix item: {item}")
+            if int(weight):
+                mix[operation] = int(weight)
+        if not mix:
+            raise CommandError("--mix must contain at least one operation")
+        return mix
+
+    def prepare(self, options):
+        """
+        요청에 사용할 사용자에게 구매할 잔액과 판매할 카드를 충분히 지급
+        """
+        users = list(seed_users().order_by("id")[:options["users"]])
+        card_ids = list(Card.objects.order_by("id").values_list("id", flat=True)[:options["cards"]])
+        if not users or not card_ids:
+            raise CommandError("no seed data: run `manage.py seed_market` first")
+
+        UserBalance.objects.filter(user__in=users).update(balance=10 ** 12)
+        CardPossesionStatus.objects.bulk_create([
+            CardPossesionStatus(card_id=card_id, user=user, quantity=0)
+            for user in users for card_id in card_ids
+        ], ignore_conflicts=True)
+        CardPossesionStatus.objects.filter(user__in=users, card_id__in=card_ids).update(quantity=10 ** 6)
+        return users, card_ids
+
+    def send(self, driver, operation, user, card_id, rng):
+        if operation == "list":
+            return driver.request("get", "/cards/sells", user)
+        if operation == "history":
+            return driver.request("get", f"/cards/{card_id}/sells/histories", user)
+        if operation == "buy":
+            return driver.request("post", f"/cards/{card_id}/buys", user, {})
+        return driver.request(
+            "post", f"/cards/{card_id}/sells", user, {"quantity": 1, "price": rng.randint(1000, 100000)}
+        )
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from cards.models import CardSellHistory, CardSellRegister, Trade
+from cards.serializers import (
+    CardSellRegisterListSerializer,
+    CardSellRegisterListValues,
+    TradeListValues
+)
+from utilities.benchmark import format_summary, measure
+from utilities.renderers import orjson, render_json
+
+
+class CardSellHistoryListSerializer(serializers.ModelSerializer):
+    """
+    체결 원장 이전의 판매 이력 목록 응답(비교 기준): 판매 이력마다 판매 등록 정보와 카드를 조인한다.
+    """
+    id = serializers.IntegerField()
+    createdAt = serializers.DateTimeField(source="created_at")
+    price = serializers.IntegerField(source="card_sell_register.price")
+    fee = serializers.IntegerField(source="card_sell_register.fee")
+    quantity = serializers.IntegerField()
+    selledAt = serializers.DateTimeField(source="card_sell_register.selled_at")
+    cardId = serializers.IntegerField(source="card_sell_register.card.id")
+    cardName = serializers.CharField(source="card_sell_register.card.name")
+
+    class Meta:
+        model = CardSellHistory
+        fields = ("id", "createdAt", "price", "fee", "quantity", "selledAt", "cardId", "cardName")
+
+
+class Command(BaseCommand):
+    help = (
+        "판매 등록/판매 이력 목록을 DRF ModelSerializer(select_related + JSONRenderer)와 "
+        ".values() 기반 직렬화(+ orjson 또는 표준 json)로 만드는 시간을 비교합니다(seed_market 데이터 사용). "
+        "판매 이력은 이전 이력 테이블(판매 등록 정보 조인)이 있을 때만 체결 원장과 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="목록 행 수")
+        parser.add_argument("--repeat", type=int, default=50, help="반복 횟수")
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        registers = CardSellRegister.objects.order_by("id")[:rows]
+        histories = CardSellHistory.objects.order_by("id")[:rows]
+        trades = Trade.objects.order_by("id")[:rows]
+        if not registers.exists() or not trades.exists():
+            raise CommandError("no listings: run `manage.py seed_market` first")
+
+        cases = [
+            ("sell registers: ModelSerializer", lambda: JSONRenderer().render(
+                CardSellRegisterListSerializer(registers.select_related("card", "user"), many=True).data
+            )),
+            ("sell registers: values", lambda: render_json(CardSellRegisterListValues.rows(registers))),
+        ]
+        if histories.exists():
+            cases.append(("sell histories: ModelSerializer", lambda: JSONRenderer().render(
+                CardSellHistoryListSerializer(histories.select_related("card_sell_register__card"), many=True).data
+            )))
+        cases.append(("trades: values", lambda: render_json(TradeListValues.rows(trades))))
+
+        self.stdout.write(f"{rows} rows, encoder: {'orjson' if orjson is not None else 'json'}")
+        for label, build in cases:
+            build()
+            self.stdout.write(format_summary(label, measure(build, repeat)))
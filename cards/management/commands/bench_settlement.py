@@ -0,0 +1,106 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from cards.models import (
+    Card,
+    CardPossesionStatus,
+    CardSellRegister,
+    Trade
+)
+from cards.order_book import order_book
+from users.models import User, UserBalance
+from utilities.benchmark import format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "여러 구매자 스레드가 한 카드의 판매 등록을 동시에 구매하며 체결 처리량을 측정하고, "
+        "이중 판매가 없는지 확인합니다. DJANGO_DATABASE_NAME으로 별도 DB를 지정해 실행하세요."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=2000, help="판매 등록 수")
+        parser.add_argument("--sellers", type=int, default=50, help="판매자 수")
+        parser.add_argument("--buyers", type=int, default=8, help="동시 구매자(스레드) 수")
+        parser.add_argument("--retries", type=int, default=100, help="잠금 오류(500) 발생 시 재시도 횟수")
+
+    def handle(self, *args, **options):
+        card, buyers = self.seed(options)
+        samples = []
+        failures = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(buyers))
+
+        def buy(user):
+            client = APIClient(SERVER_NAME="localhost")
+            client.raise_request_exception = False
+            client.force_authenticate(user=user)
+            barrier.wait()
+            try:
+                while True:
+                    for _ in range(options["retries"]):
+                        started_at = time.perf_counter()
+                        response = client.post(f"/cards/{card.id}/buys", format="json")
+                        if response.status_code != 500:
+                            break
+                        with lock:
+                            failures.append(response.status_code)
+                    if response.status_code != 201:
+                        return
+                    with lock:
+                        samples.append(time.perf_counter() - started_at)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in buyers]
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+
+        self.stdout.write(format_summary(f"buy x {len(buyers)} threads", samples, elapsed))
+        self.stdout.write(f"retried after lock errors: {len(failures)}")
+
+        # 이중 판매 검증: 판매 등록별 체결은 최대 1건이고, 판매 완료 수와 체결 수가 같아야 한다
+        registers = CardSellRegister.objects.filter(card=card)
+        sold = registers.filter(state="selled").count()
+        trades = Trade.objects.filter(card=card)
+        duplicated = trades.count() - trades.values("card_sell_register_id").distinct().count()
+        if duplicated or sold != trades.count() or sold != len(samples):
+            raise CommandError(f"double sale detected: sold={sold} trades={trades.count()} buys={len(samples)}")
+        self.stdout.write(self.style.SUCCESS(f"sold {sold}/{registers.count()} listings without double sales"))
+
+    def seed(self, options):
+        run = uuid.uuid4().hex[:8]
+        card = Card.objects.create(name=f"bench settlement {run}")
+        User.objects.bulk_create([
+            User(email=f"settle-{run}-{i}@bench.com", nickname=f"settle{i}", password="!")
+            for i in range(options["sellers"] + options["buyers"])
+        ])
+        users = list(User.objects.filter(email__startswith=f"settle-{run}-").order_by("id"))
+        sellers, buyers = users[:options["sellers"]], users[options["sellers"]:]
+
+        UserBalance.objects.bulk_create(
+            [UserBalance(user=user, balance=0 if user in sellers else 10 ** 9) for user in users]
+        )
+        CardPossesionStatus.objects.bulk_create(
+            [CardPossesionStatus(user=user, card=card, quantity=0) for user in users]
+        )
+        CardSellRegister.objects.bulk_create([
+            CardSellRegister(
+                card=card,
+                user=sellers[i % len(sellers)],
+                price=1000 + i % 100,
+                fee=200,
+                quantity=1
+            ) for i in range(options["listings"])
+        ])
+        order_book.clear()
+        return card, buyers
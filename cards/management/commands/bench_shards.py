@@ -0,0 +1,178 @@
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest.mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.test import APIClient
+
+from cards import shards
+from cards.models import (
+    Card,
+    CardPossesionStatus,
+    CardSellRegister,
+    Trade
+)
+from cards.order_book import order_book
+from users.models import User, UserBalance
+from utilities.benchmark import format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "카드 시장 테이블을 샤드 1/2/4/8개로 나눠 각각 임시 SQLite 파일에 만들고, 구매자 스레드가 서로 다른 카드를 "
+        "동시에 구매할 때의 체결 처리량과 서로 다른 샤드의 체결 트랜잭션이 동시에 진행된 정도(커밋 병렬도)를 "
+        "비교합니다(샤드 수마다 별도 프로세스로 실행)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8], help="비교할 샤드 수")
+        parser.add_argument("--cards", type=int, default=8, help="카드 수(구매자 스레드마다 카드 하나)")
+        parser.add_argument("--listings", type=int, default=200, help="카드별 판매 등록 수")
+        parser.add_argument("--retries", type=int, default=100, help="잠금 오류(500) 발생 시 재시도 횟수")
+        parser.add_argument("--run", action="store_true", help="현재 설정(DJANGO_CARD_SHARDS)으로 한 번 측정")
+
+    def handle(self, *args, **options):
+        if options["run"]:
+            return self.run(options)
+
+        for count in options["shards"]:
+            with tempfile.TemporaryDirectory() as directory:
+                env = {
+                    **os.environ,
+                    "DJANGO_CARD_SHARDS": str(count),
+                    "DJANGO_DATABASE_NAME": os.path.join(directory, "db.sqlite3"),
+                }
+                self.stdout.write(f"-- {count} shard(s)")
+                self.stdout.flush()
+                subprocess.run([
+                    sys.executable, str(settings.BASE_DIR / "manage.py"), "bench_shards", "--run",
+                    "--cards", str(options["cards"]),
+                    "--listings", str(options["listings"]),
+                    "--retries", str(options["retries"]),
+                ], env=env, check=True)
+
+    def run(self, options):
+        for alias in shards.shard_aliases():
+            call_command("migrate", database=alias, verbosity=0)
+        cards, buyers = self.seed(options)
+        samples = []
+        failures = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(buyers))
+
+        def buy(user, card):
+            client = APIClient(SERVER_NAME="localhost")
+            client.raise_request_exception = False
+            client.force_authenticate(user=user)
+            barrier.wait()
+            try:
+                while True:
+                    for _ in range(options["retries"]):
+                        started_at = time.perf_counter()
+                        response = client.post(f"/cards/{card.id}/buys", format="json")
+                        if response.status_code != 500:
+                            break
+                        with lock:
+                            failures.append(response.status_code)
+                    if response.status_code != 201:
+                        return
+                    with lock:
+                        samples.append(time.perf_counter() - started_at)
+            finally:
+                connections.close_all()
+
+        # 체결 트랜잭션(shards.atomic)마다 (시작, 주 DB 잔액 차감 시작, 차감 끝, 커밋 끝) 시각을 기록
+        transactions = []
+        current = threading.local()
+        atomic = shards.atomic
+        debit = UserBalance.objects.debit
+
+        @contextlib.contextmanager
+        def recorded_atomic(card_id):
+            current.times = [time.perf_counter()]
+            with atomic(card_id):
+                yield
+            if len(current.times) == 3:
+                with lock:
+                    transactions.append((*current.times, time.perf_counter()))
+
+        def recorded_debit(*args, **kwargs):
+            current.times.append(time.perf_counter())
+            debit(*args, **kwargs)
+            current.times.append(time.perf_counter())
+
+        threads = [threading.Thread(target=buy, args=pair) for pair in zip(buyers, cards)]
+        started_at = time.perf_counter()
+        with unittest.mock.patch.object(shards, "atomic", recorded_atomic), \
+                unittest.mock.patch.object(UserBalance.objects, "debit", recorded_debit):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started_at
+
+        self.stdout.write(format_summary(
+            f"buy x {len(buyers)} threads, {shards.shard_count()} shard(s)", samples, elapsed
+        ))
+        self.stdout.write(f"retried after lock errors: {len(failures)}")
+        self.write_commit_parallelism(transactions, elapsed)
+
+        trades = 0
+        for card in cards:
+            with shards.card_shard(card.id):
+                trades += Trade.objects.filter(card=card).count()
+        if trades != len(samples):
+            raise CommandError(f"trade count mismatch: trades={trades} buys={len(samples)}")
+        self.stdout.write(self.style.SUCCESS(f"settled {trades}/{len(cards) * options['listings']} listings"))
+
+    def write_commit_parallelism(self, transactions, elapsed):
+        """
+        체결 트랜잭션이 구간별로 동시에 진행된 평균 수(구간 시간 합 / 전체 시간)와 주 DB 구간의 비율을 출력한다.
+        - shard: 샤드 쓰기(등록 정보/보유 수량/원장/캔들), 샤드마다 따로 잠그므로 샤드 수만큼 겹칠 수 있다
+        - default: 주 DB 잔액 차감(쓰기 잠금 대기 포함)부터 커밋까지. 주 DB 쓰기 잠금은 하나이므로 이 구간의 트랜잭션은
+          잠금을 기다리며 하나씩 커밋되고, 샤드를 늘려도 이 구간이 커지면 체결 커밋은 병렬로 진행되지 않은 것이다
+        """
+        if not transactions or not elapsed:
+            return
+        shard = sum(debit_at - started_at for started_at, debit_at, _, _ in transactions)
+        default = sum(finished_at - debit_at for _, debit_at, _, finished_at in transactions)
+        self.stdout.write(
+            f"settlement transactions in flight: shard {shard / elapsed:.2f}, default {default / elapsed:.2f} "
+            f"({default / (shard + default):.0%} of transaction time on the default DB)"
+        )
+
+    def seed(self, options):
+        Card.objects.bulk_create([Card(name=f"bench shard {i}") for i in range(options["cards"])])
+        cards = list(Card.objects.order_by("id"))
+        User.objects.bulk_create([
+            User(email=f"shard-{i}@bench.com", nickname=f"shard{i}", password="!")
+            for i in range(options["cards"] * 2)
+        ])
+        users = list(User.objects.order_by("id"))
+        sellers, buyers = users[:options["cards"]], users[options["cards"]:]
+        UserBalance.objects.bulk_create(
+            [UserBalance(user=user, balance=0 if user in sellers else 10 ** 9) for user in users]
+        )
+        # bulk_create는 post_save를 보내지 않으므로 카드/사용자를 직접 복제
+        for alias in shards.shard_aliases()[1:]:
+            shards.replicate_all(alias)
+
+        for card, seller in zip(cards, sellers):
+            with shards.card_shard(card.id):
+                CardPossesionStatus.objects.bulk_create(
+                    [CardPossesionStatus(user=user, card=card, quantity=0) for user in (seller, *buyers)]
+                )
+                CardSellRegister.objects.bulk_create([
+                    CardSellRegister(card=card, user=seller, price=1000 + i % 100, fee=200, quantity=1)
+                    for i in range(options["listings"])
+                ])
+        order_book.clear()
+        return cards, buyers
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from cards.streams import market_stream
+from utilities.benchmark import format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "이벤트 루프 하나에 구독자를 N명 만들고 요청 스레드에서 체결/최저가 호가를 발행하며, 발행 시간과 "
+        "모든 구독자가 이벤트를 받기까지의 시간을 측정합니다(DB를 사용하지 않음)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 5000], help="구독자 수")
+        parser.add_argument("--events", type=int, default=200, help="발행 횟수")
+        parser.add_argument("--card-id", type=int, default=1)
+
+    def handle(self, *args, **options):
+        for count in options["subscribers"]:
+            self.run(count, options)
+
+    def run(self, count, options):
+        card_id = options["card_id"]
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        received = []
+        subscribers = []
+
+        async def consume(subscriber):
+            while True:
+                events = await subscriber.get()
+                received.append((time.perf_counter(), len(events)))
+
+        async def subscribe():
+            for _ in range(count):
+                subscriber = market_stream.subscribe(card_id)
+                subscribers.append((subscriber, asyncio.ensure_future(consume(subscriber))))
+            ready.set()
+
+        thread = threading.Thread(target=lambda: (loop.run_until_complete(subscribe()), loop.run_forever()))
+        thread.start()
+        ready.wait()
+
+        publishes = []
+        deliveries = []
+        for index in range(options["events"]):
+            received.clear()
+            events = [
+                ("trade", {"cardId": card_id, "price": 1000 + index, "quantity": 1}),
+                ("best_ask", {"cardId": card_id, "price": 1001 + index}),
+            ]
+            started_at = time.perf_counter()
+            market_stream.publish(card_id, events)
+            publishes.append(time.perf_counter() - started_at)
+            while len(received) < count:
+                time.sleep(0.0005)
+            deliveries.append(max(at for at, _ in received) - started_at)
+
+        async def close():
+            for subscriber, task in subscribers:
+                task.cancel()
+                market_stream.unsubscribe(card_id, subscriber)
+            await asyncio.gather(*(task for _, task in subscribers), return_exceptions=True)
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(close(), loop)
+        thread.join()
+        loop.close()
+
+        self.stdout.write(format_summary(f"publish, {count} subscribers", publishes))
+        self.stdout.write(format_summary(f"deliver to all, {count} subscribers", deliveries))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cards.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "보관 기간이 지난 멱등 키(Idempotency-Key) 행을 일정 개수씩 나눠 삭제합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        deleted = 0
+        now = timezone.now()
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now)
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            count, _ = IdempotencyKey.objects.filter(id__in=ids, expires_at__lte=now).delete()
+            deleted += count
+        self.stdout.write(self.style.SUCCESS(f"deleted {deleted} expired idempotency keys"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from cards import shards
+from cards.models import CardPossesionStatus
+
+
+class Command(BaseCommand):
+    help = "보유 수량이 0인 카드 소유 현황 행을 일정 개수씩 나눠 삭제합니다(행이 없으면 0장으로 처리됩니다)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for alias in shards.shard_aliases():
+            with shards.using_shard(alias):
+                while True:
+                    ids = list(
+                        CardPossesionStatus.objects.filter(quantity=0)
+                        .values_list("id", flat=True)[:options["batch_size"]]
+                    )
+                    if not ids:
+                        break
+                    # 조회 이후 수량이 늘어난 행은 지우지 않는다
+                    count, _ = CardPossesionStatus.objects.filter(id__in=ids, quantity=0).delete()
+                    deleted += count
+        self.stdout.write(self.style.SUCCESS(f"deleted {deleted} empty card possession rows"))
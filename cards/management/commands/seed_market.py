@@ -0,0 +1,138 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from cards.models import (
+    Card,
+    CardPossesionStatus,
+    CardSellRegister,
+    Trade
+)
+from users.models import User, UserBalance
+
+SEED_EMAIL_DOMAIN = "seed.market"
+
+
+def seed_users():
+    return User.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}")
+
+
+class Command(BaseCommand):
+    help = (
+        "부하 테스트용 카드/사용자/판매 등록/거래 이력 데이터를 일정 개수씩 나눠(bulk_create) 생성합니다. "
+        "대량의 데이터를 추가하므로 DJANGO_DATABASE_NAME으로 별도 DB를 지정해 실행하세요."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=1000, help="카드 종류 수")
+        parser.add_argument("--users", type=int, default=10000, help="사용자 수")
+        parser.add_argument("--listings", type=int, default=1_000_000, help="판매 등록 수")
+        parser.add_argument(
+            "--popularity", choices=("uniform", "zipf"), default="zipf",
+            help="카드별 판매 등록 수 분포(zipf: 일부 인기 카드에 등록이 몰림)"
+        )
+        parser.add_argument("--zipf-exponent", type=float, default=1.1)
+        parser.add_argument("--price-min", type=int, default=1000, help="카드 기준 가격 최솟값")
+        parser.add_argument("--price-max", type=int, default=100000, help="카드 기준 가격 최댓값")
+        parser.add_argument("--price-spread", type=float, default=0.1, help="기준 가격 대비 판매 가격의 표준편차 비율")
+        parser.add_argument("--max-quantity", type=int, default=5, help="판매 등록당 최대 수량")
+        parser.add_argument("--sold-ratio", type=float, default=0.8, help="판매완료된 등록 비율(거래 이력 생성)")
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=None, help="난수 시드(재현용)")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        cards = self.seed_cards(options)
+        user_ids = self.seed_users(options)
+        self.seed_listings(options, cards, user_ids)
+
+    def seed_cards(self, options):
+        existing = Card.objects.count()
+        self.bulk_create(Card, (Card(name=f"seed card {i}") for i in range(existing, options["cards"])))
+        cards = list(Card.objects.values_list("id", flat=True)[:options["cards"]])
+
+        if options["popularity"] == "zipf":
+            weights = [1 / (rank + 1) ** options["zipf_exponent"] for rank in range(len(cards))]
+        else:
+            weights = [1] * len(cards)
+        base_prices = [self.random.randint(options["price_min"], options["price_max"]) for _ in cards]
+        self.stdout.write(f"cards: {len(cards)}")
+        return list(zip(cards, base_prices)), weights
+
+    def seed_users(self, options):
+        existing = seed_users().count()
+        self.bulk_create(User, (
+            User(email=f"user{i}@{SEED_EMAIL_DOMAIN}", nickname=f"user{i}", password="!")
+            for i in range(existing, options["users"])
+        ))
+        user_ids = list(seed_users().order_by("id").values_list("id", flat=True))
+        self.bulk_create(UserBalance, (
+            UserBalance(user_id=user_id, balance=10 ** 9)
+            for user_id in user_ids[existing:]
+        ))
+        self.stdout.write(f"users: {len(user_ids)}")
+        return user_ids
+
+    def seed_listings(self, options, cards, user_ids):
+        cards, weights = cards
+        now = timezone.now()
+        last_id = CardSellRegister.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+
+        def listings():
+            for chunk in range(0, options["listings"], self.batch_size):
+                size = min(self.batch_size, options["listings"] - chunk)
+                for card_id, base_price in self.random.choices(cards, weights, k=size):
+                    price = max(1, round(self.random.gauss(base_price, base_price * options["price_spread"])))
+                    quantity = self.random.randint(1, options["max_quantity"])
+                    sold = self.random.random() < options["sold_ratio"]
+                    yield CardSellRegister(
+                        card_id=card_id,
+                        user_id=self.random.choice(user_ids),
+                        price=price,
+                        fee=int(price * 0.2),
+                        quantity=quantity,
+                        remaining_quantity=0 if sold else quantity,
+                        state="selled" if sold else "selling",
+                        selled_at=now if sold else None,
+                    )
+
+        self.bulk_create(CardSellRegister, listings())
+        self.stdout.write(f"listings: {options['listings']}")
+
+        # 판매완료된 등록 정보의 체결 원장(구매자는 등록 id로 사용자 범위에서 고름)
+        bounds = seed_users().aggregate(first=Min("id"), last=Max("id"))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {Trade._meta.db_table} "
+                "(card_id, card_sell_register_id, buyer_id, seller_id, price, fee, quantity, executed_at) "
+                f"SELECT card_id, id, %s + id %% %s, user_id, price, fee, quantity, selled_at "
+                f"FROM {CardSellRegister._meta.db_table} WHERE state = 'selled' AND id > %s",
+                [bounds["first"], bounds["last"] - bounds["first"] + 1, last_id]
+            )
+
+        # 판매중인 등록 정보의 판매자는 해당 카드를 더 보유하고 있다고 가정
+        possessions = (
+            CardSellRegister.objects.filter(id__gt=last_id, state="selling")
+            .values_list("card_id", "user_id").distinct()
+        )
+        self.bulk_create(CardPossesionStatus, (
+            CardPossesionStatus(card_id=card_id, user_id=user_id, quantity=options["max_quantity"])
+            for card_id, user_id in possessions.iterator()
+        ), ignore_conflicts=True)
+
+    def bulk_create(self, model, objects, **kwargs):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch, **kwargs)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
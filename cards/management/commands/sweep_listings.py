@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from cards.listings import sweep_listings
+
+
+class Command(BaseCommand):
+    help = (
+        "만료 시각이 지난 판매 등록을 판매만료 처리하고(남은 수량은 판매자에게 돌려줌), 판매가 끝난 "
+        "등록을 등록 월별 보관 테이블로 옮깁니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="한 번에 조회/이동할 판매 등록 수")
+
+    def handle(self, *args, **options):
+        expired, archived = sweep_listings(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"expired {expired} listings, archived {archived} listings"))
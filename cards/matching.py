@@ -0,0 +1,170 @@
+"""
+비동기 체결 엔진: settings.CARD_MATCHING["MODE"]가 "async"이면 판매/구매 요청을 주문(CardOrder)으로 저장해
+큐에 넣고 바로 주문 id를 응답합니다. 카드 샤드(card_id % SHARDS)마다 워커 스레드 하나가 주문을 순서대로
+체결하므로, 같은 카드의 주문끼리 행/DB 잠금을 두고 경쟁하지 않습니다.
+
+큐 백엔드는 CARD_MATCHING["BACKEND"]로 교체할 수 있으며 put(shard, order_id)/get(shard, timeout) 을
+구현해야 합니다. 기본 InProcessQueueBackend는 주문을 접수한 프로세스 안에서만 처리합니다.
+
+SQLite 잠금 오류 재시도는 체결 함수(cards.orders)의 retry_on_busy 한 곳에서만 합니다. 재시도를 다 써도 실패한
+주문은 워커가 500으로 거절합니다.
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import (
+    close_old_connections,
+    IntegrityError
+)
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+
+from cards.exceptions import InvalidData, OrderQueueFull
+from cards.models import CardOrder
+from cards.orders import EXECUTORS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATCHING_SETTINGS = {
+    "MODE": "sync",
+    "BACKEND": "cards.matching.InProcessQueueBackend",
+    "SHARDS": 4,
+    "QUEUE_SIZE": 1000,
+}
+
+
+class InProcessQueueBackend:
+    """
+    샤드별로 크기가 제한된 프로세스 내부 큐
+    """
+
+    def __init__(self, shards, queue_size):
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(shards)]
+
+    def put(self, shard, order_id):
+        """
+        큐가 가득 차면 queue.Full을 발생시킨다.
+        """
+        self._queues[shard].put_nowait(order_id)
+
+    def get(self, shard, timeout=None):
+        """
+        timeout 동안 주문이 없으면 queue.Empty를 발생시킨다.
+        """
+        return self._queues[shard].get(timeout=timeout)
+
+
+class MatchingEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processed = threading.Condition()
+        self._backend = None
+
+    @property
+    def settings(self):
+        return {**DEFAULT_MATCHING_SETTINGS, **getattr(settings, "CARD_MATCHING", {})}
+
+    @property
+    def enabled(self):
+        return self.settings["MODE"] == "async"
+
+    def start(self):
+        """
+        큐 백엔드를 만들고 샤드별 워커 스레드를 시작한다(처음 한 번만).
+        """
+        with self._lock:
+            if self._backend is not None:
+                return
+            matching_settings = self.settings
+            self._shards = matching_settings["SHARDS"]
+            self._backend = import_string(matching_settings["BACKEND"])(
+                self._shards, matching_settings["QUEUE_SIZE"]
+            )
+            for shard in range(self._shards):
+                threading.Thread(
+                    target=self._work, args=(shard,), name=f"card-matching-{shard}", daemon=True
+                ).start()
+
+    def submit(self, side, user_id, card_id, **params):
+        """
+        주문을 저장하고 카드 샤드의 큐에 넣는다. 큐가 가득 차면 주문을 지우고 OrderQueueFull을 발생시킨다.
+        """
+        self.start()
+        try:
+            order = CardOrder.objects.create(side=side, user_id=user_id, card_id=card_id, params=params)
+        except IntegrityError:
+            raise InvalidData(
+                **{
+                    "detail": "주문할 카드가 없습니다",
+                    "code": "InvalidCardId"
+                }
+            )
+
+        try:
+            self._backend.put(card_id % self._shards, order.id)
+        except queue.Full:
+            order.delete()
+            raise OrderQueueFull()
+        return order
+
+    def process(self, order_id):
+        """
+        주문 하나를 체결하고 결과를 저장한다.
+        """
+        order = CardOrder.objects.get(id=order_id)
+        execute = EXECUTORS[order.side]
+
+        try:
+            order.result = execute(order.user_id, order.card_id, **order.params)
+            order.status_code = 201
+            order.state = "filled"
+        except APIException as exc:
+            order.result = {
+                "detail": exc.detail,
+                "status_code": exc.status_code,
+                "default_code": exc.default_code,
+            }
+            order.status_code = exc.status_code
+            order.state = "rejected"
+        order.save(update_fields=["result", "status_code", "state", "modified_at"])
+
+        with self._processed:
+            self._processed.notify_all()
+        return order
+
+    def wait(self, order, timeout):
+        """
+        주문이 처리되거나 timeout(초)이 지날 때까지 기다린다(long-poll).
+        같은 프로세스의 워커가 처리하면 바로 깨어나고, 그렇지 않으면 0.5초마다 DB를 다시 확인한다.
+        """
+        deadline = time.monotonic() + timeout
+        while order.state == "pending":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._processed:
+                self._processed.wait(min(remaining, 0.5))
+            order.refresh_from_db()
+        return order
+
+    def _work(self, shard):
+        while True:
+            order_id = self._backend.get(shard)
+            close_old_connections()
+            try:
+                self.process(order_id)
+            except Exception:
+                logger.exception("failed to process card order %s", order_id)
+                CardOrder.objects.filter(id=order_id, state="pending").update(
+                    state="rejected",
+                    status_code=500,
+                    result={"detail": "주문 처리 중 오류가 발생했습니다.", "status_code": 500}
+                )
+            finally:
+                close_old_connections()
+
+
+matching_engine = MatchingEngine()
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0002_auto_20240804_2057'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cardsellhistory',
+            index=models.Index(fields=['-created_at'], name='cards_sellhist_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellhistory',
+            index=models.Index(fields=['card_sell_register', '-created_at'], name='cards_sellhist_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('state', 'selling')), fields=['card', 'price', 'created_at'], name='cards_sell_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('state', 'selling')), fields=['card', 'price', '-modified_at'], name='cards_sell_open_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(fields=['card', 'state', 'selled_at'], name='cards_sell_state_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def fill_quantities(apps, schema_editor):
+    """
+    기존 판매 등록은 전량 판매되었으므로 판매중이면 남은 수량 = 수량, 판매완료면 0으로 채우고
+    판매/구매 이력의 체결 수량은 판매 등록 수량으로 채운다.
+    """
+    CardSellRegister = apps.get_model("cards", "CardSellRegister")
+    CardSellHistory = apps.get_model("cards", "CardSellHistory")
+    CardBuyHistory = apps.get_model("cards", "CardBuyHistory")
+
+    CardSellRegister.objects.exclude(state="selled").update(remaining_quantity=F("quantity"))
+    CardSellRegister.objects.filter(state="selled").update(remaining_quantity=0)
+    for model in (CardSellHistory, CardBuyHistory):
+        model.objects.update(
+            quantity=Subquery(
+                CardSellRegister.objects.filter(id=OuterRef("card_sell_register_id")).values("quantity")[:1]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_sell_register_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardbuyhistory',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1, verbose_name='체결 수량'),
+        ),
+        migrations.AddField(
+            model_name='cardsellhistory',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1, verbose_name='체결 수량'),
+        ),
+        migrations.AddField(
+            model_name='cardsellregister',
+            name='remaining_quantity',
+            field=models.PositiveIntegerField(default=1, verbose_name='남은 수량'),
+        ),
+        migrations.RunPython(fill_quantities, migrations.RunPython.noop),
+    ]
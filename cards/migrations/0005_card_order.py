@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cards', '0004_partial_fills'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('side', models.CharField(choices=[('sell', '판매'), ('buy', '구매'), ('batch_buy', '일괄 구매')], max_length=10, verbose_name='주문 종류')),
+                ('state', models.CharField(choices=[('pending', '대기중'), ('filled', '처리완료'), ('rejected', '거부')], default='pending', max_length=10, verbose_name='상태')),
+                ('params', models.JSONField(verbose_name='주문 내용')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='처리 결과 상태 코드')),
+                ('result', models.JSONField(null=True, verbose_name='처리 결과')),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='cards.card', verbose_name='카드')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='주문자')),
+            ],
+            options={
+                'verbose_name_plural': '카드 주문',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 19:44
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def prune_possessions(apps, schema_editor):
+    """
+    보유 수량이 0인 카드 소유 현황을 지우고, 같은 카드/사용자의 중복 행은 수량을 합쳐 하나로 만든다.
+    """
+    CardPossesionStatus = apps.get_model("cards", "CardPossesionStatus")
+
+    CardPossesionStatus.objects.filter(quantity=0).delete()
+    duplicates = (
+        CardPossesionStatus.objects.values("card_id", "user_id")
+        .annotate(count=Count("id"), total=Sum("quantity"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = CardPossesionStatus.objects.filter(card_id=duplicate["card_id"], user_id=duplicate["user_id"])
+        keep = rows.order_by("id").first()
+        rows.exclude(id=keep.id).delete()
+        rows.filter(id=keep.id).update(quantity=duplicate["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_card_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(prune_possessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cardpossesionstatus',
+            constraint=models.UniqueConstraint(fields=('card', 'user'), name='cards_possession_card_user_unique'),
+        ),
+    ]
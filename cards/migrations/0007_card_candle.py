@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-18 20:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_lazy_possessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('interval', models.CharField(choices=[('1m', '1분'), ('1h', '1시간'), ('1d', '1일')], max_length=2, verbose_name='단위')),
+                ('started_at', models.DateTimeField(verbose_name='구간 시작 시각')),
+                ('open', models.PositiveIntegerField(verbose_name='시가')),
+                ('high', models.PositiveIntegerField(verbose_name='고가')),
+                ('low', models.PositiveIntegerField(verbose_name='저가')),
+                ('close', models.PositiveIntegerField(verbose_name='종가')),
+                ('volume', models.PositiveIntegerField(verbose_name='거래량')),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='cards.card', verbose_name='카드')),
+            ],
+            options={
+                'verbose_name_plural': '카드 캔들',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cardcandle',
+            constraint=models.UniqueConstraint(fields=('card', 'interval', 'started_at'), name='cards_candle_unique'),
+        ),
+    ]
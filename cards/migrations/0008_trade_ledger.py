@@ -0,0 +1,95 @@
+# Generated by Django 3.2 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def copy_histories(apps, schema_editor):
+    """
+    기존 판매/구매 이력을 체결 원장으로 옮긴다. 체결 건마다 판매 이력과 구매 이력이 하나씩 저장되었으므로
+    판매 등록 정보별로 두 이력을 id 순서대로 짝지으며, 짝이 없는 이력은 구매자나 판매자를 알 수 없어 옮기지 않는다.
+    """
+    CardSellHistory = apps.get_model("cards", "CardSellHistory")
+    CardBuyHistory = apps.get_model("cards", "CardBuyHistory")
+    CardSellRegister = apps.get_model("cards", "CardSellRegister")
+    Trade = apps.get_model("cards", "Trade")
+
+    registers = CardSellRegister.objects.filter(cardsellhistory__isnull=False).distinct().order_by("id")
+    last_id = 0
+    while True:
+        batch = list(
+            registers.filter(id__gt=last_id).values_list("id", "card_id", "user_id", "price", "fee")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        register_ids = [register[0] for register in batch]
+
+        sells, buys = {}, {}
+        for register_id, created_at, quantity in CardSellHistory.objects.filter(
+            card_sell_register_id__in=register_ids
+        ).order_by("id").values_list("card_sell_register_id", "created_at", "quantity"):
+            sells.setdefault(register_id, []).append((created_at, quantity))
+        for register_id, user_id in CardBuyHistory.objects.filter(
+            card_sell_register_id__in=register_ids
+        ).order_by("id").values_list("card_sell_register_id", "user_id"):
+            buys.setdefault(register_id, []).append(user_id)
+
+        Trade.objects.bulk_create([
+            Trade(
+                card_id=card_id,
+                card_sell_register_id=register_id,
+                buyer_id=buyer_id,
+                seller_id=seller_id,
+                price=price,
+                fee=fee,
+                quantity=quantity,
+                executed_at=executed_at
+            )
+            for register_id, card_id, seller_id, price, fee in batch
+            for (executed_at, quantity), buyer_id in zip(sells.get(register_id, ()), buys.get(register_id, ()))
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cards', '0007_card_candle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.PositiveIntegerField(verbose_name='체결 가격')),
+                ('fee', models.PositiveIntegerField(verbose_name='수수료')),
+                ('quantity', models.PositiveIntegerField(verbose_name='체결 수량')),
+                ('executed_at', models.DateTimeField(verbose_name='체결 시각')),
+                ('buyer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='bought_trades', to=settings.AUTH_USER_MODEL, verbose_name='구매자')),
+                ('card', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='cards.card', verbose_name='카드')),
+                ('card_sell_register', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='cards.cardsellregister', verbose_name='카드 판매 등록')),
+                ('seller', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='sold_trades', to=settings.AUTH_USER_MODEL, verbose_name='판매자')),
+            ],
+            options={
+                'verbose_name_plural': '체결 원장',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['card', '-executed_at', '-id'], name='cards_trade_card_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['buyer', '-executed_at', '-id'], name='cards_trade_buyer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['seller', '-executed_at', '-id'], name='cards_trade_seller_idx'),
+        ),
+        migrations.RunPython(copy_histories, migrations.RunPython.noop),
+    ]
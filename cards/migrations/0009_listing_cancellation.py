@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 20:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def cancel_deleted_listings(apps, schema_editor):
+    """
+    삭제 날짜가 있는 판매중 등록 정보를 판매취소로 바꾼다(판매중 여부를 state만으로 구분하도록).
+    """
+    CardSellRegister = apps.get_model("cards", "CardSellRegister")
+    CardSellRegister.objects.filter(state="selling", deleted_at__isnull=False).update(state="cancelled")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_trade_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cardsellregister',
+            name='cards_sell_open_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cardsellregister',
+            name='cards_sell_open_modified_idx',
+        ),
+        migrations.AddField(
+            model_name='cardsellregister',
+            name='expires_at',
+            field=models.DateTimeField(null=True, verbose_name='판매 만료 시각'),
+        ),
+        migrations.AlterField(
+            model_name='cardsellregister',
+            name='state',
+            field=models.CharField(choices=[('selling', '판매중'), ('selled', '판매완료'), ('trading', '거래중'), ('cancelled', '판매취소'), ('expired', '판매만료')], default='selling', max_length=10, verbose_name='상태'),
+        ),
+        migrations.RunPython(cancel_deleted_listings, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='trade',
+            name='card_sell_register',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='cards.cardsellregister', verbose_name='카드 판매 등록'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(condition=models.Q(state='selling'), fields=['card', 'price', 'created_at'], name='cards_sell_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(condition=models.Q(state='selling'), fields=['card', 'price', '-modified_at'], name='cards_sell_open_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False), ('state', 'selling')), fields=['expires_at'], name='cards_sell_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardsellregister',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='cards_sell_closed_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 20:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cards', '0009_listing_cancellation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='멱등 키')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='요청 내용 해시')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='처리 결과 상태 코드')),
+                ('response', models.JSONField(null=True, verbose_name='처리 결과')),
+                ('created_at', models.DateTimeField(verbose_name='요청 날짜')),
+                ('expires_at', models.DateTimeField(verbose_name='보관 만료 시각')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='요청한 사용자')),
+            ],
+            options={
+                'verbose_name_plural': '멱등 키',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='idempotencykey',
+            index=models.Index(fields=['expires_at'], name='cards_idempotency_expiry_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='cards_idempotency_user_key_unique'),
+        ),
+    ]
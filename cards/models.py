@@ -1,11 +1,38 @@
-from django.db import models
+from django.db import (
+    models,
+    transaction,
+    IntegrityError
+)
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest, Least, Now
 
+from cards.candles import aggregate, candle_starts
 from utilities.models import TimeStampedModel
 
 CARD_SELL_STATE = (
     ("selling", "판매중"),
     ("selled", "판매완료"),
     ("trading", "거래중"),
+    ("cancelled", "판매취소"),
+    ("expired", "판매만료"),
+)
+
+CARD_ORDER_SIDE = (
+    ("sell", "판매"),
+    ("buy", "구매"),
+    ("batch_buy", "일괄 구매"),
+)
+
+CANDLE_INTERVAL = (
+    ("1m", "1분"),
+    ("1h", "1시간"),
+    ("1d", "1일"),
+)
+
+CARD_ORDER_STATE = (
+    ("pending", "대기중"),
+    ("filled", "처리완료"),
+    ("rejected", "거부"),
 )
 
 
@@ -19,48 +46,286 @@ class Card(TimeStampedModel):
 class CardSellRegister(TimeStampedModel):
     """
     카드 판매 등록 모델: 사용자가 카드를 판매하기 위해 등록하는 테이블입니다.
+    가격/수수료는 카드 1장 기준이며, 여러 구매자에게 부분 체결되어 남은 수량이 0이 되면 판매완료됩니다.
+    판매자가 취소하거나 만료 시각(expires_at)이 지나면 판매취소/판매만료되고(deleted_at), 판매가 끝난 등록 정보는
+    판매 정리 작업이 월별 보관 테이블(cards.archive)로 옮깁니다. 판매중인 등록 정보는 state="selling"만으로 구분합니다.
     """
     deleted_at = models.DateTimeField(null=True, verbose_name="등록삭제 날짜")
+    expires_at = models.DateTimeField(null=True, verbose_name="판매 만료 시각")
     selled_at = models.DateTimeField(null=True, verbose_name="판매완료 날짜")
     state = models.CharField(max_length=10, verbose_name="상태", choices=CARD_SELL_STATE, default="selling")
     card = models.ForeignKey("cards.Card", on_delete=models.PROTECT, verbose_name="카드")
     price = models.PositiveIntegerField(verbose_name="가격")
     fee = models.PositiveIntegerField(verbose_name="수수료")
     quantity = models.PositiveIntegerField(verbose_name="수량", default=1)
+    remaining_quantity = models.PositiveIntegerField(verbose_name="남은 수량", default=1)
     user = models.ForeignKey("users.User", on_delete=models.PROTECT, verbose_name="판매자")
 
     class Meta:
         verbose_name_plural = "카드 판매 등록"
+        indexes = [
+            # 판매중인 등록 정보만 담는 부분 인덱스: 최저가(가격-시간 우선순위) 조회 및 주문장 적재
+            models.Index(
+                fields=["card", "price", "created_at"],
+                name="cards_sell_open_idx",
+                condition=Q(state="selling"),
+            ),
+            # 판매중인 등록 정보만 담는 부분 인덱스: 카드별 최저가 목록(가격, 최근 수정일 순)
+            models.Index(
+                fields=["card", "price", "-modified_at"],
+                name="cards_sell_open_modified_idx",
+                condition=Q(state="selling"),
+            ),
+            # 만료 시각이 있는 판매중 등록 정보(판매 정리 작업이 만료된 등록 정보를 찾음)
+            models.Index(
+                fields=["expires_at"],
+                name="cards_sell_expiry_idx",
+                condition=Q(state="selling", expires_at__isnull=False),
+            ),
+            # 카드별 판매 완료 이력 조회
+            models.Index(fields=["card", "state", "selled_at"], name="cards_sell_state_idx"),
+            # 판매취소/판매만료된 등록 정보(판매 정리 작업이 보관 테이블로 옮김)
+            models.Index(
+                fields=["deleted_at"],
+                name="cards_sell_closed_idx",
+                condition=Q(deleted_at__isnull=False),
+            ),
+        ]
 
 
 class CardSellHistory(TimeStampedModel):
     """
-    카드 판매 이력 모델: 카드 판매 등록이 완료되면 이력을 저장하는 테이블입니다.
+    카드 판매 이력 모델: 카드 판매 등록이 체결되면 체결 건별로 이력을 저장하는 테이블입니다.
     """
     card_sell_register = models.ForeignKey("cards.CardSellRegister", on_delete=models.PROTECT, verbose_name="카드 판매 등록")
+    quantity = models.PositiveIntegerField(verbose_name="체결 수량", default=1)
 
     class Meta:
         verbose_name_plural = "카드 판매 이력"
+        indexes = [
+            # 카드별 최근 거래 이력 조회(등록 정보의 card_id로 거른 뒤 created_at 역순 정렬)
+            models.Index(fields=["-created_at"], name="cards_sellhist_created_idx"),
+            models.Index(fields=["card_sell_register", "-created_at"], name="cards_sellhist_reg_idx"),
+        ]
 
 
 class CardBuyHistory(TimeStampedModel):
     """
-    카드 구매 이력 모델: 카드 구매가 완료되면 이력을 저장하는 테이블입니다.
+    카드 구매 이력 모델: 카드 구매가 체결되면 체결 건별로 이력을 저장하는 테이블입니다.
     """
     card_sell_register = models.ForeignKey("cards.CardSellRegister", on_delete=models.PROTECT, verbose_name="카드 판매 등록")
+    quantity = models.PositiveIntegerField(verbose_name="체결 수량", default=1)
     user = models.ForeignKey("users.User", on_delete=models.PROTECT, verbose_name="구매자")
 
     class Meta:
         verbose_name_plural = "카드 구매 이력"
 
 
+class Trade(models.Model):
+    """
+    체결 원장 모델: 체결 건별로 settlement.settle()에서 한 번만 쓰고 수정하지 않는 테이블입니다.
+    카드/구매자/판매자/가격/수수료/수량/체결 시각을 함께 저장해, 이력 조회가 판매 등록 정보를 조인하지 않고
+    이 테이블의 인덱스 범위만 읽는다. 가격/수수료는 카드 1장 기준이다.
+    CardSellHistory/CardBuyHistory는 이전 이력(0008 마이그레이션에서 옮김) 보관용으로만 남긴다.
+    """
+    # card/buyer/seller 단독 인덱스는 아래 복합 인덱스가 대신하므로 만들지 않는다(쓰기 시 인덱스 수를 줄임)
+    card = models.ForeignKey("cards.Card", on_delete=models.PROTECT, db_index=False, verbose_name="카드")
+    # 판매가 끝난 등록 정보는 판매 등록 테이블에서 월별 보관 테이블로 옮기므로 외래 키 제약 없이 id만 보관한다
+    card_sell_register = models.ForeignKey(
+        "cards.CardSellRegister", on_delete=models.DO_NOTHING, db_constraint=False, verbose_name="카드 판매 등록"
+    )
+    buyer = models.ForeignKey(
+        "users.User", on_delete=models.PROTECT, db_index=False, related_name="bought_trades", verbose_name="구매자"
+    )
+    seller = models.ForeignKey(
+        "users.User", on_delete=models.PROTECT, db_index=False, related_name="sold_trades", verbose_name="판매자"
+    )
+    price = models.PositiveIntegerField(verbose_name="체결 가격")
+    fee = models.PositiveIntegerField(verbose_name="수수료")
+    quantity = models.PositiveIntegerField(verbose_name="체결 수량")
+    executed_at = models.DateTimeField(verbose_name="체결 시각")
+
+    class Meta:
+        verbose_name_plural = "체결 원장"
+        indexes = [
+            # 카드별/사용자별 체결 시각 범위 조회(최신순, 같은 시각은 id 역순)
+            models.Index(fields=["card", "-executed_at", "-id"], name="cards_trade_card_idx"),
+            models.Index(fields=["buyer", "-executed_at", "-id"], name="cards_trade_buyer_idx"),
+            models.Index(fields=["seller", "-executed_at", "-id"], name="cards_trade_seller_idx"),
+        ]
+
+
+class CardPossesionStatusManager(models.Manager):
+    def credit(self, card_id, user_id, quantity):
+        """
+        사용자의 카드 보유 수량을 늘린다. 보유 정보가 없으면(처음 보유하는 카드) 생성한다.
+        """
+        if self.filter(card_id=card_id, user_id=user_id).update(quantity=F("quantity") + quantity):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(card_id=card_id, user_id=user_id, quantity=quantity)
+        except IntegrityError:
+            # 동시에 다른 요청이 먼저 생성한 경우
+            if not self.filter(card_id=card_id, user_id=user_id).update(quantity=F("quantity") + quantity):
+                raise
+
+    def debit(self, card_id, user_id, quantity):
+        """
+        사용자의 카드 보유 수량을 줄이고 성공 여부를 반환한다. 보유 정보가 없으면 0장으로 본다.
+        """
+        return self.filter(
+            card_id=card_id,
+            user_id=user_id,
+            quantity__gte=quantity
+        ).update(quantity=F("quantity") - quantity) == 1
+
+
 class CardPossesionStatus(TimeStampedModel):
     """
     카드 소유 현황 모델: 사용자가 현재 판매중이지 않고 가지고 있는 카드별 개수를 저장하는 테이블입니다.
+    카드를 처음 보유하게 될 때 생성하며, 행이 없으면 0장으로 봅니다.
     """
     card = models.ForeignKey("cards.Card", on_delete=models.PROTECT, verbose_name="카드")
     quantity = models.PositiveIntegerField(verbose_name="판매 가능 수량")
     user = models.ForeignKey("users.User", on_delete=models.PROTECT, verbose_name="사용자")
 
+    objects = CardPossesionStatusManager()
+
     class Meta:
         verbose_name_plural = "카드 소유 현황"
+        constraints = [
+            models.UniqueConstraint(fields=["card", "user"], name="cards_possession_card_user_unique"),
+        ]
+
+
+class CardOrder(TimeStampedModel):
+    """
+    카드 주문 모델: 비동기 체결 모드에서 접수된 판매/구매 요청과 처리 결과를 저장하는 테이블입니다.
+    """
+    side = models.CharField(max_length=10, verbose_name="주문 종류", choices=CARD_ORDER_SIDE)
+    state = models.CharField(max_length=10, verbose_name="상태", choices=CARD_ORDER_STATE, default="pending")
+    card = models.ForeignKey("cards.Card", on_delete=models.PROTECT, verbose_name="카드")
+    user = models.ForeignKey("users.User", on_delete=models.PROTECT, verbose_name="주문자")
+    params = models.JSONField(verbose_name="주문 내용")
+    status_code = models.PositiveSmallIntegerField(null=True, verbose_name="처리 결과 상태 코드")
+    result = models.JSONField(null=True, verbose_name="처리 결과")
+
+    class Meta:
+        verbose_name_plural = "카드 주문"
+
+
+class IdempotencyKey(models.Model):
+    """
+    멱등 키 모델: Idempotency-Key 헤더가 있는 판매/구매 요청의 처리 결과를 보관 기간(expires_at) 동안 저장하는
+    테이블입니다(cards.idempotency). 처리 결과(status_code)가 없으면 처리 중인 요청입니다.
+    """
+    user = models.ForeignKey("users.User", on_delete=models.PROTECT, db_index=False, verbose_name="요청한 사용자")
+    key = models.CharField(max_length=255, verbose_name="멱등 키")
+    fingerprint = models.CharField(max_length=64, verbose_name="요청 내용 해시")
+    status_code = models.PositiveSmallIntegerField(null=True, verbose_name="처리 결과 상태 코드")
+    response = models.JSONField(null=True, verbose_name="처리 결과")
+    created_at = models.DateTimeField(verbose_name="요청 날짜")
+    expires_at = models.DateTimeField(verbose_name="보관 만료 시각")
+
+    class Meta:
+        verbose_name_plural = "멱등 키"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="cards_idempotency_user_key_unique"),
+        ]
+        indexes = [
+            # 보관 기간이 지난 키 정리(prune_idempotency_keys)
+            models.Index(fields=["expires_at"], name="cards_idempotency_expiry_idx"),
+        ]
+
+
+class CardCandleManager(models.Manager):
+    def _merge(self, card_id, starts, candle, append=True):
+        """
+        starts({단위: 시작 시각})의 캔들에 candle을 합치고 갱신한 행 수를 반환한다.
+        append이면 기존 캔들 이후의 체결(종가 변경), 아니면 이전의 체결(시가 변경)로 합친다.
+        """
+        if not starts:
+            return 0
+        condition = Q()
+        for interval, started_at in starts.items():
+            condition |= Q(interval=interval, started_at=started_at)
+        changes = {"open": Value(candle.open)} if not append else {"close": Value(candle.close)}
+        return self.filter(condition, card_id=card_id).update(
+            high=Greatest("high", Value(candle.high)),
+            low=Least("low", Value(candle.low)),
+            volume=F("volume") + candle.volume,
+            modified_at=Now(),
+            **changes
+        )
+
+    def _create_or_merge(self, card_id, starts, candle, append=True):
+        """
+        starts 중 아직 없는 캔들을 생성한다(동시에 다른 체결이 먼저 생성했으면 합친다).
+        """
+        existing = set(
+            self.filter(card_id=card_id, interval__in=starts)
+            .filter(started_at__in=starts.values())
+            .values_list("interval", "started_at")
+        )
+        missing = {
+            interval: started_at for interval, started_at in starts.items() if (interval, started_at) not in existing
+        }
+        try:
+            with transaction.atomic(using=self.db):
+                self.bulk_create([
+                    self.model(
+                        card_id=card_id,
+                        interval=interval,
+                        started_at=started_at,
+                        open=candle.open,
+                        high=candle.high,
+                        low=candle.low,
+                        close=candle.close,
+                        volume=candle.volume
+                    ) for interval, started_at in missing.items()
+                ])
+        except IntegrityError:
+            if self._merge(card_id, missing, candle, append) != len(missing):
+                raise
+
+    def record(self, card_id, executed_at, trades):
+        """
+        executed_at에 체결된 (가격, 수량) 목록을 단위별 캔들에 반영한다(체결마다 호출).
+        대부분 UPDATE 한 번으로 끝나고, 새 구간이 시작될 때만 캔들을 생성한다.
+        """
+        starts = candle_starts(executed_at)
+        candle = aggregate(trades)
+        if self._merge(card_id, starts, candle) != len(starts):
+            self._create_or_merge(card_id, starts, candle)
+
+    def record_earlier(self, card_id, interval, started_at, candle):
+        """
+        기존 캔들보다 이전에 체결된 내용을 합친다(backfill_candles에서 사용).
+        """
+        starts = {interval: started_at}
+        if self._merge(card_id, starts, candle, append=False) != len(starts):
+            self._create_or_merge(card_id, starts, candle, append=False)
+
+
+class CardCandle(TimeStampedModel):
+    """
+    카드 캔들 모델: 카드별 체결가를 단위(1분/1시간/1일) 구간마다 시가/고가/저가/종가/거래량으로 집계한 테이블입니다.
+    """
+    card = models.ForeignKey("cards.Card", on_delete=models.PROTECT, verbose_name="카드")
+    interval = models.CharField(max_length=2, verbose_name="단위", choices=CANDLE_INTERVAL)
+    started_at = models.DateTimeField(verbose_name="구간 시작 시각")
+    open = models.PositiveIntegerField(verbose_name="시가")
+    high = models.PositiveIntegerField(verbose_name="고가")
+    low = models.PositiveIntegerField(verbose_name="저가")
+    close = models.PositiveIntegerField(verbose_name="종가")
+    volume = models.PositiveIntegerField(verbose_name="거래량")
+
+    objects = CardCandleManager()
+
+    class Meta:
+        verbose_name_plural = "카드 캔들"
+        constraints = [
+            # 카드/단위별 구간 조회(최신순)도 이 인덱스를 사용
+            models.UniqueConstraint(fields=["card", "interval", "started_at"], name="cards_candle_unique"),
+        ]
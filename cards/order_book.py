@@ -0,0 +1,371 @@
+"""
+카드별 판매 호가(ask) 목록을 메모리에 유지하는 주문장(order book)입니다.
+
+- 카드마다 (가격, 등록일, id) 순으로 정렬된 목록을 유지해 가격-시간 우선순위로 최저가를 찾는다.
+- 처음 사용될 때 CardSellRegister에서 판매중인 등록 정보를 읽어 재구성한다.
+- 판매 등록/구매/취소 시 트랜잭션 커밋 후(on_commit) 변경 사항을 반영한다.
+- 여러 프로세스로 운영하는 경우 캐시(CACHES)에 저장된 버전 번호로 다른 프로세스의 변경을 감지하고
+  해당 카드를 다시 읽는다(세대 번호별 변경 기록으로 바뀐 카드를 찾고, 기록이 없거나 너무 밀렸을 때만 전체를
+  다시 읽는다). 따라서 다중 프로세스에서는 공유 캐시 백엔드가 필요하다.
+- 카드 시장 테이블을 샤딩한 경우(cards.shards) 카드는 해당 샤드에서, 전체는 샤드마다 읽어 합친다.
+"""
+import bisect
+import threading
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from cards import shards
+from cards.models import CardSellRegister
+
+# quantity는 판매 등록의 남은 수량(remaining_quantity), expires_at은 판매 만료 시각(없으면 None)
+Ask = namedtuple("Ask", ["id", "price", "fee", "created_at", "user_id", "quantity", "expires_at"], defaults=(None,))
+
+GENERATION_CACHE_KEY = "order_book:generation"
+CARD_VERSION_CACHE_KEY = "order_book:card:{card_id}"
+# 세대 번호별로 바뀐 카드 id(변경 기록). 다른 프로세스는 이 기록으로 바뀐 카드만 다시 읽는다
+CHANGED_CARD_CACHE_KEY = "order_book:changed:{generation}"
+CHANGE_LOG_TIMEOUT = 60 * 60
+# 이보다 많은 세대가 밀렸으면 카드별로 읽지 않고 전체를 다시 읽는다
+CHANGE_LOG_SIZE = 500
+# 구매 시 주문장에서 한 번에 읽는 호가 수(대부분 첫 묶음에서 체결된다)
+ASK_LOOKAHEAD = 16
+
+
+def _ask_key(ask):
+    return (ask.price, ask.created_at, ask.id)
+
+
+def _is_open(ask, now):
+    return ask.expires_at is None or ask.expires_at > now
+
+
+def _seek(keys, asks, after=None, min_price=None, max_price=None, limit=None):
+    """
+    정렬된 키 목록에서 after 다음(가격 범위 안)의 호가를 limit개까지 나열한다(이진 탐색으로 시작 위치를 찾음).
+    판매 정리 작업이 아직 판매만료로 바꾸지 않은, 만료 시각이 지난 호가는 건너뛴다.
+    """
+    now = timezone.now()
+    start = bisect.bisect_right(keys, after) if after is not None else 0
+    if min_price is not None:
+        start = max(start, bisect.bisect_left(keys, (min_price,)))
+    page = []
+    for index in range(start, len(keys)):
+        if (max_price is not None and keys[index][0] > max_price) or (limit is not None and len(page) >= limit):
+            break
+        ask = asks[keys[index][2]]
+        if _is_open(ask, now):
+            page.append(ask)
+    return page
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+class CardOrderBook:
+    """
+    카드 한 종류의 판매 호가 목록: 정렬된 키 목록과 id별 호가를 함께 유지한다.
+    """
+
+    def __init__(self, asks=(), version=0):
+        self._asks = {ask.id: ask for ask in asks}
+        self._keys = sorted(_ask_key(ask) for ask in self._asks.values())
+        self.version = version
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for key in self._keys:
+            yield self._asks[key[2]]
+
+    def get(self, ask_id):
+        return self._asks.get(ask_id)
+
+    def add(self, ask):
+        self.remove(ask.id)
+        self._asks[ask.id] = ask
+        bisect.insort(self._keys, _ask_key(ask))
+
+    def remove(self, ask_id):
+        ask = self._asks.pop(ask_id, None)
+        if ask is None:
+            return None
+        del self._keys[bisect.bisect_left(self._keys, _ask_key(ask))]
+        return ask
+
+    def page(self, after=None, min_price=None, max_price=None, limit=None):
+        """
+        가격-시간 우선순위 키 after 다음의 호가 목록
+        """
+        return _seek(self._keys, self._asks, after, min_price, max_price, limit)
+
+    def best(self, exclude_user_id=None):
+        """
+        최저가 호가(exclude_user_id가 등록한 호가와 만료된 호가 제외)
+        """
+        now = timezone.now()
+        for ask in self:
+            if ask.user_id != exclude_user_id and _is_open(ask, now):
+                return ask
+        return None
+
+
+class OrderBook:
+    """
+    카드 id별 CardOrderBook 모음. 모듈 하단의 order_book 인스턴스를 프로세스 전역에서 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._books = {}
+        self._generation = None
+        self._best = None
+
+    def clear(self):
+        with self._lock:
+            self._books = {}
+            self._generation = None
+            self._best = None
+
+    @staticmethod
+    def _open_asks():
+        return CardSellRegister.objects.filter(state="selling").values_list(
+            "card_id", "id", "price", "fee", "created_at", "user_id", "remaining_quantity", "expires_at"
+        )
+
+    def _load_all(self):
+        """
+        판매중인 전체 등록 정보로 주문장을 재구성한다.
+        """
+        generation = cache.get(GENERATION_CACHE_KEY, 0)
+        grouped = {}
+        for alias in shards.shard_aliases():
+            with shards.using_shard(alias):
+                for card_id, *fields in self._open_asks().iterator():
+                    grouped.setdefault(card_id, []).append(Ask(*fields))
+        versions = cache.get_many([CARD_VERSION_CACHE_KEY.format(card_id=card_id) for card_id in grouped])
+        self._books = {
+            card_id: CardOrderBook(asks, versions.get(CARD_VERSION_CACHE_KEY.format(card_id=card_id), 0))
+            for card_id, asks in grouped.items()
+        }
+        self._generation = generation
+
+    def _load_card(self, card_id, version):
+        with shards.card_shard(card_id):
+            asks = [Ask(*fields) for _, *fields in self._open_asks().filter(card_id=card_id)]
+        book = CardOrderBook(asks, version)
+        self._books[card_id] = book
+        return book
+
+    @staticmethod
+    def _changed_cards(since, generation):
+        """
+        변경 기록에서 세대 since 다음부터 generation까지 호가가 바뀐 카드 id 집합(알 수 없으면 None)
+        """
+        if since is None or not 0 <= generation - since <= CHANGE_LOG_SIZE:
+            return None
+        keys = [CHANGED_CARD_CACHE_KEY.format(generation=changed) for changed in range(since + 1, generation + 1)]
+        changed = cache.get_many(keys)
+        if len(changed) < len(keys):
+            return None
+        return set(changed.values())
+
+    def _ensure_loaded(self):
+        """
+        다른 프로세스에서 호가가 바뀌었으면(세대 번호 증가) 변경 기록에서 바뀐 카드를 찾아 그 카드만 다시 읽는다.
+        처음 읽을 때와 변경 기록이 캐시에서 빠졌거나 CHANGE_LOG_SIZE보다 많이 밀렸을 때는 전체를 다시 읽는다.
+        """
+        generation = cache.get(GENERATION_CACHE_KEY, 0)
+        if self._generation == generation:
+            return
+        card_ids = self._changed_cards(self._generation, generation)
+        if card_ids is None:
+            self._load_all()
+            return
+        versions = cache.get_many([CARD_VERSION_CACHE_KEY.format(card_id=card_id) for card_id in card_ids])
+        for card_id in card_ids:
+            version = versions.get(CARD_VERSION_CACHE_KEY.format(card_id=card_id), 0)
+            book = self._books.get(card_id)
+            if book is None or book.version != version:
+                self._load_card(card_id, version)
+        self._generation = generation
+
+    def book(self, card_id):
+        """
+        card_id의 주문장. 다른 프로세스에서 해당 카드가 변경되었다면 그 카드만 다시 읽는다.
+        """
+        with self._lock:
+            if self._generation is None:
+                self._load_all()
+            version = cache.get(CARD_VERSION_CACHE_KEY.format(card_id=card_id), 0)
+            book = self._books.get(card_id)
+            if book is None or book.version != version:
+                book = self._load_card(card_id, version)
+            return book
+
+    def best_ask(self, card_id, exclude_user_id=None):
+        with self._lock:
+            return self.book(card_id).best(exclude_user_id)
+
+    def asks(self, card_id, exclude_user_id=None):
+        """
+        card_id의 호가를 가격-시간 우선순위로 하나씩 내주는 이터레이터(exclude_user_id가 등록한 호가와 만료된 호가 제외).
+        주문장을 복사하지 않고 잠금을 잡은 동안 ASK_LOOKAHEAD개씩만 읽으며, 다음 묶음은 마지막으로 내준 호가의 키
+        다음부터 다시 찾는다(그 사이 선점에 실패해 호가가 빠져도 된다). 첫 묶음은 호출 시점에 읽으므로 DB에서 카드를
+        다시 읽어야 하는 경우에도 트랜잭션 밖에서 읽는다.
+        """
+        with self._lock:
+            book = self.book(card_id)
+            page = book.page(limit=ASK_LOOKAHEAD)
+        return self._iter_asks(book, page, exclude_user_id)
+
+    def _iter_asks(self, book, page, exclude_user_id):
+        while True:
+            for ask in page:
+                if ask.user_id != exclude_user_id:
+                    yield ask
+            if len(page) < ASK_LOOKAHEAD:
+                return
+            with self._lock:
+                page = book.page(_ask_key(page[-1]), limit=ASK_LOOKAHEAD)
+
+    def current_generation(self):
+        """
+        주문장이 최신이면 세대 번호, 다시 읽어야 하면 None(DB를 조회하지 않는다)
+        """
+        generation = self._generation
+        if generation is not None and generation == cache.get(GENERATION_CACHE_KEY, 0):
+            return generation
+        return None
+
+    def book_page(self, card_id, after=None, min_price=None, max_price=None, limit=None):
+        """
+        card_id의 호가를 가격-시간 우선순위 키 after 다음부터 나열한다.
+        """
+        with self._lock:
+            return self.book(card_id).page(after, min_price, max_price, limit)
+
+    def best_page(self, after=None, min_price=None, max_price=None, limit=None):
+        """
+        카드별 최저가 호가를 가격-시간 우선순위로 정렬해 키 after 다음부터 나열한다(정렬 결과는 세대별로 재사용하고,
+        그 안의 호가가 만료되면 다시 정렬한다).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._best is None or self._best[0] != self._generation or (
+                self._best[3] is not None and self._best[3] <= timezone.now()
+            ):
+                best_asks = self._best_asks()
+                self._best = (
+                    self._generation,
+                    sorted(_ask_key(ask) for ask in best_asks),
+                    {ask.id: ask for ask in best_asks},
+                    min((ask.expires_at for ask in best_asks if ask.expires_at is not None), default=None)
+                )
+            _, keys, asks, _ = self._best
+            return _seek(keys, asks, after, min_price, max_price, limit)
+
+    def _best_asks(self):
+        best_asks = (book.best() for book in self._books.values() if len(book))
+        return [ask for ask in best_asks if ask is not None]
+
+    def changes(self, since):
+        """
+        (세대 번호, 세대 since 이후 호가가 바뀐 카드 id 집합). since가 None이거나 변경 기록으로 알 수 없으면 집합 대신 None
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return self._generation, self._changed_cards(since, self._generation)
+
+    def best_asks(self):
+        """
+        카드별 최저가 호가 목록
+        """
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """
+        (세대 번호, 카드별 최저가 호가 목록). 세대 번호는 어느 카드든 호가가 바뀔 때마다 증가한다.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return self._generation, self._best_asks()
+
+    def _apply(self, card_id, mutate):
+        with self._lock:
+            book = self._books.get(card_id)
+            if book is None and self._generation is not None:
+                # 전체를 읽은 이후 처음 호가가 생긴 카드
+                book = self._books[card_id] = CardOrderBook(
+                    version=cache.get(CARD_VERSION_CACHE_KEY.format(card_id=card_id), 0)
+                )
+            if book is not None:
+                mutate(book)
+
+            # 자신의 변경만 있었다면 버전을 따라가고, 다른 프로세스의 변경이 섞였다면 다음 조회 때 다시 읽는다
+            version = _incr(CARD_VERSION_CACHE_KEY.format(card_id=card_id))
+            if book is not None:
+                book.version = version if book.version == version - 1 else None
+            generation = _incr(GENERATION_CACHE_KEY)
+            cache.set(CHANGED_CARD_CACHE_KEY.format(generation=generation), card_id, timeout=CHANGE_LOG_TIMEOUT)
+            # 세대 번호도 같은 방식으로 따라가고, 따라가지 못하면 다음 조회 때 변경 기록으로 바뀐 카드만 다시 읽는다
+            if self._generation is not None and self._generation == generation - 1:
+                self._generation = generation
+
+    def add(self, card_sell_register):
+        """
+        판매 등록 정보를 커밋 이후 주문장에 추가한다.
+        """
+        card_id = card_sell_register.card_id
+        ask = Ask(
+            card_sell_register.id,
+            card_sell_register.price,
+            card_sell_register.fee,
+            card_sell_register.created_at,
+            card_sell_register.user_id,
+            card_sell_register.remaining_quantity,
+            card_sell_register.expires_at,
+        )
+        transaction.on_commit(lambda: self._apply(card_id, lambda book: book.add(ask)))
+
+    def discard(self, card_id, card_sell_register_id):
+        """
+        DB와 다른 것으로 확인된 호가를 즉시 제거하고(버전은 올리지 않는다), 다음 조회 때 카드를 다시 읽는다.
+        """
+        with self._lock:
+            book = self._books.get(card_id)
+            if book is not None:
+                book.remove(card_sell_register_id)
+                book.version = None
+
+    def fill(self, card_id, card_sell_register_id, quantity):
+        """
+        체결된 수량만큼 커밋 이후 호가의 남은 수량을 줄이고, 0이 되면 제거한다.
+        """
+        def mutate(book):
+            ask = book.get(card_sell_register_id)
+            if ask is None:
+                return
+            if ask.quantity > quantity:
+                book.add(ask._replace(quantity=ask.quantity - quantity))
+            else:
+                book.remove(card_sell_register_id)
+
+        transaction.on_commit(lambda: self._apply(card_id, mutate))
+
+    def remove(self, card_id, card_sell_register_id):
+        """
+        판매 완료/취소된 등록 정보를 커밋 이후 주문장에서 제거한다.
+        """
+        transaction.on_commit(lambda: self._apply(card_id, lambda book: book.remove(card_sell_register_id)))
+
+
+order_book = OrderBook()
@@ -0,0 +1,143 @@
+"""
+카드 판매/구매/판매 취소 처리: 동기 체결(뷰)과 비동기 체결(cards.matching 워커)이 함께 사용합니다.
+각 함수는 응답 데이터를 반환하고, 처리할 수 없는 주문은 APIException(InvalidData)을 발생시킵니다.
+SQLite 잠금 오류가 나면 트랜잭션 전체를 다시 실행합니다(utilities.sqlite.retry_on_busy).
+"""
+import datetime
+import math
+
+from django.db import IntegrityError
+from django.utils import timezone
+
+from cards import listings, settlement, shards
+from cards.board import card_sell_board
+from cards.exceptions import InvalidData, NotExistData
+from cards.models import (
+    CardPossesionStatus,
+    CardSellRegister
+)
+from cards.order_book import order_book
+from cards.serializers import CardSellRegisterCreateSerializer
+from cards.streams import market_stream
+from utilities.sqlite import retry_on_busy
+
+
+@retry_on_busy
+def sell(user_id, card_id, quantity, price, ttl=None):
+    """
+    ttl(초)이 있으면 그 시간이 지난 뒤 판매만료된다(cards.listings).
+    """
+    fee = math.trunc(price * 0.2)
+    expires_at = timezone.now() + datetime.timedelta(seconds=ttl) if ttl else None
+
+    with shards.atomic(card_id):
+        # 보유 수량에서 판매할 수량을 차감(보유 정보가 없으면 0장)
+        if not CardPossesionStatus.objects.debit(card_id, user_id, quantity):
+            if CardPossesionStatus.objects.filter(card_id=card_id, user_id=user_id, quantity__gt=0).exists():
+                raise InvalidData(
+                    **{
+                        "detail": "판매할 수량을 다시 확인해주세요",
+                        "code": "InvalidQuantity"
+                    }
+                )
+            raise InvalidData(
+                **{
+                    "detail": "판매할 카드가 없습니다",
+                    "code": "InvalidCardId"
+                }
+            )
+
+        # 판매 등록
+        card_sell_register = CardSellRegister.objects.create(
+            card_id=card_id,
+            price=price,
+            fee=fee,
+            quantity=quantity,
+            remaining_quantity=quantity,
+            user_id=user_id,
+            expires_at=expires_at
+        )
+        order_book.add(card_sell_register)
+        card_sell_board.refresh_on_commit()
+        market_stream.publish_on_commit(card_id)
+    listings.listing_sweeper.start()
+    return CardSellRegisterCreateSerializer(card_sell_register).data
+
+
+@retry_on_busy
+def cancel(user_id, card_id, card_sell_register_id):
+    """
+    판매중인 본인의 등록 정보를 취소하고 팔리지 않은 남은 수량을 보유 수량으로 돌려준다.
+    """
+    with shards.atomic(card_id):
+        card_sell_register = listings.close(card_id, card_sell_register_id, "cancelled", user_id=user_id)
+    if card_sell_register is None:
+        raise NotExistData(
+            **{
+                "detail": "취소할 수 있는 판매 등록 정보가 없습니다",
+                "code": "NotExistSellRegister"
+            }
+        )
+    return CardSellRegisterCreateSerializer(card_sell_register).data
+
+
+@retry_on_busy
+def buy(user_id, card_id, quantity=None):
+    # 주문장에서 가격-시간 우선순위로 정렬된 판매 정보(단, 본인이 등록한 건 나오지 않음)
+    # 트랜잭션이 쓰기(선점)로 시작하도록 트랜잭션 밖에서 조회
+    asks = order_book.asks(card_id, exclude_user_id=user_id)
+
+    try:
+        with shards.atomic(card_id):
+            # 최소 가격 판매 정보를 조건부 UPDATE로 선점해 타인이 거래하지 못하게 함
+            fill = settlement.claim(card_id, asks, quantity)
+            if fill is None:
+                raise InvalidData(
+                    **{
+                        "detail": "구매할 수 있는 카드가 없습니다",
+                        "code": "NotExistCardSellRegister"
+                    }
+                )
+
+            # 보유 수량, 잔액, 구매/판매 이력 반영
+            settlement.settle(card_id, user_id, [fill])
+    except IntegrityError:
+        raise InvalidData(
+            **{
+                "detail": "구매 입력 데이터를 다시 확인해주세요",
+            }
+        )
+    return CardSellRegisterCreateSerializer(settlement.filled_register(card_id, fill)).data
+
+
+@retry_on_busy
+def batch_buy(user_id, card_id, quantity, max_price):
+    asks = order_book.asks(card_id, exclude_user_id=user_id)
+
+    try:
+        with shards.atomic(card_id):
+            fills = settlement.sweep(card_id, asks, quantity, max_price)
+            if not fills:
+                raise InvalidData(
+                    **{
+                        "detail": "구매할 수 있는 카드가 없습니다",
+                        "code": "NotExistCardSellRegister"
+                    }
+                )
+
+            settlement.settle(card_id, user_id, fills)
+    except IntegrityError:
+        raise InvalidData(
+            **{
+                "detail": "구매 입력 데이터를 다시 확인해주세요",
+            }
+        )
+    card_sell_registers = [settlement.filled_register(card_id, fill) for fill in fills]
+    return CardSellRegisterCreateSerializer(card_sell_registers, many=True).data
+
+
+EXECUTORS = {
+    "sell": sell,
+    "buy": buy,
+    "batch_buy": batch_buy,
+}
@@ -0,0 +1,141 @@
+"""
+목록 조회의 keyset(seek) 페이지네이션과 조회 조건 파싱입니다.
+
+- 커서는 마지막 행의 정렬 키를 base64(JSON)로 인코딩한 불투명 문자열이다. 다음 페이지는 정렬 키가 커서보다
+  뒤인 행부터 조회하므로(OFFSET 없음) 깊은 페이지도 첫 페이지와 비용이 같다.
+- 응답 본문은 기존과 같은 목록이며, 다음 페이지가 있으면 Link 헤더(rel="next")로 다음 페이지 주소를 알려준다.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from cards.exceptions import InvalidData
+
+PAGE_QUERY_PARAMS = ("cursor", "page_size")
+
+
+def query_int(request, name, minimum=1):
+    """
+    정수 조회 조건(없으면 None)
+    """
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        value = None
+    if value is None or value < minimum:
+        raise InvalidData(
+            **{
+                "detail": f"{name} 값을 다시 확인해주세요",
+                "code": "InvalidQuery"
+            }
+        )
+    return value
+
+
+def query_datetime(request, name, end=False):
+    """
+    날짜(YYYY-MM-DD) 또는 날짜/시간(ISO 8601) 조회 조건(없으면 None).
+    end이면 미포함 경계로 사용하므로 날짜는 그 다음 날 0시로 바꾼다.
+    """
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            date = parse_date(value)
+            if date is not None:
+                if end:
+                    date += datetime.timedelta(days=1)
+                parsed = datetime.datetime.combine(date, datetime.time())
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise InvalidData(
+            **{
+                "detail": f"{name} 값을 다시 확인해주세요",
+                "code": "InvalidQuery"
+            }
+        )
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _encode_key_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_key_value(key_type, value):
+    if key_type is datetime.datetime:
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+    if not isinstance(value, key_type) or isinstance(value, bool):
+        raise ValueError(value)
+    return value
+
+
+class KeysetPaginator:
+    """
+    key_types: 정렬 키의 각 값 타입(int, datetime.datetime)
+    """
+
+    def __init__(self, request, key_types, default_page_size, max_page_size):
+        self.request = request
+        self.key_types = key_types
+        self.page_size = min(query_int(request, "page_size") or default_page_size, max_page_size)
+        self.cursor = self._decode(request.GET.get("cursor"))
+        self.next_cursor = None
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if not isinstance(values, list) or len(values) != len(self.key_types):
+                raise ValueError(values)
+            return tuple(_decode_key_value(key_type, value) for key_type, value in zip(self.key_types, values))
+        except (ValueError, TypeError, UnicodeEncodeError, binascii.Error):
+            raise InvalidData(
+                **{
+                    "detail": "cursor 값을 다시 확인해주세요",
+                    "code": "InvalidCursor"
+                }
+            )
+
+    @staticmethod
+    def encode(key):
+        return base64.urlsafe_b64encode(
+            json.dumps([_encode_key_value(value) for value in key], separators=(",", ":")).encode()
+        ).decode("ascii")
+
+    def paginate(self, items, key):
+        """
+        커서 다음부터 page_size + 1개 조회한 items로 현재 페이지를 만든다(한 개 더 있으면 다음 페이지가 있음).
+        """
+        items = list(items)
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            self.next_cursor = self.encode(key(items[-1]))
+        return items
+
+    def link(self):
+        """
+        다음 페이지가 있으면 Link 헤더 값, 없으면 None
+        """
+        if self.next_cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query["cursor"] = self.next_cursor
+        return f'<{self.request.build_absolute_uri(self.request.path)}?{query.urlencode()}>; rel="next"'
@@ -1,10 +1,15 @@
 from rest_framework import serializers
 
+from cards.catalogue import card_catalogue
 from cards.models import (
-    CardSellHistory,
-    CardSellRegister,
-    CardBuyHistory
+    CardOrder,
+    CardSellRegister
 )
+from utilities.serializers import ValuesSerializer, datetime_representation
+
+
+def card_name(card_id, tz):
+    return card_catalogue.name(card_id)
 
 
 class CardSellRegisterListSerializer(serializers.ModelSerializer):
@@ -12,7 +17,7 @@ class CardSellRegisterListSerializer(serializers.ModelSerializer):
     createdAt = serializers.DateTimeField(source="created_at")
     cardId = serializers.IntegerField(source="card.id")
     price = serializers.IntegerField()
-    quantity = serializers.IntegerField()
+    quantity = serializers.IntegerField(source="remaining_quantity")
     userId = serializers.IntegerField(source="user.id")
     nickname = serializers.CharField(source="user.nickname")
 
@@ -21,42 +26,93 @@ class CardSellRegisterListSerializer(serializers.ModelSerializer):
         fields = ("id", "createdAt", "cardId", "price", "quantity", "userId", "nickname")
 
 
+class CardSellRegisterListValues(ValuesSerializer):
+    """
+    CardSellRegisterListSerializer와 같은 형태(목록 응답용)
+    """
+    fields = (
+        ("id", "id", None),
+        ("createdAt", "created_at", datetime_representation),
+        ("cardId", "card_id", None),
+        ("price", "price", None),
+        ("quantity", "remaining_quantity", None),
+        ("userId", "user_id", None),
+        ("nickname", "user__nickname", None),
+    )
+
+
 class CardSellRegisterCreateSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField()
     createdAt = serializers.DateTimeField(source="created_at")
-    cardId = serializers.IntegerField(source="card.id")
+    cardId = serializers.IntegerField(source="card_id")
     price = serializers.IntegerField()
     state = serializers.CharField()
     quantity = serializers.IntegerField()
-    userId = serializers.IntegerField(source="user.id")
+    userId = serializers.IntegerField(source="user_id")
 
     class Meta:
         model = CardSellRegister
         fields = ("id", "createdAt", "cardId", "price", "state", "quantity", "userId")
 
 
-class CardBuyHistorySerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField()
-    cardId = serializers.IntegerField(source="card.id")
-    quantity = serializers.IntegerField(source="CardSellRegister.quantity")
-    userId = serializers.IntegerField(source="user.id")
-    nickname = serializers.CharField(source="user.nickname")
+class CardSellRegisterHistoryValues(ValuesSerializer):
+    """
+    판매자의 판매 등록 목록 응답용(판매 등록 테이블과 보관 테이블에서 읽어 합친 dict 목록을 변환)
+    """
+    fields = (
+        ("id", "id", None),
+        ("createdAt", "created_at", datetime_representation),
+        ("cardId", "card_id", None),
+        ("price", "price", None),
+        ("state", "state", None),
+        ("quantity", "quantity", None),
+        ("remainingQuantity", "remaining_quantity", None),
+        ("userId", "user_id", None),
+        ("selledAt", "selled_at", datetime_representation),
+        ("expiresAt", "expires_at", datetime_representation),
+    )
 
-    class Meta:
-        model = CardBuyHistory
-        fields = ("id", "cardId", "quantity", "userId", "nickname")
 
+class TradeListValues(ValuesSerializer):
+    """
+    체결 원장을 이전 판매 이력 목록 응답(판매 이력 + 판매 등록 정보 조인)과 같은 형태로 직렬화(판매 이력 목록 응답용).
+    createdAt/selledAt은 모두 체결 시각이고, 카드 이름은 cards_card를 조인하지 않고 카드 목록 캐시에서 채운다.
+    """
+    fields = (
+        ("id", "id", None),
+        ("createdAt", "executed_at", datetime_representation),
+        ("price", "price", None),
+        ("fee", "fee", None),
+        ("quantity", "quantity", None),
+        ("selledAt", "executed_at", datetime_representation),
+        ("cardId", "card_id", None),
+        ("cardName", "card_id", card_name),
+    )
 
-class CardSellHistoryListSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField()
+
+class CardOrderSerializer(serializers.ModelSerializer):
+    orderId = serializers.IntegerField(source="id")
     createdAt = serializers.DateTimeField(source="created_at")
-    price = serializers.IntegerField(source="card_sell_register.price")
-    fee = serializers.IntegerField(source="card_sell_register.fee")
-    quantity = serializers.IntegerField(source="card_sell_register.quantity")
-    selledAt = serializers.DateTimeField(source="card_sell_register.selled_at")
-    cardId = serializers.IntegerField(source="card_sell_register.card.id")
-    cardName = serializers.CharField(source="card_sell_register.card.name")
+    cardId = serializers.IntegerField(source="card_id")
+    side = serializers.CharField()
+    state = serializers.CharField()
+    statusCode = serializers.IntegerField(source="status_code")
+    result = serializers.JSONField()
 
     class Meta:
-        model = CardSellHistory
-        fields = ("id", "createdAt", "price", "fee", "quantity", "selledAt", "cardId", "cardName")
+        model = CardOrder
+        fields = ("orderId", "createdAt", "cardId", "side", "state", "statusCode", "result")
+
+
+class CardCandleListValues(ValuesSerializer):
+    """
+    캔들 목록 응답용
+    """
+    fields = (
+        ("startedAt", "started_at", datetime_representation),
+        ("open", "open", None),
+        ("high", "high", None),
+        ("low", "low", None),
+        ("close", "close", None),
+        ("volume", "volume", None),
+    )
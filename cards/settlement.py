@@ -0,0 +1,180 @@
+"""
+카드 구매 체결: 판매 등록 정보를 선점하고 구매자/판매자의 보유 수량, 잔액, 이력을 반영합니다.
+
+- 선점은 state='selling', remaining_quantity >= 체결 수량 조건부 UPDATE 한 번으로 처리해, 동시에 같은
+  등록 정보를 구매하려는 요청이 남은 수량을 초과해 체결하지 못한다(PostgreSQL은 행 잠금 후 조건을 다시
+  평가하고, SQLite는 쓰기 잠금으로 직렬화된다). 남은 수량이 0이 되면 판매완료 처리한다.
+  만료 시각(expires_at)이 지난 등록 정보는 판매 정리 작업이 판매만료로 바꾸기 전이라도 선점하지 않는다.
+- 가격/수수료는 카드 1장 기준이며, 체결 금액은 (가격 + 수수료) * 체결 수량이다.
+- 구매자 잔액은 UPDATE 한 번으로 차감하고, 판매 대금은 판매자의 잔액 행을 갱신하지 않고 잔액 증감 기록
+  (BalanceDelta)으로 추가해 인기 판매자의 잔액 행에 동시 체결이 몰리지 않게 한다(users.balances가 주기적으로 합산).
+- 체결 건은 체결 원장(Trade)에 bulk_create 한 번으로 저장한다.
+- 체결가 캔들(1m/1h/1d)도 같은 트랜잭션에서 갱신한다(cards.candles).
+- 커밋 후 체결과 바뀐 최저가 호가를 구독자에게 발행한다(cards.streams).
+- 반드시 cards.shards.atomic(card_id) 안에서 호출해야 한다.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from cards.board import card_sell_board
+from cards.models import (
+    CardCandle,
+    CardPossesionStatus,
+    CardSellRegister,
+    Trade
+)
+from cards.order_book import order_book
+from cards.streams import market_stream
+from users.balances import balance_compactor
+from users.models import BalanceDelta, UserBalance
+from utilities.serializers import datetime_representation
+
+Fill = namedtuple("Fill", ["ask", "quantity"])
+
+
+def _claim(ask, quantity, now):
+    closed = When(remaining_quantity=quantity, then=Value(now))
+    return CardSellRegister.objects.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+        id=ask.id,
+        state="selling",
+        remaining_quantity__gte=quantity
+    ).update(
+        remaining_quantity=F("remaining_quantity") - quantity,
+        state=Case(When(remaining_quantity=quantity, then=Value("selled")), default=Value("selling")),
+        selled_at=Case(closed, default=F("selled_at")),
+        modified_at=now
+    ) == 1
+
+
+def _claim_up_to(card_id, ask, quantity, now):
+    """
+    호가에서 최대 quantity만큼 선점해 Fill을 반환한다(선점하지 못하면 None).
+    주문장의 남은 수량이 DB와 다르면(다른 프로세스에서 체결) DB의 남은 수량을 다시 읽어 한 번 더 시도하고,
+    Fill의 호가도 DB의 남은 수량으로 바꿔 응답의 상태/남은 수량이 DB와 같도록 한다.
+    """
+    fill_quantity = min(quantity, ask.quantity)
+    if _claim(ask, fill_quantity, now):
+        return Fill(ask, fill_quantity)
+
+    order_book.discard(card_id, ask.id)
+    remaining_quantity = CardSellRegister.objects.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+        id=ask.id,
+        state="selling"
+    ).values_list("remaining_quantity", flat=True).first()
+    if remaining_quantity:
+        ask = ask._replace(quantity=remaining_quantity)
+        fill_quantity = min(quantity, remaining_quantity)
+        if _claim(ask, fill_quantity, now):
+            return Fill(ask, fill_quantity)
+    return None
+
+
+def claim(card_id, asks, quantity=None):
+    """
+    호가를 순서대로 선점해 처음 체결된 Fill을 반환한다. quantity가 없으면 호가의 남은 수량 전체를 구매한다.
+    """
+    now = timezone.now()
+    for ask in asks:
+        fill = _claim_up_to(card_id, ask, quantity or ask.quantity, now)
+        if fill is not None:
+            return fill
+    return None
+
+
+def sweep(card_id, asks, quantity, max_price):
+    """
+    max_price 이하의 호가를 가격-시간 우선순위로 선점해 quantity를 채운다(채울 수 있는 만큼만 체결).
+    마지막 호가는 필요한 수량만큼 부분 체결한다.
+    """
+    now = timezone.now()
+    fills = []
+    for ask in asks:
+        if quantity <= 0 or ask.price > max_price:
+            break
+        fill = _claim_up_to(card_id, ask, quantity, now)
+        if fill is not None:
+            fills.append(fill)
+            quantity -= fill.quantity
+    return fills
+
+
+def filled_register(card_id, fill):
+    """
+    응답 직렬화용 CardSellRegister(DB를 다시 조회하지 않으며, quantity는 체결 수량)
+    """
+    ask = fill.ask
+    return CardSellRegister(
+        id=ask.id,
+        created_at=ask.created_at,
+        card_id=card_id,
+        price=ask.price,
+        fee=ask.fee,
+        state="selled" if fill.quantity >= ask.quantity else "selling",
+        quantity=fill.quantity,
+        remaining_quantity=max(ask.quantity - fill.quantity, 0),
+        user_id=ask.user_id
+    )
+
+
+def settle(card_id, buyer_id, fills):
+    """
+    선점한 호가들의 체결 내용을 반영한다.
+    """
+    # 구매자 액션: 보유 수량 추가(처음 보유하는 카드면 보유 정보 생성)
+    CardPossesionStatus.objects.credit(card_id, buyer_id, sum(fill.quantity for fill in fills))
+
+    # 체결 원장 등록(체결 건별, 구매내역/판매내역 조회는 이 원장을 읽음)
+    executed_at = timezone.now()
+    Trade.objects.bulk_create([
+        Trade(
+            card_id=card_id,
+            card_sell_register_id=ask.id,
+            buyer_id=buyer_id,
+            seller_id=ask.user_id,
+            price=ask.price,
+            fee=ask.fee,
+            quantity=quantity,
+            executed_at=executed_at
+        )
+        for ask, quantity in fills
+    ])
+
+    # 체결가 캔들 갱신
+    CardCandle.objects.record(card_id, executed_at, [(ask.price, quantity) for ask, quantity in fills])
+
+    # 구매자 액션: 금액 차감((가격+수수료) * 체결 수량)
+    # (잔액은 주 DB에 있으므로 카드를 샤드로 나눈 경우 주 DB 쓰기 잠금을 짧게 잡도록 마지막에 반영)
+    credits = defaultdict(int)
+    for ask, quantity in fills:
+        credits[ask.user_id] += (ask.price + ask.fee) * quantity
+    UserBalance.objects.debit(buyer_id, sum(credits.values()))
+
+    # 판매자 액션: 금액 입금(판매자 잔액 행은 갱신하지 않고 증감 기록만 추가, 주기적으로 합산)
+    BalanceDelta.objects.bulk_create([
+        BalanceDelta(user_id=user_id, amount=amount) for user_id, amount in credits.items()
+    ])
+    balance_compactor.start()
+
+    for ask, quantity in fills:
+        order_book.fill(card_id, ask.id, quantity)
+    card_sell_register_ids = [fill.ask.id for fill in fills]
+    transaction.on_commit(lambda: card_sell_board.forget(card_sell_register_ids))
+    card_sell_board.refresh_on_commit()
+
+    # 구독자(cards.streams)에게 체결과 바뀐 최저가 호가 발행(체결 시각은 다른 응답과 같은 현재 시간대 문자열)
+    executed_at = datetime_representation(executed_at, timezone.get_current_timezone())
+    market_stream.publish_on_commit(card_id, [
+        {
+            "cardId": card_id,
+            "cardSellRegisterId": ask.id,
+            "price": ask.price,
+            "quantity": quantity,
+            "executedAt": executed_at
+        }
+        for ask, quantity in fills
+    ])
@@ -0,0 +1,176 @@
+"""
+카드 시장 테이블을 card_id 기준으로 여러 DB에 나눠 저장하는 샤딩 설정과 DB 라우터입니다.
+
+SQLite는 DB 파일 하나에 쓰기 트랜잭션이 하나뿐이라, DB가 하나면 서로 다른 카드의 체결도 차례로 커밋된다.
+settings.CARD_SHARD_COUNT(DJANGO_CARD_SHARDS)가 2 이상이면 markets/settings.py가 샤드 DB
+(card_shard_1, card_shard_2, ...)를 추가하고, 카드 시장 테이블(SHARDED_MODELS)은 card_id % 샤드 수 번째 DB에 저장한다
+(0번 샤드는 default). 사용자/잔액/카드/주문 등 나머지 테이블은 default(주 DB)에 둔다.
+
+- 샤드를 고르는 기준은 card_shard(card_id) 블록이다. 판매/구매 처리(cards.orders), 카드별 조회 뷰, 주문장 적재가
+  해당 카드의 블록 안에서 DB를 사용하며, 블록 밖에서 샤드 테이블을 사용하면 default(0번 샤드)를 사용한다.
+- 판매가 끝난 등록 정보의 월별 보관 테이블(cards.archive)도 등록 정보와 같은 샤드에 둔다.
+- 샤드 테이블은 카드/사용자를 외래 키로 참조하므로, 모든 샤드에 전체 스키마를 만들고 Card/User 행을 주 DB에
+  저장할 때마다 각 샤드에 복제한다(replicate). 샤드마다 등록 정보 id가 겹치지 않도록 샤드 번호 * SHARD_ID_SPAN부터
+  id를 발급한다.
+- 구매는 샤드(등록 정보, 보유 수량, 체결 원장, 캔들)와 주 DB(구매자 잔액, 잔액 증감 기록)를 함께 갱신한다.
+  atomic(card_id)은 두 DB의 트랜잭션을 중첩해 샤드를 먼저 커밋하고 주 DB를 커밋하며, 주 DB 쓰기는 체결의
+  마지막에 하므로(cards.settlement) 주 DB 쓰기 잠금은 짧게 잡힌다.
+- 한계: 체결마다 주 DB에 쓰므로(구매자 잔액 차감은 잔액을 확인해야 해 샤드로 나눌 수 없음) 서로 다른 샤드의
+  체결도 주 DB 쓰기 잠금에서 하나씩 커밋된다. 샤딩은 샤드 테이블 쓰기(등록 정보/보유 수량/원장/캔들)의 잠금
+  경합과 테이블 크기를 나눌 뿐 체결 커밋을 병렬로 만들지는 않는다(bench_shards가 동시에 진행된 체결 트랜잭션
+  수를 보여준다).
+- 한계: 두 DB의 커밋은 원자적이지 않다(2단계 커밋은 하지 않음). 샤드 커밋 후 주 DB 커밋이 실패하거나 그 사이에
+  프로세스가 죽으면 체결(원장)은 남고 잔액은 반영되지 않으며, 주 DB를 먼저 커밋하는 순서로 바꾸면 반대로 체결
+  없이 잔액만 바뀐다. 이 경우 체결 원장(Trade)과 잔액을 대조해 바로잡아야 한다.
+"""
+import contextlib
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_migrate, post_save
+
+SHARDED_MODELS = {
+    "cardsellregister",
+    "cardsellhistory",
+    "cardbuyhistory",
+    "cardpossesionstatus",
+    "cardcandle",
+    "trade",
+}
+REPLICATED_MODELS = {("cards", "card"), ("users", "user")}
+SHARD_ALIAS = "card_shard_{index}"
+SHARD_ID_SPAN = 10 ** 12
+
+_current_shard = ContextVar("card_shard", default=None)
+
+
+def shard_count():
+    return max(1, getattr(settings, "CARD_SHARD_COUNT", 1))
+
+
+def shard_alias(card_id):
+    index = int(card_id) % shard_count()
+    return DEFAULT_DB_ALIAS if index == 0 else SHARD_ALIAS.format(index=index)
+
+
+def shard_aliases():
+    return [DEFAULT_DB_ALIAS] + [SHARD_ALIAS.format(index=index) for index in range(1, shard_count())]
+
+
+@contextlib.contextmanager
+def card_shard(card_id):
+    """
+    블록 안에서 카드 시장 테이블이 card_id의 샤드 DB를 사용하도록 한다.
+    """
+    token = _current_shard.set(shard_alias(card_id))
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+@contextlib.contextmanager
+def using_shard(alias):
+    """
+    전체 샤드를 차례로 조회하는 작업(주문장 전체 적재, 관리 명령어)용: 블록 안에서 alias 샤드를 사용한다.
+    """
+    token = _current_shard.set(alias)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+@contextlib.contextmanager
+def atomic(card_id):
+    """
+    card_id의 샤드 블록 + 주 DB와 샤드 DB의 트랜잭션(샤드가 default면 트랜잭션 하나)
+    """
+    alias = shard_alias(card_id)
+    with card_shard(card_id), transaction.atomic():
+        if alias == DEFAULT_DB_ALIAS:
+            yield
+        else:
+            with transaction.atomic(using=alias):
+                yield
+
+
+class CardShardRouter:
+    """
+    settings.DATABASE_ROUTERS에 등록하는 라우터(샤드가 2개 이상일 때만 등록)
+    """
+
+    def _db_for(self, model, **hints):
+        if model._meta.model_name not in SHARDED_MODELS:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and getattr(instance, "card_id", None) is not None:
+            return shard_alias(instance.card_id)
+        return _current_shard.get() or DEFAULT_DB_ALIAS
+
+    db_for_read = _db_for
+    db_for_write = _db_for
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 샤드 테이블 행은 같은 샤드에 복제된 카드/사용자 행을 참조한다
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 외래 키 대상(카드/사용자)이 있어야 하므로 모든 샤드에 전체 스키마를 만든다
+        return True
+
+
+def replicate(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    주 DB에 저장한 Card/User 행을 각 샤드에 복제한다(post_save).
+    """
+    if raw or using != DEFAULT_DB_ALIAS or shard_count() == 1:
+        return
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields if not field.primary_key
+    }
+    for alias in shard_aliases()[1:]:
+        sender._base_manager.using(alias).update_or_create(pk=instance.pk, defaults=values)
+
+
+def replicate_all(alias):
+    """
+    alias 샤드에 주 DB의 Card/User 행 전체를 복제한다(샤드를 추가하거나 bulk_create로 만든 행을 복제할 때).
+    """
+    from django.apps import apps
+
+    for app_label, model_name in REPLICATED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        existing = set(model._base_manager.using(alias).values_list("pk", flat=True))
+        model._base_manager.using(alias).bulk_create(
+            [row for row in model._base_manager.using(DEFAULT_DB_ALIAS).all() if row.pk not in existing],
+            batch_size=500
+        )
+
+
+def reserve_id_ranges(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    샤드 번호 * SHARD_ID_SPAN부터 id를 발급하도록 샤드 테이블의 AUTOINCREMENT 시작값을 정한다(post_migrate).
+    """
+    if sender.label != "cards" or using == DEFAULT_DB_ALIAS or connections[using].vendor != "sqlite":
+        return
+    start = int(using.rsplit("_", 1)[1]) * SHARD_ID_SPAN
+    with connections[using].cursor() as cursor:
+        for model in sender.get_models():
+            if model._meta.model_name not in SHARDED_MODELS:
+                continue
+            table = model._meta.db_table
+            # 마이그레이션이 테이블을 다시 만들면 sqlite_sequence 행이 새로 생기므로, 행이 있어도 시작값보다 작으면 올린다
+            cursor.execute("UPDATE sqlite_sequence SET seq = max(seq, %s) WHERE name = %s", [start, table])
+            if cursor.rowcount == 0:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, start])
+
+
+def connect_signals():
+    from django.apps import apps
+
+    for app_label, model_name in REPLICATED_MODELS:
+        post_save.connect(replicate, sender=apps.get_model(app_label, model_name), dispatch_uid=f"replicate_{model_name}")
+    post_migrate.connect(reserve_id_ranges, dispatch_uid="reserve_card_shard_id_ranges")
@@ -0,0 +1,175 @@
+"""
+카드별 최저가 호가(best_ask)와 체결(trade)을 구독자에게 밀어주는 프로세스 내부 pub/sub입니다.
+
+판매 목록/판매 이력을 짧은 주기로 조회하는 대신 GET /cards/<card_id>/stream(Server-Sent Events,
+cards.asgi.CardMarketStream)을 구독하면, 판매/구매 처리가 커밋된 뒤(on_commit) 이벤트를 한 번 발행하고
+구독자 수만큼 메모리에서 나눠준다(DB 조회 없음).
+
+- 구독자마다 버퍼를 둔다. 최저가 호가는 마지막 값만 남기고(빠르게 바뀌면 합쳐짐), 체결은 최대
+  CARD_STREAM["BUFFER_SIZE"]건까지 보관하며 넘치면 오래된 체결부터 버린다(느린 구독자가 발행을 막지 않음).
+- 발행은 요청 스레드에서, 전송은 이벤트 루프에서 한다. 대기 중인 구독자만 모아 이벤트 루프마다 한 번 깨운다.
+- 프로세스 안에서만 전달하므로 여러 프로세스로 운영하면 같은 프로세스에서 처리한 판매/구매만 전달된다.
+"""
+import asyncio
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import transaction
+
+from cards.order_book import order_book
+
+DEFAULT_STREAM_SETTINGS = {
+    # 구독자별로 보관하는 체결 수
+    "BUFFER_SIZE": 100,
+    # 이벤트가 없을 때 연결 유지용 주석을 보내는 간격(초)
+    "KEEPALIVE": 15,
+}
+
+_UNSET = object()
+
+
+def stream_settings():
+    return {**DEFAULT_STREAM_SETTINGS, **getattr(settings, "CARD_STREAM", {})}
+
+
+def ask_data(card_id, ask):
+    if ask is None:
+        return {"cardId": card_id, "id": None, "price": None, "fee": None, "quantity": 0}
+    return {"cardId": card_id, "id": ask.id, "price": ask.price, "fee": ask.fee, "quantity": ask.quantity}
+
+
+def wake(subscribers):
+    for subscriber in subscribers:
+        subscriber.ready.set()
+
+
+class Subscriber:
+    """
+    카드 하나를 구독하는 연결의 버퍼(push는 아무 스레드에서, get은 구독한 이벤트 루프에서 호출)
+    """
+
+    def __init__(self, loop, buffer_size):
+        self.loop = loop
+        self.ready = asyncio.Event()
+        self._lock = threading.Lock()
+        self._waking = False
+        self._best_ask = _UNSET
+        self._trades = deque(maxlen=buffer_size)
+        self.dropped = 0
+
+    def push(self, events):
+        """
+        [(이벤트 이름, 데이터)]를 버퍼에 넣고, 구독자를 깨워야 하면(대기 중이던 경우) True를 반환한다.
+        """
+        with self._lock:
+            for event, data in events:
+                if event == "best_ask":
+                    self._best_ask = data
+                    continue
+                if len(self._trades) == self._trades.maxlen:
+                    self.dropped += 1
+                self._trades.append(data)
+            if self._waking:
+                return False
+            self._waking = True
+            return True
+
+    async def get(self):
+        """
+        이벤트가 쌓일 때까지 기다린 뒤 [(이벤트 이름, 데이터)]를 반환한다.
+        버린 체결 수(dropped), 체결(trade)을 순서대로, 최저가 호가(best_ask)는 마지막에 둔다.
+        """
+        await self.ready.wait()
+        with self._lock:
+            self.ready.clear()
+            self._waking = False
+            events = [("trade", trade) for trade in self._trades]
+            self._trades.clear()
+            if self.dropped:
+                # 버퍼가 넘쳐 버린 체결 수(클라이언트는 판매 이력을 다시 조회)
+                events.insert(0, ("dropped", {"count": self.dropped}))
+                self.dropped = 0
+            if self._best_ask is not _UNSET:
+                events.append(("best_ask", self._best_ask))
+                self._best_ask = _UNSET
+        return events
+
+
+class MarketStream:
+    """
+    카드 id별 구독자 모음. 모듈 하단의 market_stream 인스턴스를 프로세스 전역에서 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._best_asks = {}
+
+    def subscribe(self, card_id, buffer_size=None):
+        """
+        실행 중인 이벤트 루프에서 호출한다.
+        """
+        subscriber = Subscriber(
+            asyncio.get_running_loop(), buffer_size or stream_settings()["BUFFER_SIZE"]
+        )
+        with self._lock:
+            self._subscribers.setdefault(card_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, card_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(card_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[card_id]
+                self._best_asks.pop(card_id, None)
+
+    def publish(self, card_id, events):
+        """
+        card_id의 구독자 버퍼에 events를 넣고, 깨울 구독자를 이벤트 루프별로 모아 루프마다 한 번만 깨운다.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(card_id, ()))
+        woken = defaultdict(list)
+        for subscriber in subscribers:
+            if subscriber.push(events):
+                woken[subscriber.loop].append(subscriber)
+        for loop, targets in woken.items():
+            try:
+                loop.call_soon_threadsafe(wake, targets)
+            except RuntimeError:
+                # 이벤트 루프가 이미 종료됨
+                pass
+
+    def best_ask_event(self, card_id):
+        """
+        card_id의 최저가 호가가 마지막으로 발행한 값과 다르면 ("best_ask", 데이터), 같으면 None
+        """
+        data = ask_data(card_id, order_book.best_ask(card_id))
+        with self._lock:
+            if self._best_asks.get(card_id) == data:
+                return None
+            self._best_asks[card_id] = data
+        return "best_ask", data
+
+    def publish_on_commit(self, card_id, trades=()):
+        """
+        트랜잭션 커밋 후 체결(trades)과 바뀐 최저가 호가를 발행한다(주문장 반영 이후에 실행되도록 마지막에 호출).
+        구독자가 없으면 아무것도 하지 않는다.
+        """
+        def publish():
+            if card_id not in self._subscribers:
+                return
+            events = [("trade", trade) for trade in trades]
+            best_ask = self.best_ask_event(card_id)
+            if best_ask is not None:
+                events.append(best_ask)
+            if events:
+                self.publish(card_id, events)
+        transaction.on_commit(publish)
+
+
+market_stream = MarketStream()
@@ -1,3 +1,1132 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest.mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, OperationalError
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cards import archive, shards
+from cards.asgi import CardMarketStream, CardSellBoardFastPath
+from cards.board import card_sell_board
+from cards.catalogue import VERSION_CACHE_KEY, card_catalogue
+from cards.idempotency import fingerprint, idempotency_store
+from cards.matching import matching_engine
+from cards.models import (
+    Card,
+    CardBuyHistory,
+    CardCandle,
+    CardOrder,
+    CardPossesionStatus,
+    CardSellHistory,
+    CardSellRegister,
+    IdempotencyKey,
+    Trade
+)
+from cards.order_book import OrderBook, order_book
+from cards.streams import market_stream
+from cards.serializers import (
+    CardSellRegisterListSerializer,
+    CardSellRegisterListValues,
+    TradeListValues
+)
+from cards.views import card_sell_history_list, card_sell_list
+from users.models import User, UserBalance
+from utilities.renderers import render_json
+from utilities.serializers import datetime_representation
+
+
+class MarketTestMixin:
+    def setUp(self):
+        cache.clear()
+        order_book.clear()
+        card_sell_board.clear()
+        archive.partition_list.clear()
+        idempotency_store.clear()
+
+        self.card = Card.objects.create(name="card")
+        self.seller = User.objects.create_user("seller@test.com", "seller", "password")
+        self.buyer = User.objects.create_user("buyer@test.com", "buyer", "password")
+        CardPossesionStatus.objects.create(user=self.seller, card=self.card, quantity=10)
+        UserBalance.objects.filter(user=self.buyer).update(balance=100000)
+
+    def commit_callbacks(self):
+        # TransactionTestCase에서는 커밋 시점에 on_commit 콜백이 바로 실행된다
+        return contextlib.nullcontext()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def sell(self, price, quantity=1, user=None):
+        user = user or self.seller
+        with self.commit_callbacks():
+            response = self.client_for(user).post(
+                f"/cards/{self.card.id}/sells", {"price": price, "quantity": quantity}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def buy(self, user=None):
+        with self.commit_callbacks():
+            return self.client_for(user or self.buyer).post(f"/cards/{self.card.id}/buys", format="json")
+
+
+class MarketTestCase(MarketTestMixin, TestCase):
+    def commit_callbacks(self):
+        return self.captureOnCommitCallbacks(execute=True)
+
+
+class CardPossesionStatusTest(MarketTestCase):
+    def test_signup_creates_no_possession_rows(self):
+        Card.objects.create(name="another")
+
+        user = User.objects.create_user("new@test.com", "new", "password")
+
+        self.assertFalse(CardPossesionStatus.objects.filter(user=user).exists())
+
+    def test_first_buy_creates_possession_row(self):
+        self.sell(1000, quantity=2)
+
+        self.buy()
+
+        self.assertEqual(CardPossesionStatus.objects.get(user=self.buyer, card=self.card).quantity, 2)
+
+    def test_sell_without_possession_row(self):
+        response = self.client_for(self.buyer).post(
+            f"/cards/{self.card.id}/sells", {"price": 1000, "quantity": 1}, format="json"
+        )
+
+        self.assertEqual((response.status_code, response.json()["detail"]), (422, "판매할 카드가 없습니다"))
+
+    def test_sell_more_than_possessed(self):
+        response = self.client_for(self.seller).post(
+            f"/cards/{self.card.id}/sells", {"price": 1000, "quantity": 11}, format="json"
+        )
+
+        self.assertEqual((response.status_code, response.json()["detail"]), (422, "판매할 수량을 다시 확인해주세요"))
+
+    def test_boolean_quantity_and_price_are_rejected(self):
+        client = self.client_for(self.seller)
+        for data in (
+            {"price": 1000, "quantity": True},
+            {"price": True, "quantity": 1},
+            {"price": 1000, "quantity": 1, "ttl": True},
+        ):
+            self.assertEqual(client.post(f"/cards/{self.card.id}/sells", data, format="json").status_code, 422)
+        self.sell(1000)
+
+        with self.commit_callbacks():
+            response = self.client_for(self.buyer).post(
+                f"/cards/{self.card.id}/buys", {"quantity": True}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CardPossesionStatus.objects.get(user=self.seller, card=self.card).quantity, 9)
+
+    def test_prune_command_deletes_empty_rows(self):
+        CardPossesionStatus.objects.create(user=self.buyer, card=self.card, quantity=0)
+
+        call_command("prune_possessions", stdout=io.StringIO())
+
+        self.assertEqual(list(CardPossesionStatus.objects.values_list("user_id", flat=True)), [self.seller.id])
+
+
+class OrderBookTest(MarketTestCase):
+    def test_best_ask_uses_price_time_priority(self):
+        first = self.sell(1000)
+        self.sell(2000)
+        self.sell(1000)
+
+        self.assertEqual(order_book.best_ask(self.card.id).id, first["id"])
+        self.assertEqual([ask.price for ask in order_book.asks(self.card.id)], [1000, 1000, 2000])
+
+    def test_asks_are_read_in_batches_and_reseek_after_removal(self):
+        sells = [self.sell(price) for price in (1000, 2000, 3000, 4000, 5000)]
+
+        with unittest.mock.patch("cards.order_book.ASK_LOOKAHEAD", 2):
+            asks = order_book.asks(self.card.id)
+            self.assertEqual([next(asks).price, next(asks).price], [1000, 2000])
+            # 다음 묶음을 읽기 전에 빠진 호가는 건너뛴다
+            order_book.discard(self.card.id, sells[2]["id"])
+            self.assertEqual([ask.price for ask in asks], [4000, 5000])
+
+    def test_book_is_rebuilt_from_database(self):
+        self.sell(3000)
+        cheapest = self.sell(1000)
+
+        order_book.clear()
+
+        self.assertEqual(order_book.best_ask(self.card.id).id, cheapest["id"])
+        self.assertIsNone(order_book.best_ask(self.card.id, exclude_user_id=self.seller.id))
+
+    def test_other_process_change_reloads_only_changed_card(self):
+        other_card = Card.objects.create(name="other")
+        self.sell(2000)
+        order_book.best_asks()
+        # 다른 프로세스의 주문장에서 other_card에 호가가 생김
+        register = CardSellRegister.objects.create(
+            card=other_card, user=self.seller, price=500, fee=0, quantity=1, remaining_quantity=1
+        )
+        OrderBook()._apply(other_card.id, lambda book: None)
+
+        with unittest.mock.patch.object(order_book, "_load_all", side_effect=AssertionError), \
+                self.assertNumQueries(1):
+            best_asks = order_book.best_asks()
+
+        self.assertEqual(sorted(ask.price for ask in best_asks), [500, 2000])
+        self.assertEqual(order_book.best_ask(other_card.id).id, register.id)
+
+    def test_buy_takes_best_ask_and_removes_it(self):
+        self.sell(2000)
+        cheapest = self.sell(1000)
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["id"], cheapest["id"])
+        self.assertEqual(CardSellRegister.objects.get(id=cheapest["id"]).state, "selled")
+        self.assertEqual([ask.price for ask in order_book.asks(self.card.id)], [2000])
+
+    def test_buy_skips_listing_sold_elsewhere(self):
+        stale = self.sell(1000)
+        fresh = self.sell(2000)
+        order_book.best_asks()
+        CardSellRegister.objects.filter(id=stale["id"]).update(state="selled")
+
+        response = self.buy()
+
+        self.assertEqual(response.json()["id"], fresh["id"])
+
+    def test_buy_without_listing(self):
+        response = self.buy()
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["detail"], "구매할 수 있는 카드가 없습니다")
+
+    def test_sell_list_returns_best_ask_per_card(self):
+        other_card = Card.objects.create(name="other")
+        CardPossesionStatus.objects.create(user=self.seller, card=other_card, quantity=1)
+        self.sell(2000)
+        cheapest = self.sell(1000)
+        with self.commit_callbacks():
+            other = self.client_for(self.seller).post(
+                f"/cards/{other_card.id}/sells", {"price": 500, "quantity": 1}, format="json"
+            ).json()
+
+        response = self.client.get("/cards/sells")
+
+        self.assertEqual(sorted(row["id"] for row in response.json()), sorted([cheapest["id"], other["id"]]))
+
+
+class CardSellBoardTest(MarketTestCase):
+    def test_board_is_served_with_etag(self):
+        cheapest = self.sell(1000)
+
+        response = self.client.get("/cards/sells")
+        etag = response["ETag"]
+
+        self.assertEqual([row["id"] for row in response.json()], [cheapest["id"]])
+        with self.assertNumQueries(0):
+            not_modified = self.client.get("/cards/sells", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_board_is_refreshed_on_sell_and_buy(self):
+        self.sell(2000)
+        etag = self.client.get("/cards/sells")["ETag"]
+
+        cheapest = self.sell(1000)
+        with self.assertNumQueries(0):
+            response = self.client.get("/cards/sells", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.json()], [cheapest["id"]])
+
+        self.buy()
+        self.assertEqual([row["price"] for row in self.client.get("/cards/sells").json()], [2000])
+
+    def test_board_patches_only_changed_card(self):
+        other_card = Card.objects.create(name="other")
+        CardPossesionStatus.objects.create(user=self.seller, card=other_card, quantity=1)
+        self.sell(2000)
+        self.client.get("/cards/sells")
+
+        with unittest.mock.patch.object(card_sell_board, "_rebuild", side_effect=AssertionError):
+            with self.commit_callbacks():
+                other = self.client_for(self.seller).post(
+                    f"/cards/{other_card.id}/sells", {"price": 500, "quantity": 1}, format="json"
+                ).json()
+            cheapest = self.sell(1000)
+            response = self.client.get("/cards/sells")
+
+        self.assertEqual([row["id"] for row in response.json()], [cheapest["id"], other["id"]])
+        self.assertEqual(response.content, render_json(sorted(response.json(), key=lambda row: row["cardId"])))
+
+
+class AsyncReadViewTest(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sell(2000)
+        self.sell(1000, quantity=2)
+        self.buy()
+
+    async def test_card_sell_list_matches_sync_view(self):
+        factory = RequestFactory()
+        sync_response = await sync_to_async(self.client.get)("/cards/sells")
+
+        # 캐시에 최신 판매 게시판이 있으면 스레드에서 DB를 조회하지 않고 응답
+        self.assertIsNotNone(card_sell_board.peek())
+        response = await card_sell_list(factory.get("/cards/sells"))
+        self.assertEqual(response.content, sync_response.content)
+        self.assertEqual(response["ETag"], sync_response["ETag"])
+
+        not_modified = await card_sell_list(
+            factory.get("/cards/sells", HTTP_IF_NONE_MATCH=sync_response["ETag"])
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual((await card_sell_list(factory.post("/cards/sells"))).status_code, 405)
+
+    async def test_board_peek_runs_in_thread_for_network_cache(self):
+        await sync_to_async(self.client.get)("/cards/sells")
+        loop_thread = threading.get_ident()
+        peek = card_sell_board.peek
+        threads = []
+
+        def record_peek():
+            threads.append(threading.get_ident())
+            return peek()
+
+        with unittest.mock.patch.object(card_sell_board, "peek", side_effect=record_peek):
+            self.assertIsNotNone(await card_sell_board.apeek())
+            # LocMemCache가 아니면 캐시 조회가 이벤트 루프를 막지 않도록 스레드에서 한다
+            with unittest.mock.patch("cards.board.LocMemCache", type("NetworkCache", (), {})):
+                self.assertIsNotNone(await card_sell_board.apeek())
+
+        self.assertEqual(threads[0], loop_thread)
+        self.assertNotEqual(threads[1], loop_thread)
+
+    async def test_card_sell_history_list_matches_sync_view(self):
+        path = f"/cards/{self.card.id}/sells/histories"
+        sync_response = await sync_to_async(self.client.get)(path)
+
+        response = await card_sell_history_list(RequestFactory().get(path), card_id=self.card.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), sync_response.json())
+
+        invalid = await card_sell_history_list(RequestFactory().get(f"{path}?page_size=0"), card_id=self.card.id)
+        self.assertEqual(invalid.status_code, 422)
+        self.assertEqual(json.loads(invalid.content)["status_code"], 422)
+
+    async def test_fast_path_serves_cached_board(self):
+        sync_response = await sync_to_async(self.client.get)("/cards/sells")
+        passed = []
+
+        async def django_application(scope, receive, send):
+            passed.append(scope["path"])
+
+        async def get(path, headers=()):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {"type": "http", "method": "GET", "path": path, "headers": list(headers)}
+            await CardSellBoardFastPath(django_application)(scope, None, send)
+            return messages
+
+        start, body = await get("/cards/sells")
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(body["body"], sync_response.content)
+
+        etag = sync_response["ETag"].encode()
+        start, body = await get("/cards/sells", [(b"if-none-match", etag)])
+        self.assertEqual(start["status"], 304)
+        self.assertEqual(body["body"], b"")
+
+        # 다른 경로와 주문장을 다시 읽어야 하는 경우는 Django로 넘긴다
+        await get(f"/cards/{self.card.id}/sells/histories")
+        order_book.clear()
+        await get("/cards/sells")
+        self.assertEqual(passed, [f"/cards/{self.card.id}/sells/histories", "/cards/sells"])
+
+
+class MarketStreamTest(MarketTestCase):
+    @staticmethod
+    def events(message):
+        return [
+            (event[len("event: "):], json.loads(data[len("data: "):]))
+            for event, data in (chunk.split("\n") for chunk in message["body"].decode().split("\n\n") if chunk)
+        ]
+
+    async def test_subscriber_buffer_coalesces_best_ask_and_bounds_trades(self):
+        subscriber = market_stream.subscribe(self.card.id, buffer_size=2)
+        for price in (1000, 2000, 3000):
+            market_stream.publish(self.card.id, [("trade", {"price": price}), ("best_ask", {"price": price})])
+
+        events = await subscriber.get()
+        market_stream.unsubscribe(self.card.id, subscriber)
+
+        self.assertEqual(events, [
+            ("dropped", {"count": 1}),
+            ("trade", {"price": 2000}),
+            ("trade", {"price": 3000}),
+            ("best_ask", {"price": 3000}),
+        ])
+
+    @unittest.mock.patch("utilities.renderers.orjson", None)
+    async def test_stream_pushes_best_ask_and_trades(self):
+        messages = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def django_application(scope, receive, send):
+            raise AssertionError("stream must not reach django")
+
+        scope = {"type": "http", "method": "GET", "path": f"/cards/{self.card.id}/stream", "headers": []}
+        stream = asyncio.ensure_future(CardMarketStream(django_application)(scope, receive, messages.put))
+        start = await messages.get()
+        self.assertEqual((start["status"], start["headers"][0]), (200, (b"content-type", b"text/event-stream")))
+        self.assertEqual(self.events(await messages.get()), [("best_ask", {
+            "cardId": self.card.id, "id": None, "price": None, "fee": None, "quantity": 0
+        })])
+
+        ask = await sync_to_async(self.sell)(1000)
+        self.assertEqual(self.events(await asyncio.wait_for(messages.get(), 1)), [("best_ask", {
+            "cardId": self.card.id, "id": ask["id"], "price": 1000, "fee": 200, "quantity": 1
+        })])
+
+        await sync_to_async(self.buy)()
+        events = self.events(await asyncio.wait_for(messages.get(), 1))
+        self.assertEqual([event for event, _ in events], ["trade", "best_ask"])
+        self.assertEqual(
+            (events[0][1]["cardSellRegisterId"], events[0][1]["price"], events[1][1]["price"]), (ask["id"], 1000, None)
+        )
+        self.assertTrue(events[0][1]["executedAt"].endswith("+09:00"))
+
+        disconnected.set()
+        await asyncio.wait_for(stream, 1)
+        self.assertNotIn(self.card.id, market_stream._subscribers)
+
+
+class CardCatalogueTest(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sell(1000)
+        self.buy()
+
+    def history(self):
+        return self.client_for(self.buyer).get(f"/cards/{self.card.id}/sells/histories").json()
+
+    def test_history_reads_card_name_without_join(self):
+        self.history()
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.history()
+
+        self.assertEqual(rows[0]["cardName"], "card")
+        self.assertFalse([query for query in queries if "cards_card" in query["sql"]])
+
+    def test_card_changes_invalidate_catalogue(self):
+        self.history()
+        Card.objects.filter(id=self.card.id).update(name="renamed")
+        self.assertEqual(self.history()[0]["cardName"], "card")
+
+        # 다른 프로세스에서 카드를 바꾼 경우: 다음 요청이 시작될 때 버전을 확인해 다시 읽는다
+        cache.incr(VERSION_CACHE_KEY)
+        self.assertEqual(self.history()[0]["cardName"], "renamed")
+
+        self.card.name = "saved"
+        self.card.save()
+        self.assertEqual(self.history()[0]["cardName"], "saved")
+        another = Card.objects.create(name="another")
+        self.assertTrue(card_catalogue.exists(another.id))
+        self.assertFalse(card_catalogue.exists(another.id + 1))
+
+
+class ValuesSerializerTest(MarketTestCase):
+    def test_values_rows_match_model_serializers(self):
+        User.objects.filter(id=self.seller.id).update(nickname="판매자")
+        self.sell(2000)
+        self.sell(1000, quantity=2)
+        self.buy()
+
+        registers = CardSellRegister.objects.order_by("id")
+        self.assertEqual(
+            CardSellRegisterListValues.rows(registers),
+            CardSellRegisterListSerializer(registers.select_related("card", "user"), many=True).data
+        )
+
+
+class PaginationTest(MarketTestCase):
+    def pages(self, path):
+        """
+        Link 헤더(rel="next")를 따라가며 모든 페이지를 조회
+        """
+        pages = []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            link = response.get("Link")
+            path = link[1:link.index(">")] if link else None
+        return pages
+
+    def test_card_book_pages_in_price_time_priority(self):
+        prices = [3000, 1000, 2000, 1000, 5000]
+        for price in prices:
+            self.sell(price)
+
+        pages = self.pages(f"/cards/sells?card_id={self.card.id}&page_size=2")
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        rows = [row for page in pages for row in page]
+        self.assertEqual([row["price"] for row in rows], sorted(prices))
+        self.assertEqual(len({row["id"] for row in rows}), len(prices))
+
+        filtered = self.client.get(f"/cards/sells?card_id={self.card.id}&min_price=1500&max_price=3000").json()
+        self.assertEqual([row["price"] for row in filtered], [2000, 3000])
+
+    def test_unknown_card_book_is_empty_and_not_loaded(self):
+        unknown_id = self.card.id + 1000
+
+        response = self.client.get(f"/cards/sells?card_id={unknown_id}")
+
+        self.assertEqual((response.status_code, response.json()), (200, []))
+        self.assertNotIn(unknown_id, order_book._books)
+
+    def test_best_asks_are_filtered_by_price(self):
+        other_card = Card.objects.create(name="other card")
+        CardPossesionStatus.objects.create(user=self.seller, card=other_card, quantity=1)
+        self.sell(3000)
+        with self.commit_callbacks():
+            self.client_for(self.seller).post(
+                f"/cards/{other_card.id}/sells", {"price": 1000, "quantity": 1}, format="json"
+            )
+
+        rows = self.client.get("/cards/sells?page_size=10").json()
+        self.assertEqual([(row["cardId"], row["price"]) for row in rows], [(other_card.id, 1000), (self.card.id, 3000)])
+        rows = self.client.get("/cards/sells?min_price=2000").json()
+        self.assertEqual([row["cardId"] for row in rows], [self.card.id])
+
+    def test_sell_histories_pages_and_date_range(self):
+        UserBalance.objects.filter(user=self.buyer).update(balance=10 ** 9)
+        for price in range(1000, 8000, 1000):
+            self.sell(price)
+            self.buy()
+        path = f"/cards/{self.card.id}/sells/histories"
+
+        # 기본 5개(최신순)
+        response = self.client.get(path)
+        self.assertEqual([row["price"] for row in response.json()], [7000, 6000, 5000, 4000, 3000])
+        self.assertIn('rel="next"', response["Link"])
+
+        pages = self.pages(f"{path}?page_size=3&min_price=2000")
+        self.assertEqual(
+            [[row["price"] for row in page] for page in pages], [[7000, 6000, 5000], [4000, 3000, 2000]]
+        )
+
+        today = timezone.localdate()
+        self.assertEqual(len(self.client.get(f"{path}?start_date={today}&end_date={today}").json()), 5)
+        self.assertEqual(self.client.get(f"{path}?end_date={today - datetime.timedelta(days=1)}").json(), [])
+
+    def test_invalid_queries(self):
+        for query in ("cursor=abc", "page_size=0", "min_price=x"):
+            response = self.client.get(f"/cards/sells?{query}")
+            self.assertEqual(response.status_code, 422, query)
+        response = self.client.get(f"/cards/{self.card.id}/sells/histories?start_date=yesterday")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["default_code"], "InvalidData")
+
+
+class CardCandleTest(MarketTestCase):
+    def candles(self, interval):
+        return list(
+            CardCandle.objects.filter(card=self.card, interval=interval)
+            .order_by("started_at").values_list("open", "high", "low", "close", "volume")
+        )
+
+    def test_candles_are_updated_on_settlement(self):
+        UserBalance.objects.filter(user=self.buyer).update(balance=10 ** 9)
+        now = timezone.now().replace(minute=30)
+        with unittest.mock.patch("django.utils.timezone.now", return_value=now):
+            for price, quantity in ((2000, 2), (3000, 1), (1000, 3)):
+                self.sell(price, quantity)
+                self.buy()
+        with unittest.mock.patch("django.utils.timezone.now", return_value=now + datetime.timedelta(minutes=1)):
+            self.sell(1500)
+            self.buy()
+
+        self.assertEqual(self.candles("1m"), [(2000, 3000, 1000, 1000, 6), (1500, 1500, 1500, 1500, 1)])
+        self.assertEqual(self.candles("1h"), [(2000, 3000, 1000, 1500, 7)])
+        self.assertEqual(self.candles("1d"), [(2000, 3000, 1000, 1500, 7)])
+
+        response = self.client.get(f"/cards/{self.card.id}/candles?page_size=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["open"], row["close"], row["volume"]) for row in response.json()], [(1500, 1500, 1)]
+        )
+        link = response["Link"]
+        response = self.client.get(link[1:link.index(">")])
+        self.assertEqual([(row["open"], row["close"], row["volume"]) for row in response.json()], [(2000, 1000, 6)])
+        self.assertNotIn("Link", response)
+
+        self.assertEqual(len(self.client.get(f"/cards/{self.card.id}/candles?interval=1d").json()), 1)
+        self.assertEqual(self.client.get(f"/cards/{self.card.id}/candles?interval=5m").status_code, 422)
+
+    def test_backfill_rebuilds_candles_from_histories(self):
+        UserBalance.objects.filter(user=self.buyer).update(balance=10 ** 9)
+        for price in (2000, 1000, 3000):
+            self.sell(price, quantity=2)
+            self.buy()
+        expected = {interval: self.candles(interval) for interval in ("1m", "1h", "1d")}
+        CardCandle.objects.update(volume=0)
+
+        call_command("backfill_candles", batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual({interval: self.candles(interval) for interval in ("1m", "1h", "1d")}, expected)
+
+
+class TradeLedgerTest(MarketTestCase):
+    def test_legacy_histories_are_copied_to_ledger(self):
+        copy_histories = importlib.import_module("cards.migrations.0008_trade_ledger").copy_histories
+        other_buyer = User.objects.create_user("other@test.com", "other", "password")
+        executed_at = timezone.now()
+        card_sell_register = CardSellRegister.objects.create(
+            card=self.card, user=self.seller, price=1000, fee=200, quantity=3, remaining_quantity=0,
+            state="selled", selled_at=executed_at
+        )
+        for buyer, quantity in ((self.buyer, 2), (other_buyer, 1)):
+            CardSellHistory.objects.create(card_sell_register=card_sell_register, quantity=quantity)
+            CardBuyHistory.objects.create(card_sell_register=card_sell_register, user=buyer, quantity=quantity)
+        # 이전 이력은 판매완료 시각과 이력 생성 시각이 같아 응답 형태를 그대로 비교할 수 있다
+        CardSellHistory.objects.update(created_at=executed_at)
+        executed_at = datetime_representation(executed_at, timezone.get_current_timezone())
+
+        copy_histories(apps, None)
+
+        self.assertEqual(
+            list(Trade.objects.order_by("id").values_list("buyer_id", "seller_id", "quantity")),
+            [(self.buyer.id, self.seller.id, 2), (other_buyer.id, self.seller.id, 1)]
+        )
+        legacy_rows = [
+            {
+                "id": None, "createdAt": executed_at, "price": 1000, "fee": 200, "quantity": quantity,
+                "selledAt": executed_at, "cardId": self.card.id, "cardName": self.card.name,
+            }
+            for quantity in (2, 1)
+        ]
+        rows = TradeListValues.rows(Trade.objects.order_by("id"))
+        self.assertEqual([{**row, "id": None} for row in rows], legacy_rows)
+
+
+@override_settings(CARD_SHARD_COUNT=4)
+class CardShardRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = shards.CardShardRouter()
+
+    def test_card_id_selects_shard(self):
+        self.assertEqual(
+            [shards.shard_alias(card_id) for card_id in (4, 5, 7)], ["default", "card_shard_1", "card_shard_3"]
+        )
+        self.assertEqual(shards.shard_aliases(), ["default", "card_shard_1", "card_shard_2", "card_shard_3"])
+
+    def test_market_tables_follow_card_shard(self):
+        self.assertEqual(self.router.db_for_read(Trade), "default")
+        with shards.card_shard(6):
+            self.assertEqual(self.router.db_for_read(Trade), "card_shard_2")
+            self.assertEqual(self.router.db_for_write(CardPossesionStatus), "card_shard_2")
+            # 사용자/카드/주문은 주 DB
+            self.assertEqual(self.router.db_for_write(User), "default")
+            self.assertEqual(self.router.db_for_read(Card), "default")
+            self.assertEqual(self.router.db_for_write(CardOrder), "default")
+        self.assertEqual(
+            self.router.db_for_write(CardSellRegister, instance=CardSellRegister(card_id=5)), "card_shard_1"
+        )
+
+
+@override_settings(CARD_SHARD_COUNT=2, DATABASE_ROUTERS=["cards.shards.CardShardRouter"])
+class ShardedMarketTest(MarketTestMixin, TransactionTestCase):
+    """
+    두 번째 샤드 DB(card_shard_1)를 임시 파일로 추가하고 마이그레이션한다(테스트 러너는 settings의 DB만 만든다).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.shard_directory = tempfile.TemporaryDirectory()
+        connections.databases["card_shard_1"] = {
+            **connections.databases["default"],
+            "NAME": os.path.join(cls.shard_directory.name, "shard1.sqlite3"),
+        }
+        call_command("migrate", database="card_shard_1", verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["card_shard_1"].close()
+        del connections.databases["card_shard_1"]
+        cls.shard_directory.cleanup()
+        super().tearDownClass()
+
+    def test_listing_ids_do_not_collide_across_shards(self):
+        other = Card.objects.create(name="other")
+        # default 샤드의 카드, card_shard_1 샤드의 카드 순(보유 수량은 카드의 샤드에 저장)
+        cards = sorted([self.card, other], key=lambda card: card.id % 2)
+        CardPossesionStatus.objects.all().delete()
+        for card in cards:
+            with shards.card_shard(card.id):
+                CardPossesionStatus.objects.create(user=self.seller, card=card, quantity=10)
+        ids = []
+        for card in cards:
+            response = self.client_for(self.seller).post(
+                f"/cards/{card.id}/sells", {"price": 1000, "quantity": 1}, format="json"
+            )
+            self.assertEqual(response.status_code, 201)
+            ids.append(response.json()["id"])
+
+        self.assertEqual(ids[0] // shards.SHARD_ID_SPAN, 0)
+        self.assertEqual(ids[1] // shards.SHARD_ID_SPAN, 1)
+        rows = self.client_for(self.buyer).get("/cards/sells").json()
+        self.assertEqual(sorted((row["cardId"], row["id"]) for row in rows), sorted(zip([c.id for c in cards], ids)))
+
+
+class ListingCancellationTest(MarketTestCase):
+    def cancel(self, card_sell_register_id, user=None):
+        with self.commit_callbacks():
+            return self.client_for(user or self.seller).delete(f"/cards/{self.card.id}/sells/{card_sell_register_id}")
+
+    def quantity(self, user):
+        return CardPossesionStatus.objects.get(user=user, card=self.card).quantity
+
+    def registers(self):
+        return self.client_for(self.seller).get(f"/cards/{self.card.id}/sells/mine").json()
+
+    def test_cancel_restores_unsold_quantity_and_archives(self):
+        ask = self.sell(1000, quantity=3)
+        with self.commit_callbacks():
+            self.client_for(self.buyer).post(f"/cards/{self.card.id}/buys", {"quantity": 1}, format="json")
+
+        self.assertEqual(self.cancel(ask["id"], user=self.buyer).status_code, 404)
+        response = self.cancel(ask["id"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["state"], "cancelled")
+        self.assertEqual(self.quantity(self.seller), 10 - 3 + 2)
+        self.assertEqual(list(order_book.asks(self.card.id)), [])
+        self.assertEqual(self.cancel(ask["id"]).status_code, 404)
+
+        call_command("sweep_listings", stdout=io.StringIO())
+
+        self.assertFalse(CardSellRegister.objects.exists())
+        self.assertEqual(
+            [(row["id"], row["state"], row["remainingQuantity"]) for row in self.registers()],
+            [(ask["id"], "cancelled", 2)]
+        )
+        # 체결 원장은 판매 등록을 옮긴 뒤에도 조회된다
+        rows = self.client_for(self.buyer).get(f"/cards/{self.card.id}/sells/histories").json()
+        self.assertEqual([row["quantity"] for row in rows], [1])
+
+    def test_expired_listing_is_not_bought_and_is_swept(self):
+        ask = self.sell(1000, quantity=2)
+        response = self.client_for(self.seller).post(
+            f"/cards/{self.card.id}/sells", {"price": 1000, "quantity": 1, "ttl": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, 422)
+        with self.commit_callbacks():
+            expiring = self.client_for(self.seller).post(
+                f"/cards/{self.card.id}/sells", {"price": 900, "quantity": 1, "ttl": 60}, format="json"
+            ).json()
+        CardSellRegister.objects.filter(id=expiring["id"]).update(
+            expires_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        order_book.clear()
+
+        # 만료된 최저가 호가는 건너뛰고 다음 호가를 체결
+        self.assertEqual(self.buy().json()["id"], ask["id"])
+        self.assertEqual(self.quantity(self.seller), 10 - 3)
+
+        call_command("sweep_listings", stdout=io.StringIO())
+
+        self.assertEqual(self.quantity(self.seller), 10 - 3 + 1)
+        self.assertFalse(CardSellRegister.objects.exists())
+        self.assertEqual(
+            [(row["id"], row["state"]) for row in self.registers()],
+            [(expiring["id"], "expired"), (ask["id"], "selled")]
+        )
+
+    def test_expired_listing_is_hidden_before_sweep(self):
+        ask = self.sell(1000)
+        with self.commit_callbacks():
+            expiring = self.client_for(self.seller).post(
+                f"/cards/{self.card.id}/sells", {"price": 900, "quantity": 1, "ttl": 60}, format="json"
+            ).json()
+        self.assertEqual([row["id"] for row in self.client.get("/cards/sells").json()], [expiring["id"]])
+        self.assertEqual([row["id"] for row in self.client.get("/cards/sells?max_price=5000").json()], [expiring["id"]])
+
+        later = timezone.now() + datetime.timedelta(seconds=120)
+        with unittest.mock.patch("django.utils.timezone.now", return_value=later):
+            self.assertEqual(order_book.best_ask(self.card.id).id, ask["id"])
+            for path in ("/cards/sells", "/cards/sells?max_price=5000", f"/cards/sells?card_id={self.card.id}"):
+                self.assertEqual([row["id"] for row in self.client.get(path).json()], [ask["id"]])
+
+
+class SellRegisterArchiveTest(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        # 등록 월이 다른 판매 등록 4개(3개는 판매완료, 가장 최근 1개는 판매중)
+        self.registers = []
+        for month in (8, 9, 10):
+            register = self.sell(1000)
+            self.buy()
+            self.registers.append(register["id"])
+        self.registers.append(self.sell(2000)["id"])
+        for month, register_id in zip((8, 9, 10, 10), self.registers):
+            CardSellRegister.objects.filter(id=register_id).update(
+                created_at=datetime.datetime(2026, month, 1, 12, register_id, tzinfo=datetime.timezone.utc)
+            )
+
+    def test_archive_moves_closed_registers_into_monthly_partitions(self):
+        call_command("archive_listings", "--batch-size", "2", stdout=io.StringIO())
+
+        self.assertEqual(archive.partitions("default"), ["202610", "202609", "202608"])
+        self.assertEqual(list(CardSellRegister.objects.values_list("id", "state")), [(self.registers[3], "selling")])
+        row = archive.partition_model("202609").objects.get()
+        self.assertEqual((row.id, row.state, row.user_id), (self.registers[1], "selled", self.seller.id))
+
+        call_command("archive_listings", "--drop-before", "202609", stdout=io.StringIO())
+        self.assertEqual(archive.partitions("default"), ["202610", "202609"])
+
+    def test_register_list_unions_live_table_and_partitions(self):
+        call_command("archive_listings", stdout=io.StringIO())
+
+        ids = []
+        url = f"/cards/{self.card.id}/sells/mine?page_size=1"
+        client = self.client_for(self.seller)
+        with CaptureQueriesContext(connection) as first_page:
+            response = client.get(url)
+        while True:
+            ids += [row["id"] for row in response.json()]
+            if "Link" not in response:
+                break
+            url = response["Link"].split(">")[0][1:]
+            response = client.get(url)
+
+        self.assertEqual(ids, self.registers[::-1])
+        # 첫 페이지는 판매 등록 테이블과 가장 최근 월 보관 테이블만 읽는다
+        self.assertFalse(any("cards_sellarchive_202608" in query["sql"] for query in first_page.captured_queries))
+        # 보관 테이블 목록은 테이블을 만들거나 지울 때만 다시 읽는다
+        with CaptureQueriesContext(connection) as queries:
+            client.get(f"/cards/{self.card.id}/sells/mine")
+        self.assertFalse(any("sqlite_master" in query["sql"] for query in queries.captured_queries))
+        self.assertEqual(self.client_for(self.buyer).get(f"/cards/{self.card.id}/sells/mine").json(), [])
+
+
+class IdempotencyKeyTest(MarketTestCase):
+    def post(self, user, path, data, key):
+        with self.commit_callbacks():
+            return self.client_for(user).post(
+                f"/cards/{self.card.id}/{path}", data, format="json", HTTP_IDEMPOTENCY_KEY=key
+            )
+
+    def test_retried_sell_and_buy_execute_once(self):
+        sell = self.post(self.seller, "sells", {"price": 1000, "quantity": 2}, "sell-1")
+        retried_sell = self.post(self.seller, "sells", {"price": 1000, "quantity": 2}, "sell-1")
+        self.assertEqual((retried_sell.status_code, retried_sell.json()), (201, sell.json()))
+        self.assertEqual(retried_sell["Idempotent-Replayed"], "true")
+        self.assertEqual(CardSellRegister.objects.count(), 1)
+
+        buy = self.post(self.buyer, "buys", {"quantity": 1}, "buy-1")
+        # 메모리(LRU)에 없어도 저장한 응답을 반환하며 시장 테이블은 읽지 않는다
+        idempotency_store.clear()
+        with CaptureQueriesContext(connection) as queries:
+            retried_buy = self.post(self.buyer, "buys", {"quantity": 1}, "buy-1")
+        self.assertEqual((retried_buy.status_code, retried_buy.json()), (201, buy.json()))
+        self.assertEqual(len(queries), 1)
+        self.assertIn("cards_idempotencykey", queries[0]["sql"])
+        self.assertEqual(Trade.objects.count(), 1)
+        self.assertEqual(CardPossesionStatus.objects.get(user=self.buyer, card=self.card).quantity, 1)
+
+        # 다른 사용자의 같은 키는 별개의 요청
+        self.assertEqual(self.post(self.seller, "sells", {"price": 1000, "quantity": 1}, "buy-1").status_code, 201)
+
+    def test_key_reused_with_different_request_is_rejected(self):
+        self.post(self.seller, "sells", {"price": 1000, "quantity": 1}, "sell-1")
+        response = self.post(self.seller, "sells", {"price": 2000, "quantity": 1}, "sell-1")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CardSellRegister.objects.get().price, 1000)
+        self.assertEqual(self.post(self.seller, "sells", {"price": 1000, "quantity": 1}, "x" * 256).status_code, 422)
+
+    def test_failed_request_releases_key_and_in_progress_key_conflicts(self):
+        self.assertNotEqual(self.post(self.buyer, "buys", {}, "buy-1").status_code, 201)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.sell(1000)
+        self.assertEqual(self.post(self.buyer, "buys", {}, "buy-1").status_code, 201)
+
+        IdempotencyKey.objects.create(
+            user=self.buyer, key="buy-2", fingerprint=fingerprint(["buy", self.card.id, {"quantity": None}]),
+            created_at=timezone.now(),
+            expires_at=timezone.now() + datetime.timedelta(seconds=60)
+        )
+        response = self.post(self.buyer, "buys", {}, "buy-2")
+        self.assertEqual((response.status_code, response.json()["default_code"]), (409, "IdempotencyKeyInProgress"))
+
+    def test_expired_key_is_executed_again_and_pruned(self):
+        self.sell(1000, quantity=2)
+        self.post(self.buyer, "buys", {"quantity": 1}, "buy-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        idempotency_store.clear()
+
+        self.assertNotIn("Idempotent-Replayed", self.post(self.buyer, "buys", {"quantity": 1}, "buy-1"))
+        self.assertEqual(Trade.objects.count(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        call_command("prune_idempotency_keys", stdout=io.StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class SettlementTest(MarketTestCase):
+    def test_buy_moves_quantity_and_balances(self):
+        self.sell(1000, quantity=3)
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CardPossesionStatus.objects.get(user=self.buyer, card=self.card).quantity, 3)
+        self.assertEqual(CardPossesionStatus.objects.get(user=self.seller, card=self.card).quantity, 7)
+        self.assertEqual(UserBalance.objects.get(user=self.buyer).balance, 100000 - 3600)
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 3600)
+        trade = Trade.objects.get()
+        self.assertEqual(
+            (trade.card_id, trade.buyer_id, trade.seller_id, trade.price, trade.fee, trade.quantity),
+            (self.card.id, self.buyer.id, self.seller.id, 1000, 200, 3)
+        )
+
+    def test_buy_with_insufficient_balance_is_rolled_back(self):
+        listing = self.sell(1000)
+        UserBalance.objects.filter(user=self.buyer).update(balance=100)
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CardSellRegister.objects.get(id=listing["id"]).state, "selling")
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 0)
+
+
+class PartialFillTest(MarketTestCase):
+    def test_listing_is_filled_by_several_buyers(self):
+        other_buyer = User.objects.create_user("other@test.com", "other", "password")
+        UserBalance.objects.filter(user=other_buyer).update(balance=100000)
+        listing = self.sell(1000, quantity=10)
+
+        self.client_for(self.buyer).post(f"/cards/{self.card.id}/buys", {"quantity": 4}, format="json")
+        with self.commit_callbacks():
+            self.client_for(other_buyer).post(f"/cards/{self.card.id}/buys", {"quantity": 4}, format="json")
+        board = self.client.get("/cards/sells").json()
+        response = self.buy()
+
+        self.assertEqual(board[0]["quantity"], 2)
+        self.assertEqual(response.json()["quantity"], 2)
+        card_sell_register = CardSellRegister.objects.get(id=listing["id"])
+        self.assertEqual((card_sell_register.state, card_sell_register.remaining_quantity), ("selled", 0))
+        self.assertEqual(
+            sorted(Trade.objects.values_list("quantity", flat=True)), [2, 4, 4]
+        )
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 12000)
+        self.assertIsNone(order_book.best_ask(self.card.id))
+
+    def test_stale_book_quantity_is_rechecked(self):
+        listing = self.sell(1000, quantity=5)
+        order_book.best_asks()
+        CardSellRegister.objects.filter(id=listing["id"]).update(remaining_quantity=2)
+
+        response = self.client_for(self.buyer).post(f"/cards/{self.card.id}/buys", {"quantity": 4}, format="json")
+
+        self.assertEqual((response.json()["quantity"], response.json()["state"]), (2, "selled"))
+        self.assertEqual(
+            CardSellRegister.objects.values_list("state", "remaining_quantity").get(id=listing["id"]), ("selled", 0)
+        )
+
+
+class BatchBuyTest(MarketTestCase):
+    def batch_buy(self, data):
+        with self.commit_callbacks():
+            return self.client_for(self.buyer).post(f"/cards/{self.card.id}/buys/batch", data, format="json")
+
+    def test_sweeps_book_up_to_max_price(self):
+        other_seller = User.objects.create_user("other@test.com", "other", "password")
+        CardPossesionStatus.objects.create(user=other_seller, card=self.card, quantity=10)
+        self.sell(1000, quantity=2)
+        self.sell(1100, quantity=1, user=other_seller)
+        self.sell(1200, quantity=1)
+        self.sell(5000, quantity=1)
+        CardPossesionStatus.objects.create(user=self.buyer, card=self.card, quantity=0)
+        now = timezone.now()
+        CardCandle.objects.record(self.card.id, now, [(900, 1)])
+
+        # 선점 3 + 보유 수량 1 + 구매자 잔액 1 + 판매자 잔액 증감 기록 1 + 체결 원장 1 + 캔들 1 + savepoint 2
+        # + 판매 게시판 갱신 1
+        with self.assertNumQueries(11), unittest.mock.patch("django.utils.timezone.now", return_value=now):
+            response = self.batch_buy({"quantity": 10, "max_price": 1500})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row["price"] for row in response.json()], [1000, 1100, 1200])
+        self.assertEqual(CardPossesionStatus.objects.get(user=self.buyer, card=self.card).quantity, 4)
+        self.assertEqual(UserBalance.objects.get(user=self.buyer).balance, 100000 - (2000 + 1100 + 1200) * 6 // 5)
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), (2000 + 1200) * 6 // 5)
+        self.assertEqual(UserBalance.objects.balance_of(other_seller.id), 1100 * 6 // 5)
+        self.assertEqual([ask.price for ask in order_book.asks(self.card.id)], [5000])
+
+    def test_partially_fills_last_listing(self):
+        first = self.sell(1000, quantity=2)
+        second = self.sell(1100, quantity=3)
+
+        response = self.batch_buy({"quantity": 4, "max_price": 2000})
+
+        self.assertEqual(
+            [(row["id"], row["quantity"], row["state"]) for row in response.json()],
+            [(first["id"], 2, "selled"), (second["id"], 2, "selling")]
+        )
+        self.assertEqual(CardSellRegister.objects.get(id=second["id"]).remaining_quantity, 1)
+        self.assertEqual([(ask.id, ask.quantity) for ask in order_book.asks(self.card.id)], [(second["id"], 1)])
+
+    def test_rejects_invalid_input(self):
+        for data in (
+            {"quantity": 0, "max_price": 2000},
+            {"quantity": True, "max_price": 2000},
+            {"quantity": 1, "max_price": True},
+        ):
+            self.assertEqual(self.batch_buy(data).status_code, 422)
+
+
+class ConcurrentBuyTest(MarketTestMixin, TransactionTestCase):
+    buyers = 8
+
+    def test_parallel_buyers_never_double_sell(self):
+        listing = self.sell(1000)
+        buyers = [
+            User.objects.create_user(f"buyer{i}@test.com", f"buyer{i}", "password") for i in range(self.buyers)
+        ]
+        UserBalance.objects.filter(user__in=buyers).update(balance=100000)
+        order_book.best_asks()
+
+        barrier = threading.Barrier(self.buyers)
+        responses = []
+
+        def buy(user):
+            client = self.client_for(user)
+            client.raise_request_exception = False
+            barrier.wait()
+            try:
+                # SQLite 공유 메모리 DB는 동시 쓰기 시 잠금 오류(500)를 반환하므로 재시도
+                for _ in range(50):
+                    response = client.post(f"/cards/{self.card.id}/buys", format="json")
+                    if response.status_code != 500:
+                        break
+                    time.sleep(0.01)
+                responses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(responses), [201] + [422] * (self.buyers - 1))
+        self.assertEqual(Trade.objects.filter(card_sell_register_id=listing["id"]).count(), 1)
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 1200)
+        self.assertEqual(
+            sum(UserBalance.objects.filter(user__in=buyers).values_list("balance", flat=True)),
+            self.buyers * 100000 - 1200
+        )
+
+
+@override_settings(CARD_MATCHING={"MODE": "async", "SHARDS": 2})
+class AsyncMatchingTest(MarketTestMixin, TransactionTestCase):
+    def order(self, path, data, user=None):
+        client = self.client_for(user or self.seller)
+        response = client.post(f"/cards/{self.card.id}/{path}", data, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["state"], "pending")
+        return client.get(f"/cards/orders/{response.json()['orderId']}", {"wait": 10}).json()
+
+    def test_orders_are_matched_by_worker(self):
+        sell_order = self.order("sells", {"price": 1000, "quantity": 2})
+        buy_order = self.order("buys", {"quantity": 1}, user=self.buyer)
+
+        self.assertEqual((sell_order["state"], sell_order["statusCode"]), ("filled", 201))
+        self.assertEqual((buy_order["state"], buy_order["result"]["id"]), ("filled", sell_order["result"]["id"]))
+        self.assertEqual(CardSellRegister.objects.get(id=sell_order["result"]["id"]).remaining_quantity, 1)
+
+    def test_rejected_order_keeps_error(self):
+        buy_order = self.order("buys", {}, user=self.buyer)
+
+        self.assertEqual((buy_order["state"], buy_order["statusCode"]), ("rejected", 422))
+        self.assertEqual(buy_order["result"]["default_code"], "InvalidData")
+
+    def test_full_queue_rejects_order(self):
+        matching_engine.start()
+        with unittest.mock.patch.object(matching_engine._backend, "put", side_effect=queue.Full):
+            response = self.client_for(self.seller).post(
+                f"/cards/{self.card.id}/sells", {"price": 1000, "quantity": 1}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(CardOrder.objects.exists())
+
+    @override_settings(SQLITE_BUSY_RETRIES=2)
+    def test_busy_order_is_retried_once_per_attempt(self):
+        matching_engine.start()
+        order = CardOrder.objects.create(side="buy", user_id=self.buyer.id, card_id=self.card.id, params={})
+        busy = OperationalError("database is locked")
+
+        with unittest.mock.patch("cards.orders.order_book.asks", side_effect=busy) as asks, \
+                unittest.mock.patch("utilities.sqlite.time.sleep"):
+            with self.assertRaises(OperationalError):
+                matching_engine.process(order.id)
+
+        # 재시도는 retry_on_busy 한 곳에서만: 최초 1번 + SQLITE_BUSY_RETRIES번
+        self.assertEqual(asks.call_count, 3)
+        order.refresh_from_db()
+        self.assertEqual(order.state, "pending")
+
+    def test_orders_of_other_users_are_hidden(self):
+        sell_order = self.order("sells", {"price": 1000, "quantity": 1})
+
+        response = self.client_for(self.buyer).get(f"/cards/orders/{sell_order['orderId']}")
+
+        self.assertEqual(response.status_code, 404)
+
+
+class SeedMarketTest(TestCase):
+    def test_seed_market(self):
+        call_command(
+            "seed_market", cards=5, users=20, listings=300, sold_ratio=0.5, batch_size=64, seed=1,
+            stdout=io.StringIO()
+        )
+
+        self.assertEqual(Card.objects.count(), 5)
+        self.assertEqual(UserBalance.objects.filter(user__email__endswith="@seed.market").count(), 20)
+        self.assertEqual(CardSellRegister.objects.count(), 300)
+        sold = CardSellRegister.objects.filter(state="selled")
+        self.assertFalse(sold.exclude(remaining_quantity=0).exists())
+        self.assertEqual(Trade.objects.count(), sold.count())
+        # 판매중인 등록 정보의 판매자는 모두 카드를 보유
+        for card_id, user_id in CardSellRegister.objects.filter(state="selling").values_list("card_id", "user_id"):
+            self.assertTrue(CardPossesionStatus.objects.filter(card_id=card_id, user_id=user_id).exists())
@@ -1,15 +1,42 @@
+from django.conf import settings
 from django.urls import path
 
 from cards.views import (
     CardSellListView,
     CardSellCreateView,
+    CardSellCancelView,
+    CardSellRegisterListView,
     CardBuyCreateView,
-    CardSellHistoryListView
+    CardBatchBuyCreateView,
+    CardOrderDetailView,
+    CardSellHistoryListView,
+    CardCandleListView,
+    card_sell_list,
+    card_sell_history_list
 )
 
-urlpatterns = [
-    path("cards/sells", CardSellListView.as_view()),
+
+def read_urlpatterns(async_views):
+    """
+    판매 목록/판매 이력 조회 URL(async_views이면 ASGI용 async 뷰로 연결)
+    """
+    if async_views:
+        return [
+            path("cards/sells", card_sell_list),
+            path("cards/<int:card_id>/sells/histories", card_sell_history_list),
+        ]
+    return [
+        path("cards/sells", CardSellListView.as_view()),
+        path("cards/<int:card_id>/sells/histories", CardSellHistoryListView.as_view()),
+    ]
+
+
+urlpatterns = read_urlpatterns(settings.CARD_ASYNC_READ_VIEWS) + [
     path("cards/<int:card_id>/sells", CardSellCreateView.as_view()),
+    path("cards/<int:card_id>/sells/mine", CardSellRegisterListView.as_view()),
+    path("cards/<int:card_id>/sells/<int:card_sell_register_id>", CardSellCancelView.as_view()),
     path("cards/<int:card_id>/buys", CardBuyCreateView.as_view()),
-    path("cards/<int:card_id>/sells/histories", CardSellHistoryListView.as_view()),
+    path("cards/<int:card_id>/buys/batch", CardBatchBuyCreateView.as_view()),
+    path("cards/orders/<int:order_id>", CardOrderDetailView.as_view()),
+    path("cards/<int:card_id>/candles", CardCandleListView.as_view()),
 ]
@@ -1,62 +1,201 @@
-import math
-from datetime import datetime
+import datetime
 
-from django.db import (
-    transaction,
-    IntegrityError
-)
-from django.db.models import (
-    F,
-    OuterRef,
-    Q
-    )
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.http import parse_etags
 
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from cards import archive, orders, shards
+from cards.board import card_sell_board
+from cards.catalogue import card_catalogue
 from cards.exceptions import (
     NotAuthenticated,
+    NotExistData,
     InvalidData
 )
+from cards.idempotency import idempotency_store
+from cards.matching import matching_engine
+from cards.order_book import order_book
+from cards.pagination import (
+    PAGE_QUERY_PARAMS,
+    KeysetPaginator,
+    query_datetime,
+    query_int
+)
+from cards.candles import CANDLE_INTERVALS
 from cards.models import (
-    CardBuyHistory,
-    CardPossesionStatus,
-    CardSellHistory,
-    CardSellRegister
+    CardCandle,
+    CardOrder,
+    Trade
 )
 from cards.serializers import (
-    CardSellHistoryListSerializer,
-    CardSellRegisterListSerializer,
-    CardSellRegisterCreateSerializer
+    CardCandleListValues,
+    CardOrderSerializer,
+    CardSellRegisterHistoryValues,
+    TradeListValues
 )
-from users.models import UserBalance
+from users.authentication import StatelessJSONWebTokenAuthentication
+from utilities.renderers import FastJSONRenderer, render_json
+
+MAX_ORDER_WAIT_SECONDS = 30
+# 판매 등록 기간(ttl) 최대 30일
+MAX_LISTING_TTL_SECONDS = 30 * 24 * 60 * 60
+
+CARD_SELL_QUERY_PARAMS = ("card_id", "min_price", "max_price", *PAGE_QUERY_PARAMS)
+DEFAULT_CARD_SELL_PAGE_SIZE = 100
+DEFAULT_SELL_HISTORY_PAGE_SIZE = 5
+DEFAULT_SELL_REGISTER_PAGE_SIZE = 20
+DEFAULT_CANDLE_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def card_sell_board_response(request, etag, body):
+    """
+    If-None-Match가 현재 ETag와 같으면 본문 없이 304 응답
+    """
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(body, content_type="application/json", status=status.HTTP_200_OK)
+    response["ETag"] = etag
+    return response
+
+
+def api_exception_response(exc):
+    """
+    async 뷰용: DRF 예외 처리(utilities.exceptions.custom_exception_handler)와 같은 형태의 오류 응답
+    """
+    data = {"detail": exc.detail, "status_code": exc.status_code, "default_code": exc.default_code}
+    return HttpResponse(render_json(data), content_type="application/json", status=exc.status_code)
+
+
+def is_positive_int(value, maximum=None):
+    """
+    JSON 정수 입력 확인: bool은 int의 하위 클래스이므로(true == 1) 따로 제외한다.
+    """
+    return (
+        isinstance(value, int) and not isinstance(value, bool) and value > 0
+        and (maximum is None or value <= maximum)
+    )
+
+
+def card_sell_page(request):
+    """
+    조회 조건에 맞는 판매 등록을 가격-시간 우선순위로 한 페이지 조회해 (목록, Link 헤더 값)을 반환한다.
+    card_id가 있으면 해당 카드의 전체 호가, 없으면 카드별 최저가 호가를 주문장에서 읽는다.
+    """
+    paginator = KeysetPaginator(
+        request, (int, datetime.datetime, int), DEFAULT_CARD_SELL_PAGE_SIZE, MAX_PAGE_SIZE
+    )
+    card_id = query_int(request, "card_id")
+    min_price = query_int(request, "min_price", minimum=0)
+    max_price = query_int(request, "max_price", minimum=0)
+
+    if card_id is not None:
+        # 없는 카드 id로는 주문장을 만들지 않는다(요청마다 빈 주문장이 쌓이지 않도록)
+        if card_catalogue.exists(card_id):
+            asks = order_book.book_page(card_id, paginator.cursor, min_price, max_price, paginator.page_size + 1)
+        else:
+            asks = []
+    else:
+        asks = order_book.best_page(paginator.cursor, min_price, max_price, paginator.page_size + 1)
+    asks = paginator.paginate(asks, key=lambda ask: (ask.price, ask.created_at, ask.id))
+    return card_sell_board.rows(asks), paginator.link()
+
+
+def sell_history_page(request, card_id):
+    """
+    card_id의 판매 이력(체결 원장)을 최신순으로 한 페이지 조회해 (목록, Link 헤더 값)을 반환한다(기본 5개).
+    """
+    paginator = KeysetPaginator(
+        request, (datetime.datetime, int), DEFAULT_SELL_HISTORY_PAGE_SIZE, MAX_PAGE_SIZE
+    )
+    trades = Trade.objects.filter(card_id=card_id)
+
+    min_price = query_int(request, "min_price", minimum=0)
+    if min_price is not None:
+        trades = trades.filter(price__gte=min_price)
+    max_price = query_int(request, "max_price", minimum=0)
+    if max_price is not None:
+        trades = trades.filter(price__lte=max_price)
+    start_date = query_datetime(request, "start_date")
+    if start_date is not None:
+        trades = trades.filter(executed_at__gte=start_date)
+    end_date = query_datetime(request, "end_date", end=True)
+    if end_date is not None:
+        trades = trades.filter(executed_at__lt=end_date)
+
+    if paginator.cursor is not None:
+        executed_at, trade_id = paginator.cursor
+        trades = trades.filter(Q(executed_at__lt=executed_at) | Q(executed_at=executed_at, id__lt=trade_id))
+
+    with shards.card_shard(card_id):
+        rows = TradeListValues.rows(trades.order_by("-executed_at", "-id")[:paginator.page_size + 1])
+    rows = paginator.paginate(rows, key=lambda row: (row["createdAt"], row["id"]))
+    return rows, paginator.link()
+
+
+def page_response(rows, link):
+    response = HttpResponse(render_json(rows), content_type="application/json", status=status.HTTP_200_OK)
+    if link is not None:
+        response["Link"] = link
+    return response
 
 
 class CardSellListView(APIView):
     def get(self, request):
         """
-        1. sqlite3은 distinct on을 제공하지 않아 최소가격 및 수정일 기준 정렬 후 id를 가져옴
-        2. 해당 ID가 일치하는 CardSellRegister를 가져와서 데이터 제공
+        1. 주문장에서 카드별 최저가(가격-시간 우선순위) 판매 등록을 가져와 만든 응답을 캐시에서 조회
+        2. If-None-Match가 현재 ETag와 같으면 본문 없이 304 응답
+        3. 조회 조건(card_id, min_price, max_price)이나 페이지(cursor, page_size)가 있으면
+           가격-시간 우선순위로 한 페이지씩 응답(다음 페이지는 Link 헤더)
         """
+        if any(name in request.GET for name in CARD_SELL_QUERY_PARAMS):
+            return page_response(*card_sell_page(request))
+        return card_sell_board_response(request, *card_sell_board.get())
 
-        minumum_price_card_ids = CardSellRegister.objects.filter(
-            card_id=OuterRef("card_id"),
-            state="selling",
-            deleted_at__isnull=True
-        ).order_by("price", "-modified_at").values("id")[:1]
 
-        card_sell_registers = (
-            CardSellRegister.objects.filter(id__in=minumum_price_card_ids)
-            .select_related("card", "user")
-        )
-        data = CardSellRegisterListSerializer(card_sell_registers, many=True).data
-        return Response(data=data, status=status.HTTP_200_OK)
+async def card_sell_list(request):
+    """
+    CardSellListView의 async 버전(ASGI용): 캐시에 최신 판매 게시판이 있으면 주문장/DB를 읽지 않고 응답하고
+    (LocMemCache면 이벤트 루프에서 바로, 네트워크 캐시면 캐시 조회만 스레드에서), 없을 때만 스레드에서 주문장/DB를 읽는다.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+
+    if any(name in request.GET for name in CARD_SELL_QUERY_PARAMS):
+        try:
+            return page_response(*await sync_to_async(card_sell_page)(request))
+        except APIException as exc:
+            return api_exception_response(exc)
+
+    board = await card_sell_board.apeek() or await sync_to_async(card_sell_board.get)()
+    return card_sell_board_response(request, *board)
+
+
+def order_response(request, side, user_id, card_id, **params):
+    """
+    비동기 체결 모드이면 주문을 큐에 넣고 202(주문 정보)로, 아니면 요청 안에서 체결해 201로 응답
+    (Idempotency-Key 헤더가 있으면 같은 키로 다시 온 요청에는 처음 응답을 그대로 반환, cards.idempotency)
+    """
+    def execute():
+        if matching_engine.enabled:
+            order = matching_engine.submit(side, user_id, card_id, **params)
+            return Response(data=CardOrderSerializer(order).data, status=status.HTTP_202_ACCEPTED)
+
+        data = orders.EXECUTORS[side](user_id, card_id, **params)
+        return Response(data=data, status=status.HTTP_201_CREATED)
+
+    return idempotency_store.respond(request, user_id, [side, card_id, params], execute)
 
 
 class CardSellCreateView(APIView):
-    authentication_classes = (JSONWebTokenAuthentication,)
+    authentication_classes = (StatelessJSONWebTokenAuthentication,)
 
     def perform_authentication(self, request):
         if not self.request.user.is_authenticated:
@@ -67,120 +206,215 @@ class CardSellCreateView(APIView):
         card_id = self.kwargs.get("card_id")
         quantity = self.request.data.get("quantity")
         price = self.request.data.get("price")
-        fee = math.trunc(price * 0.2)
+        ttl = self.request.data.get("ttl")
 
-        try:
-            with transaction.atomic():
-                # 현재 보유정보를 가져온 후 판매할 수량을 차감
-                card_possesion_status = CardPossesionStatus.objects.get(
-                    card_id=card_id,
-                    user_id=user_id
-                )
-                card_possesion_status.quantity = F("quantity") - quantity
-                card_possesion_status.save()
-
-                # 판매 등록
-                card_sell_register = CardSellRegister.objects.create(
-                    card_id=card_id,
-                    price=price,
-                    fee=fee,
-                    quantity=quantity,
-                    user_id=user_id
-                )
-        except IntegrityError:
+        if not all(is_positive_int(value) for value in (quantity, price)):
             raise InvalidData(
                 **{
-                    "detail": "판매할 수량을 다시 확인해주세요",
+                    "detail": "판매할 수량과 가격을 다시 확인해주세요",
                     "code": "InvalidQuantity"
                 }
             )
-        except CardPossesionStatus.DoesNotExist:
+        if ttl is not None and not is_positive_int(ttl, MAX_LISTING_TTL_SECONDS):
             raise InvalidData(
                 **{
-                    "detail": "판매할 카드가 없습니다",
-                    "code": "InvalidCardId"
+                    "detail": f"판매 기간(ttl)은 1초 이상 {MAX_LISTING_TTL_SECONDS}초 이하여야 합니다",
+                    "code": "InvalidTTL"
                 }
             )
-        data = CardSellRegisterCreateSerializer(card_sell_register).data
-        return Response(data=data, status=status.HTTP_201_CREATED)
+        params = {"quantity": quantity, "price": price}
+        if ttl is not None:
+            params["ttl"] = ttl
+        return order_response(request, "sell", user_id, card_id, **params)
+
+
+class CardSellCancelView(APIView):
+    authentication_classes = (StatelessJSONWebTokenAuthentication,)
+
+    def perform_authentication(self, request):
+        if not self.request.user.is_authenticated:
+            raise NotAuthenticated()
+
+    def delete(self, request, *args, **kwargs):
+        """
+        판매중인 본인의 판매 등록을 취소(팔리지 않은 남은 수량은 보유 수량으로 돌아감, 체결 모드와 관계없이 바로 처리)
+        """
+        data = orders.cancel(
+            self.request.user.id, self.kwargs.get("card_id"), self.kwargs.get("card_sell_register_id")
+        )
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class CardSellRegisterListView(APIView):
+    authentication_classes = (StatelessJSONWebTokenAuthentication,)
+    renderer_classes = (FastJSONRenderer,)
+
+    def perform_authentication(self, request):
+        if not self.request.user.is_authenticated:
+            raise NotAuthenticated()
+
+    def get(self, request, *args, **kwargs):
+        """
+        card_id에 등록한 본인의 판매 등록을 등록 날짜 최신순으로 조회(기본 20개, 판매가 끝나 보관 테이블로 옮긴 등록 포함)
+        - 페이지: page_size, cursor(다음 페이지는 Link 헤더)
+        """
+        paginator = KeysetPaginator(
+            request, (datetime.datetime, int), DEFAULT_SELL_REGISTER_PAGE_SIZE, MAX_PAGE_SIZE
+        )
+        registers = archive.sell_registers(
+            self.kwargs.get("card_id"), self.request.user.id, paginator.cursor, paginator.page_size + 1
+        )
+        registers = paginator.paginate(registers, key=lambda row: (row["created_at"], row["id"]))
+        data = CardSellRegisterHistoryValues.dict_rows(registers)
+        link = paginator.link()
+        return Response(data=data, status=status.HTTP_200_OK, headers={"Link": link} if link else None)
 
 
 class CardBuyCreateView(APIView):
-    authentication_classes = (JSONWebTokenAuthentication,)
+    authentication_classes = (StatelessJSONWebTokenAuthentication,)
 
     def perform_authentication(self, request):
         if not self.request.user.is_authenticated:
             raise NotAuthenticated()
 
     def post(self, request, *args, **kwargs):
+        """
+        최저가 판매 정보에서 구매 수량(quantity)만큼 구매(없으면 남은 수량 전체, 남은 수량보다 많으면 남은 수량만큼)
+        """
         user_id = self.request.user.id
         card_id = self.kwargs.get("card_id")
+        quantity = self.request.data.get("quantity")
 
-        try:
-            with transaction.atomic():
-                # 최소 가격으로 등록된 판매 정보(단, 본인이 등록한 건 나오지 않음)
-                card_sell_register = CardSellRegister.objects.filter(
-                    Q(deleted_at__isnull=True) &
-                    Q(card_id=card_id) &
-                    Q(state="selling") &
-                    ~Q(user_id=user_id)
-                ).latest("-price")
-
-                # 타인이 거래 시도를 못 하게 상태 변경
-                card_sell_register.state = "trading"
-                card_sell_register.save()
-
-                # 구매자 액션: 현재 보유정보를 가져온 후 구매할 수량을 추가
-                card_possesion_status = CardPossesionStatus.objects.get(
-                    card_id=card_id,
-                    user_id=user_id
-                )
-                card_possesion_status.quantity = F("quantity") + card_sell_register.quantity
-                card_possesion_status.save()
-
-                # 구매자 액션: 금액 차감(가격+수수료 차감)
-                buyer_balance = UserBalance.objects.get(user_id=user_id)
-                buyer_balance.balance = F("balance") - card_sell_register.price - card_sell_register.fee
-                buyer_balance.save()
-
-                # 구매자 액션: 구매내역 등록
-                CardBuyHistory.objects.create(
-                    card_sell_register_id=card_sell_register.id,
-                    user_id=user_id
-                )
-
-                # 판매자 액션: 판매내역 등록
-                CardSellHistory.objects.create(
-                    card_sell_register_id=card_sell_register.id
-                )
-
-                # 판매자 액션: 판매 정보 업데이트
-                card_sell_register.state = "selled"
-                card_sell_register.selled_at = datetime.now()
-                card_sell_register.save()
-
-                # 판매자 액션: 금액 입금(가격+수수료 입금)
-                seller_balance = UserBalance.objects.get(user_id=card_sell_register.user_id)
-                seller_balance.balance = F("balance") + card_sell_register.price + card_sell_register.fee
-                seller_balance.save()
-        except IntegrityError:
+        if quantity is not None and not is_positive_int(quantity):
             raise InvalidData(
                 **{
-                    "detail": "구매 입력 데이터를 다시 확인해주세요",
+                    "detail": "구매할 수량을 다시 확인해주세요",
+                    "code": "InvalidQuantity"
+                }
+            )
+        return order_response(request, "buy", user_id, card_id, quantity=quantity)
+
+
+class CardBatchBuyCreateView(APIView):
+    authentication_classes = (StatelessJSONWebTokenAuthentication,)
+
+    def perform_authentication(self, request):
+        if not self.request.user.is_authenticated:
+            raise NotAuthenticated()
+
+    def post(self, request, *args, **kwargs):
+        """
+        최대 가격(max_price) 이하의 판매 정보를 최저가부터 체결해 구매 수량(quantity)을 채움
+        (마지막 판매 정보는 부분 체결, 채울 수 있는 만큼만 체결하며 하나의 트랜잭션에서 이력/잔액을 한 번에 반영)
+        """
+        user_id = self.request.user.id
+        card_id = self.kwargs.get("card_id")
+        quantity = self.request.data.get("quantity")
+        max_price = self.request.data.get("max_price")
+
+        if not all(is_positive_int(value) for value in (quantity, max_price)):
+            raise InvalidData(
+                **{
+                    "detail": "구매할 수량과 최대 가격을 다시 확인해주세요",
+                    "code": "InvalidQuantity"
+                }
+            )
+        return order_response(request, "batch_buy", user_id, card_id, quantity=quantity, max_price=max_price)
+
+
+class CardOrderDetailView(APIView):
+    authentication_classes = (StatelessJSONWebTokenAuthentication,)
+
+    def perform_authentication(self, request):
+        if not self.request.user.is_authenticated:
+            raise NotAuthenticated()
+
+    def get(self, request, *args, **kwargs):
+        """
+        비동기 체결 모드에서 접수한 주문의 처리 결과 조회(wait 초만큼 처리를 기다리는 long-poll, 최대 30초)
+        """
+        try:
+            order = CardOrder.objects.get(id=self.kwargs.get("order_id"), user_id=self.request.user.id)
+        except CardOrder.DoesNotExist:
+            raise NotExistData(
+                **{
+                    "detail": "존재하지 않는 주문입니다.",
+                    "code": "NotExistOrder",
                 }
             )
-        data = CardSellRegisterCreateSerializer(card_sell_register).data
-        return Response(data=data, status=status.HTTP_201_CREATED)
+
+        try:
+            wait = min(float(self.request.query_params.get("wait", 0)), MAX_ORDER_WAIT_SECONDS)
+        except ValueError:
+            wait = 0
+        if wait > 0:
+            order = matching_engine.wait(order, wait)
+
+        data = CardOrderSerializer(order).data
+        return Response(data=data, status=status.HTTP_200_OK)
 
 
 class CardSellHistoryListView(APIView):
+    renderer_classes = (FastJSONRenderer,)
+
     def get(self, request, *args, **kwargs):
+        """
+        card_id의 판매 이력을 최신순으로 조회(기본 5개)
+        - 조회 조건: min_price, max_price, start_date, end_date(YYYY-MM-DD 또는 ISO 8601)
+        - 페이지: page_size, cursor(다음 페이지는 Link 헤더)
+        """
         card_id = self.kwargs.get("card_id")
 
-        # card_id의 최근 거래가를 5개 조회
-        card_sell_histories = CardSellHistory.objects.filter(
-            card_sell_register__card_id=card_id
-        ).select_related("card_sell_register__card").order_by("-created_at")[:5]
+        data, link = sell_history_page(request, card_id)
+        return Response(data=data, status=status.HTTP_200_OK, headers={"Link": link} if link else None)
 
-        data = CardSellHistoryListSerializer(card_sell_histories, many=True).data
-        return Response(data=data, status=status.HTTP_200_OK)
+
+async def card_sell_history_list(request, card_id):
+    """
+    CardSellHistoryListView의 async 버전(ASGI용): DB 연결은 조회하는 동안에만 스레드에서 사용한다.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+
+    try:
+        return page_response(*await sync_to_async(sell_history_page)(request, card_id))
+    except APIException as exc:
+        return api_exception_response(exc)
+
+
+class CardCandleListView(APIView):
+    renderer_classes = (FastJSONRenderer,)
+
+    def get(self, request, *args, **kwargs):
+        """
+        card_id의 체결가 캔들을 최신 구간부터 조회(기본 100개, 집계 테이블만 읽음)
+        - interval: 1m(기본), 1h, 1d
+        - 조회 조건: start_date, end_date(YYYY-MM-DD 또는 ISO 8601, 구간 시작 시각 기준)
+        - 페이지: page_size, cursor(다음 페이지는 Link 헤더)
+        """
+        card_id = self.kwargs.get("card_id")
+        interval = request.GET.get("interval", "1m")
+        if interval not in CANDLE_INTERVALS:
+            raise InvalidData(
+                **{
+                    "detail": f"interval은 {', '.join(CANDLE_INTERVALS)} 중 하나여야 합니다",
+                    "code": "InvalidQuery"
+                }
+            )
+
+        paginator = KeysetPaginator(request, (datetime.datetime,), DEFAULT_CANDLE_PAGE_SIZE, MAX_PAGE_SIZE)
+        candles = CardCandle.objects.filter(card_id=card_id, interval=interval)
+        start_date = query_datetime(request, "start_date")
+        if start_date is not None:
+            candles = candles.filter(started_at__gte=start_date)
+        end_date = query_datetime(request, "end_date", end=True)
+        if end_date is not None:
+            candles = candles.filter(started_at__lt=end_date)
+        if paginator.cursor is not None:
+            candles = candles.filter(started_at__lt=paginator.cursor[0])
+
+        with shards.card_shard(card_id):
+            rows = CardCandleListValues.rows(candles.order_by("-started_at")[:paginator.page_size + 1])
+        data = paginator.paginate(rows, key=lambda row: (row["startedAt"],))
+        link = paginator.link()
+        return Response(data=data, status=status.HTTP_200_OK, headers={"Link": link} if link else None)
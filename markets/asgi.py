@@ -5,6 +5,20 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+ASGI로 실행하면 판매 목록/판매 이력 조회가 async 뷰로 연결된다(DJANGO_ASYNC_READ_VIEWS).
+판매 목록을 주기적으로 조회(ETag/304)하는 클라이언트가 많은 경우를 기준으로 한 실행 예시:
+
+    uvicorn markets.asgi:application --workers 4 --loop uvloop --http httptools \\
+        --backlog 4096 --limit-concurrency 10000 --timeout-keep-alive 30 --no-access-log
+
+- 판매 목록은 캐시에 최신 판매 게시판이 있으면 Django를 거치지 않고 이벤트 루프에서 바로 응답하므로
+  (cards.asgi.CardSellBoardFastPath) 연결 수가 늘어도 스레드와 DB 연결이 늘지 않는다.
+- 쓰기 API(DRF APIView)와 DB 조회는 스레드(sync_to_async)에서 처리되므로 워커당 DB 연결은 1개다.
+- 여러 워커로 실행할 때는 주문장/판매 게시판이 공유하도록 DJANGO_CACHE_BACKEND를 공유 캐시로 지정한다.
+- GET /cards/<card_id>/stream(Server-Sent Events)으로 최저가 호가와 체결을 구독할 수 있다(cards.asgi.CardMarketStream).
+  발행은 프로세스 안에서만 전달되므로 여러 워커로 실행하면 같은 워커에서 처리한 판매/구매만 전달된다.
+- DJANGO_REQUEST_METRICS를 켜면 측정 미들웨어가 sync 전용이므로 요청마다 스레드 전환이 생긴다.
 """
 
 import os
@@ -12,5 +26,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'markets.settings')
+os.environ.setdefault('DJANGO_BALANCE_COMPACTION_INTERVAL', '5')
+os.environ.setdefault('DJANGO_LISTING_SWEEP_INTERVAL', '30')
+os.environ.setdefault('DJANGO_ASYNC_READ_VIEWS', 'true')
+
+django_application = get_asgi_application()
+
+from cards.asgi import CardMarketStream, CardSellBoardFastPath  # noqa: E402 (django.setup() 이후 import)
 
-application = get_asgi_application()
+application = CardSellBoardFastPath(CardMarketStream(django_application))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 import environ
 from datetime import timedelta
@@ -49,11 +50,13 @@ INSTALLED_APPS = [
     'django_extensions',
     'rest_framework',
     'rest_framework.authtoken',
+    'utilities',
     'users',
     'cards'
 ]
 
 MIDDLEWARE = [
+    'utilities.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,10 +93,124 @@ WSGI_APPLICATION = 'markets.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': env('DJANGO_DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        # 요청마다 연결을 새로 열지 않고 재사용할 시간(초, 연결 생성 시 PRAGMA 적용 비용도 줄어듦)
+        'CONN_MAX_AGE': env.int('DJANGO_CONN_MAX_AGE', default=60),
     }
 }
 
+# SQLite 연결마다 적용하는 PRAGMA(utilities.sqlite). DJANGO_SQLITE_TUNING=false이면 SQLite 기본값을 사용한다.
+# - journal_mode=wal: 읽기와 쓰기가 서로 막지 않음, synchronous=normal: WAL에서는 커밋마다 fsync하지 않음
+# - busy_timeout(ms): 잠금을 기다리는 시간, cache_size(음수는 KiB)/mmap_size(bytes): 연결별 페이지 캐시/메모리 맵
+SQLITE_TUNING = env.bool('DJANGO_SQLITE_TUNING', default=True)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': env.int('DJANGO_SQLITE_BUSY_TIMEOUT', default=5000),
+    'synchronous': 'normal',
+    'cache_size': env.int('DJANGO_SQLITE_CACHE_SIZE', default=-65536),
+    'mmap_size': env.int('DJANGO_SQLITE_MMAP_SIZE', default=256 * 1024 * 1024),
+} if SQLITE_TUNING else {}
+# 체결 트랜잭션이 잠금 오류로 실패하면 다시 실행할 횟수(cards.orders)
+SQLITE_BUSY_RETRIES = env.int('DJANGO_SQLITE_BUSY_RETRIES', default=5) if SQLITE_TUNING else 0
+
+# 카드 시장 테이블을 card_id % CARD_SHARD_COUNT 번째 DB에 나눠 저장(cards.shards, 0번 샤드는 default).
+# 샤드 DB 파일은 default DB 파일 옆에 db.shard1.sqlite3 형태로 만든다(migrate --database card_shard_1 ...).
+# 체결마다 주 DB의 잔액도 갱신하므로 서로 다른 샤드의 체결도 주 DB에서 하나씩 커밋된다(한계는 cards.shards 참고).
+CARD_SHARD_COUNT = env.int('DJANGO_CARD_SHARDS', default=1)
+if CARD_SHARD_COUNT > 1:
+    _default_database = Path(DATABASES['default']['NAME'])
+    for _index in range(1, CARD_SHARD_COUNT):
+        DATABASES[f'card_shard_{_index}'] = {
+            **DATABASES['default'],
+            'NAME': str(_default_database.with_name(f'{_default_database.stem}.shard{_index}{_default_database.suffix}')),
+        }
+    DATABASE_ROUTERS = ['cards.shards.CardShardRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 여러 프로세스로 운영할 경우 주문장/판매 게시판이 공유할 수 있도록 redis 등 공유 캐시로 변경한다.
+
+CACHES = {
+    'default': {
+        'BACKEND': env('DJANGO_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('DJANGO_CACHE_LOCATION', default='markets'),
+    }
+}
+
+
+# Card matching
+# sync: 요청 안에서 체결, async: 주문을 큐에 넣고 카드 샤드별 워커가 순서대로 체결(주문 id로 결과 조회)
+
+CARD_MATCHING = {
+    'MODE': env('CARD_MATCHING_MODE', default='sync'),
+    'BACKEND': 'cards.matching.InProcessQueueBackend',
+    'SHARDS': env.int('CARD_MATCHING_SHARDS', default=4),
+    'QUEUE_SIZE': env.int('CARD_MATCHING_QUEUE_SIZE', default=1000),
+}
+
+
+# Listing sweeper
+# 0보다 크면 이 간격(초)마다 만료된 판매 등록을 판매만료 처리하고, 판매가 끝난 등록을 월별 보관 테이블로
+# 옮긴다(cards.listings, cards.archive). 0이면 sweep_listings 명령어(cron 등)로 실행한다.
+
+LISTING_SWEEP_INTERVAL = env.int('DJANGO_LISTING_SWEEP_INTERVAL', default=0)
+
+
+# Idempotency keys
+# Idempotency-Key 헤더가 있는 판매/구매 요청의 응답 보관 기간(초)과 프로세스별 메모리(LRU)에 둘 응답 수
+# (cards.idempotency). 보관 기간이 지난 키는 prune_idempotency_keys 명령어(cron 등)로 지운다.
+
+IDEMPOTENCY = {
+    'TTL': env.int('DJANGO_IDEMPOTENCY_TTL', default=24 * 60 * 60),
+    'CACHE_SIZE': env.int('DJANGO_IDEMPOTENCY_CACHE_SIZE', default=10000),
+}
+
+
+# Card market stream
+# GET /cards/<card_id>/stream(ASGI)의 구독자별 체결 버퍼 크기와 연결 유지 주석 간격(초)(cards.streams)
+
+CARD_STREAM = {
+    'BUFFER_SIZE': env.int('DJANGO_CARD_STREAM_BUFFER_SIZE', default=100),
+    'KEEPALIVE': env.int('DJANGO_CARD_STREAM_KEEPALIVE', default=15),
+}
+
+
+# Async read views
+# True이면 판매 목록/판매 이력 조회를 async 뷰로 제공한다(ASGI로 실행할 때 사용, markets/asgi.py 참고).
+
+CARD_ASYNC_READ_VIEWS = env.bool('DJANGO_ASYNC_READ_VIEWS', default=False)
+
+
+# Request metrics
+# True이면 요청별 쿼리 수/DB 시간/직렬화 시간/뷰 시간을 Server-Timing 헤더와 /metrics(Prometheus)로 제공한다.
+
+REQUEST_METRICS = env.bool('DJANGO_REQUEST_METRICS', default=False)
+
+
+# 비밀번호 해시(users.hashers): 새 비밀번호는 PASSWORD_HASHING['ALGORITHM']로 해시하고, 저장된 해시가 다르면
+# 로그인할 때 다시 해시한다. 해시 확인은 WORKERS개 스레드에서 실행하며 대기 작업이 QUEUE_SIZE개를 넘으면 503
+PASSWORD_HASHING = {
+    'ALGORITHM': env('DJANGO_PASSWORD_HASHER', default='pbkdf2'),  # argon2, bcrypt, pbkdf2
+    'PBKDF2_ITERATIONS': env.int('DJANGO_PBKDF2_ITERATIONS', default=260000),
+    'ARGON2_TIME_COST': env.int('DJANGO_ARGON2_TIME_COST', default=2),
+    'ARGON2_MEMORY_COST': env.int('DJANGO_ARGON2_MEMORY_COST', default=102400),  # KiB
+    'BCRYPT_ROUNDS': env.int('DJANGO_BCRYPT_ROUNDS', default=12),
+    'WORKERS': env.int('DJANGO_PASSWORD_HASH_WORKERS', default=max(1, (os.cpu_count() or 2) // 2)),
+    'QUEUE_SIZE': env.int('DJANGO_PASSWORD_HASH_QUEUE_SIZE', default=64),
+}
+
+# argon2/bcrypt는 패키지(argon2-cffi, bcrypt)가 설치된 경우에만 사용
+_PASSWORD_HASHERS = {
+    'argon2': ('argon2', 'users.hashers.TunedArgon2PasswordHasher'),
+    'bcrypt': ('bcrypt', 'users.hashers.TunedBCryptSHA256PasswordHasher'),
+    'pbkdf2': ('hashlib', 'users.hashers.TunedPBKDF2PasswordHasher'),
+}
+PASSWORD_HASHERS = [
+    hasher for name, (module, hasher) in sorted(
+        _PASSWORD_HASHERS.items(), key=lambda item: item[0] != PASSWORD_HASHING['ALGORITHM']
+    ) if find_spec(module)
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -140,7 +257,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJSONWebTokenAuthentication',
     ),
     'EXCEPTION_HANDLER': 'utilities.exceptions.custom_exception_handler'
 }
@@ -150,4 +267,13 @@ JWT_AUTH = {
     'JWT_ALGORITHM': 'HS256',  # 암호화 알고리즘
     'JWT_ALLOW_REFRESH': True,  # refresh 사용 여부
     'JWT_EXPIRATION_DELTA': timedelta(days=30),  # 유효기간 설정
-}
\ No newline at end of file
+    'JWT_PAYLOAD_HANDLER': 'users.authentication.jwt_payload_handler',  # 토큰에 닉네임 포함
+}
+
+# 판매 대금 잔액 증감 기록을 잔액에 합산하는 주기(초, users.balances). 0이면 compact_balances 명령어로만 합산하며,
+# WSGI/ASGI 서버로 실행하면 기본 5초(markets/wsgi.py, markets/asgi.py)
+BALANCE_COMPACTION_INTERVAL = env.int('DJANGO_BALANCE_COMPACTION_INTERVAL', default=0)
+
+# 토큰 사용자의 존재 여부 확인 주기(초, 0이면 확인하지 않음)와 프로세스별 캐시 크기(users.authentication)
+JWT_REVOCATION_CHECK_TTL = env.int('DJANGO_JWT_REVOCATION_CHECK_TTL', default=0)
+JWT_REVOCATION_CACHE_SIZE = 1024
\ No newline at end of file
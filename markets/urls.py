@@ -16,7 +16,9 @@ Including another URLconf
 """
 from users.urls import urlpatterns as users_urlpatterns
 from cards.urls import urlpatterns as cards_urlpatterns
+from utilities.urls import urlpatterns as utilities_urlpatterns
 
 urlpatterns = []
 urlpatterns += users_urlpatterns
 urlpatterns += cards_urlpatterns
+urlpatterns += utilities_urlpatterns
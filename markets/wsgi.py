@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'markets.settings')
+os.environ.setdefault('DJANGO_BALANCE_COMPACTION_INTERVAL', '5')
+os.environ.setdefault('DJANGO_LISTING_SWEEP_INTERVAL', '30')
 
 application = get_wsgi_application()
@@ -0,0 +1,111 @@
+"""
+요청마다 사용자 테이블을 조회하지 않는 JWT 인증입니다.
+
+rest_framework_jwt의 JSONWebTokenAuthentication은 서명을 확인한 뒤 토큰의 이메일로 User를 조회하지만, 판매/구매
+뷰는 사용자 id만 사용한다. 로그인 때 발급하는 토큰에 id와 닉네임을 담아 두고, 서명이 유효하면 토큰의 값으로
+TokenUser를 만들어 DB 조회 없이 인증한다.
+
+- 탈퇴(삭제)한 사용자의 토큰은 만료 전까지 유효하다. settings.JWT_REVOCATION_CHECK_TTL(초)을 설정하면 사용자가
+  존재하는지 확인하고 그 결과를 프로세스 안에서 TTL 동안 캐시해(최대 JWT_REVOCATION_CACHE_SIZE명, LRU),
+  사용자별로 TTL마다 한 번만 조회한다.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from rest_framework_jwt.utils import jwt_payload_handler as default_jwt_payload_handler
+
+from users.models import User
+
+
+def jwt_payload_handler(user):
+    """
+    JWT_AUTH의 JWT_PAYLOAD_HANDLER: 기본 클레임(user_id, email, exp 등)에 닉네임을 더한다.
+    """
+    payload = default_jwt_payload_handler(user)
+    payload["nickname"] = user.nickname
+    return payload
+
+
+class TokenUser:
+    """
+    토큰의 클레임으로 만든 인증 사용자(DB 행이 아니므로 id/닉네임 외의 정보는 없음)
+    """
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+    is_superuser = False
+
+    def __init__(self, payload):
+        self.id = self.pk = payload["user_id"]
+        self.email = payload.get("email")
+        self.nickname = payload.get("nickname")
+
+    def __str__(self):
+        return self.email or str(self.id)
+
+
+class RevocationCache:
+    """
+    사용자 존재 여부를 TTL 동안 보관하는 LRU 캐시(프로세스 단위)
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_revoked(self, user_id, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        revoked = not User.objects.filter(id=user_id).exists()
+        with self._lock:
+            self._entries[user_id] = (now + ttl, revoked)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return revoked
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+revocation_cache = RevocationCache(getattr(settings, "JWT_REVOCATION_CACHE_SIZE", 1024))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    # 이 프로세스에서는 TTL을 기다리지 않고 바로 거부(다른 프로세스는 TTL 이내에 반영)
+    revocation_cache.discard(instance.id)
+
+
+class StatelessJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """
+    서명과 만료 시각만 확인하고 토큰의 클레임을 신뢰하는 JWT 인증(Authorization: JWT <token>)
+    """
+
+    def authenticate_credentials(self, payload):
+        if not isinstance(payload.get("user_id"), int):
+            raise exceptions.AuthenticationFailed(_("Invalid payload."))
+
+        ttl = getattr(settings, "JWT_REVOCATION_CHECK_TTL", 0)
+        if ttl and revocation_cache.is_revoked(payload["user_id"], ttl):
+            raise exceptions.AuthenticationFailed(_("Invalid signature."))
+        return TokenUser(payload)
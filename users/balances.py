@@ -0,0 +1,78 @@
+"""
+잔액 증감 기록(BalanceDelta)을 잔액 스냅숏(UserBalance)에 합산하는 작업입니다.
+
+체결은 판매자의 잔액 행을 갱신하지 않고 증감 기록만 추가하므로(cards.settlement), 기록이 계속 쌓이지 않도록
+compact_balances 명령어(cron 등)나 프로세스 안의 BalanceCompactor 스레드로 주기적으로 합산한다.
+settings.BALANCE_COMPACTION_INTERVAL(초)이 0보다 크면 첫 체결 때 BalanceCompactor를 시작한다.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from users.models import BalanceDelta, UserBalance
+
+logger = logging.getLogger(__name__)
+
+
+def compact_balances(batch_size=500):
+    """
+    증감 기록이 있는 사용자를 batch_size명씩 나눠 각각 트랜잭션 하나로 합산하고, 합산한 기록 수를 반환한다.
+    """
+    compacted = 0
+    last_user_id = 0
+    while True:
+        user_ids = list(
+            BalanceDelta.objects.filter(user_id__gt=last_user_id).order_by("user_id")
+            .values_list("user_id", flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            return compacted
+        with transaction.atomic():
+            compacted += UserBalance.objects.compact(user_ids)
+        last_user_id = user_ids[-1]
+
+
+class BalanceCompactor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return getattr(settings, "BALANCE_COMPACTION_INTERVAL", 0)
+
+    def start(self):
+        """
+        BALANCE_COMPACTION_INTERVAL마다 합산하는 데몬 스레드를 시작한다(처음 한 번만, 설정이 0이면 시작하지 않음).
+        """
+        if self._thread is not None or self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._work, name="balance-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _work(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                compact_balances()
+            except DatabaseError:
+                # 잠금 충돌 등은 다음 주기에 다시 합산
+                logger.exception("balance compaction failed")
+            finally:
+                close_old_connections()
+
+
+balance_compactor = BalanceCompactor()
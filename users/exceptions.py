@@ -11,3 +11,9 @@ class InvalidData(exceptions.APIException):
     status_code = 422
     default_detail = "잘못된 데이터입니다."
     default_code = "InvalidData"
+
+
+class LoginThrottled(exceptions.APIException):
+    status_code = 503
+    default_detail = "로그인 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+    default_code = "LoginThrottled"
@@ -0,0 +1,129 @@
+"""
+로그인 비밀번호 해시 설정과 해시 작업 실행기입니다.
+
+- 사용할 해시(argon2/bcrypt/pbkdf2)와 비용은 settings.PASSWORD_HASHING으로 정하며, markets/settings.py가
+  PASSWORD_HASHERS의 첫 번째(새 비밀번호에 사용)로 둔다. argon2/bcrypt는 패키지가 설치된 경우에만 사용한다.
+- 저장된 해시의 종류나 비용이 현재 설정과 다르면 로그인에 성공할 때 현재 설정으로 다시 해시해 저장한다.
+- 해시 확인은 프로세스별 스레드 풀(WORKERS개)에서 실행하고 대기 작업은 QUEUE_SIZE개까지만 받는다.
+  배포 직후처럼 로그인이 몰려도 해시 계산이 요청 스레드의 CPU를 모두 차지하지 않으며, 대기열이 가득 차면
+  LoginThrottled(503)로 바로 거절한다(hashlib.pbkdf2_hmac, argon2, bcrypt는 계산 중 GIL을 놓는다).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password
+)
+
+from users.exceptions import LoginThrottled
+
+DEFAULT_PASSWORD_HASHING = {
+    "ALGORITHM": "pbkdf2",
+    "PBKDF2_ITERATIONS": PBKDF2PasswordHasher.iterations,
+    "ARGON2_TIME_COST": Argon2PasswordHasher.time_cost,
+    "ARGON2_MEMORY_COST": Argon2PasswordHasher.memory_cost,
+    "ARGON2_PARALLELISM": Argon2PasswordHasher.parallelism,
+    "BCRYPT_ROUNDS": BCryptSHA256PasswordHasher.rounds,
+    "WORKERS": max(1, (os.cpu_count() or 2) // 2),
+    "QUEUE_SIZE": 64,
+    "TIMEOUT": 10,
+}
+
+
+def password_hashing_settings():
+    return {**DEFAULT_PASSWORD_HASHING, **getattr(settings, "PASSWORD_HASHING", {})}
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return password_hashing_settings()["PBKDF2_ITERATIONS"]
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return password_hashing_settings()["ARGON2_TIME_COST"]
+
+    @property
+    def memory_cost(self):
+        return password_hashing_settings()["ARGON2_MEMORY_COST"]
+
+    @property
+    def parallelism(self):
+        return password_hashing_settings()["ARGON2_PARALLELISM"]
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return password_hashing_settings()["BCRYPT_ROUNDS"]
+
+
+def verify_password(password, encoded):
+    """
+    비밀번호를 확인해 (일치 여부, 다시 저장할 해시 또는 None)을 반환한다.
+    저장된 해시가 현재 설정(해시 종류, 비용)과 다르면 새 해시도 계산한다.
+    """
+    if not check_password(password, encoded):
+        return False, None
+    preferred = get_hasher()
+    hasher = identify_hasher(encoded)
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        return True, make_password(password)
+    return True, None
+
+
+class PasswordHashExecutor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def start(self):
+        """
+        스레드 풀과 작업 슬롯(실행 중 + 대기)을 만든다(처음 한 번만).
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+            hashing_settings = password_hashing_settings()
+            self._timeout = hashing_settings["TIMEOUT"]
+            self._slots = threading.BoundedSemaphore(hashing_settings["WORKERS"] + hashing_settings["QUEUE_SIZE"])
+            self._executor = ThreadPoolExecutor(
+                max_workers=hashing_settings["WORKERS"], thread_name_prefix="password-hash"
+            )
+
+    def verify(self, password, encoded):
+        """
+        스레드 풀에서 verify_password를 실행하고 결과를 기다린다. 빈 슬롯이 없거나 TIMEOUT을 넘기면 LoginThrottled.
+        """
+        self.start()
+        if not self._slots.acquire(blocking=False):
+            raise LoginThrottled()
+        try:
+            future = self._executor.submit(verify_password, password, encoded)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except TimeoutError:
+            raise LoginThrottled()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+password_hash_executor = PasswordHashExecutor()
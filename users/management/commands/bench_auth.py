@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from rest_auth.utils import jwt_encode
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+
+from cards.management.commands.seed_market import seed_users
+from users.authentication import StatelessJSONWebTokenAuthentication, revocation_cache
+from utilities.benchmark import format_summary, measure
+
+
+class Command(BaseCommand):
+    help = (
+        "판매/구매 요청의 JWT 인증 시간을 비교합니다: 요청마다 사용자를 조회하는 JSONWebTokenAuthentication, "
+        "토큰의 클레임만 사용하는 StatelessJSONWebTokenAuthentication, 그리고 사용자 존재 여부 확인(TTL 캐시)을 켠 경우"
+        "(seed_market 사용자 사용)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100, help="토큰을 발급할 사용자 수")
+        parser.add_argument("--repeat", type=int, default=10000, help="방식별 인증 횟수")
+        parser.add_argument("--ttl", type=int, default=60, help="사용자 존재 여부 확인 캐시 TTL(초)")
+
+    def handle(self, *args, **options):
+        users = list(seed_users().order_by("id")[:options["users"]])
+        if not users:
+            raise CommandError("no users: run `manage.py seed_market` first")
+
+        factory = RequestFactory()
+        requests = [factory.post("/", HTTP_AUTHORIZATION=f"JWT {jwt_encode(user)}") for user in users]
+        cases = (
+            ("JSONWebTokenAuthentication", JSONWebTokenAuthentication(), {}),
+            ("stateless", StatelessJSONWebTokenAuthentication(), {}),
+            (f"stateless + revocation ttl={options['ttl']}s", StatelessJSONWebTokenAuthentication(),
+             {"JWT_REVOCATION_CHECK_TTL": options["ttl"]}),
+        )
+
+        for label, authentication, overrides in cases:
+            revocation_cache.clear()
+            position = iter(range(options["repeat"]))
+
+            def authenticate():
+                authentication.authenticate(requests[next(position) % len(requests)])
+
+            queries = []
+            with override_settings(**overrides), connection.execute_wrapper(
+                lambda execute, sql, params, many, context: queries.append(sql) or execute(sql, params, many, context)
+            ):
+                samples = measure(authenticate, options["repeat"])
+            self.stdout.write(
+                f"{format_summary(label, samples)} queries/request={len(queries) / options['repeat']:.3f}"
+            )
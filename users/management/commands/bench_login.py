@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from users.hashers import password_hash_executor, password_hashing_settings, verify_password
+from users.models import User
+from utilities.benchmark import format_summary, measure
+
+PASSWORD = "bench-login-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "비밀번호 해시 설정별 로그인 처리량을 측정합니다: 해시 확인 한 번의 시간(코어 하나의 초당 로그인 수)과, "
+        "여러 스레드가 동시에 POST /users/login을 요청할 때의 처리량/응답 시간/503(대기열 초과) 수."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, nargs="+", default=[260000, 100000],
+            help="비교할 PBKDF2 반복 횟수(argon2/bcrypt는 설정된 비용으로 측정)"
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="해시 확인 반복 횟수")
+        parser.add_argument("--threads", type=int, default=32, help="동시 로그인 스레드 수")
+        parser.add_argument("--logins", type=int, default=10, help="스레드별 로그인 횟수")
+
+    def handle(self, *args, **options):
+        configs = [("pbkdf2", {"ALGORITHM": "pbkdf2", "PBKDF2_ITERATIONS": value}) for value in options["iterations"]]
+        configs += [(name, {"ALGORITHM": name}) for name in ("argon2", "bcrypt") if self.available(name)]
+
+        user = User.objects.filter(email="bench-login@bench.com").first()
+        if user is None:
+            user = User.objects.create_user("bench-login@bench.com", "bench-login", PASSWORD)
+
+        for name, overrides in configs:
+            hashing = {**password_hashing_settings(), **overrides}
+            hasher = {
+                "argon2": "users.hashers.TunedArgon2PasswordHasher",
+                "bcrypt": "users.hashers.TunedBCryptSHA256PasswordHasher",
+                "pbkdf2": "users.hashers.TunedPBKDF2PasswordHasher",
+            }[name]
+            with override_settings(PASSWORD_HASHING=hashing, PASSWORD_HASHERS=[hasher]):
+                label = f"{name} {overrides.get('PBKDF2_ITERATIONS', '')}".strip()
+                encoded = make_password(PASSWORD)
+                User.objects.filter(id=user.id).update(password=encoded)
+
+                samples = measure(lambda: verify_password(PASSWORD, encoded), options["repeat"])
+                self.stdout.write(format_summary(f"{label}: verify (1 core)", samples))
+
+                password_hash_executor.shutdown()
+                samples, statuses, elapsed = self.login_storm(options)
+                self.stdout.write(format_summary(
+                    f"{label}: login x {options['threads']} threads", samples, elapsed
+                ))
+                self.stdout.write(
+                    f"{'':<40} workers: {hashing['WORKERS']} status: {dict(statuses)} "
+                    f"logins/s per worker: {statuses[200] / elapsed / hashing['WORKERS']:.1f}"
+                )
+        password_hash_executor.shutdown()
+
+    @staticmethod
+    def available(name):
+        try:
+            __import__("argon2" if name == "argon2" else "bcrypt")
+        except ImportError:
+            return False
+        return True
+
+    def login_storm(self, options):
+        samples, statuses = [], Counter()
+        lock = threading.Lock()
+
+        def login():
+            client = APIClient(SERVER_NAME="localhost")
+            try:
+                for _ in range(options["logins"]):
+                    started_at = time.perf_counter()
+                    response = client.post(
+                        "/users/login", {"email": "bench-login@bench.com", "password": PASSWORD}, format="json"
+                    )
+                    with lock:
+                        samples.append(time.perf_counter() - started_at)
+                        statuses[response.status_code] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=login) for _ in range(options["threads"])]
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, statuses, time.perf_counter() - started_at
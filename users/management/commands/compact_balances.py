@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.balances import compact_balances
+
+
+class Command(BaseCommand):
+    help = "잔액 증감 기록(BalanceDelta)을 사용자별 잔액(UserBalance)에 합산하고 지웁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="트랜잭션 하나에서 합산할 사용자 수")
+
+    def handle(self, *args, **options):
+        compacted = compact_balances(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"compacted {compacted} balance deltas"))
@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 20:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_alter_userbalance_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(verbose_name='증감액')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 날짜')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='사용자')),
+            ],
+            options={
+                'verbose_name_plural': '사용자 잔액 증감 기록',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='balancedelta',
+            index=models.Index(fields=['user', 'id'], name='users_balancedelta_user_idx'),
+        ),
+    ]
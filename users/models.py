@@ -1,10 +1,12 @@
+from collections import defaultdict
+
 from django.db import (
     models,
     transaction,
     IntegrityError
 )
+from django.db.models import Case, F, Sum, When
 
-from cards.models import Card, CardPossesionStatus
 from utilities.models import TimeStampedModel
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -32,16 +34,10 @@ class UserManager(BaseUserManager):
                 user.save(using=self._db)
 
                 """
-                사용자가 생성되면 사용자의 잔액과 카드 소유 현황을 생성한다.
+                사용자가 생성되면 사용자의 잔액을 생성한다.
+                카드 소유 현황은 카드를 처음 보유하게 될 때 생성한다(CardPossesionStatus.objects.credit).
                 """
                 UserBalance.objects.create(user=user)
-                cards = Card.objects.all()
-                bulk_create_list = [
-                    CardPossesionStatus(
-                        user_id=user.id, card_id=card.id, quantity=0
-                    ) for card in cards
-                ]
-                CardPossesionStatus.objects.bulk_create(bulk_create_list)
         except IntegrityError:
             raise ValueError('User already exists')
         return user
@@ -60,12 +56,75 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
     USERNAME_FIELD = 'email'
 
 
+class UserBalanceManager(models.Manager):
+    def balance_of(self, user_id):
+        """
+        현재 잔액: 잔액 스냅숏 + 아직 합산하지 않은 잔액 증감 기록
+        """
+        pending = BalanceDelta.objects.filter(user_id=user_id).aggregate(total=Sum("amount"))["total"] or 0
+        return self.filter(user_id=user_id).values_list("balance", flat=True).get() + pending
+
+    def debit(self, user_id, amount):
+        """
+        잔액 스냅숏에서 바로 차감한다. 스냅숏이 부족하면 그 사용자의 증감 기록을 먼저 합산한 뒤 차감하며,
+        그래도 부족하면 IntegrityError(잔액은 음수가 될 수 없음). 트랜잭션 안에서 호출해야 한다.
+        """
+        if self.filter(user_id=user_id, balance__gte=amount).update(balance=F("balance") - amount):
+            return
+        self.compact([user_id])
+        self.filter(user_id=user_id).update(balance=F("balance") - amount)
+
+    def compact(self, user_ids):
+        """
+        user_ids의 잔액 증감 기록을 잔액 스냅숏에 합산하고 지운다. 트랜잭션 안에서 호출해야 한다.
+        합산 중에 다른 합산 작업이 같은 기록을 읽지 않도록 잔액 행을 먼저 잠근다(새로 추가되는 기록은 다음 합산 대상).
+        """
+        list(self.select_for_update().filter(user_id__in=user_ids).values_list("id", flat=True))
+        deltas = list(BalanceDelta.objects.filter(user_id__in=user_ids).values_list("id", "user_id", "amount"))
+        if not deltas:
+            return 0
+
+        totals = defaultdict(int)
+        for _, user_id, amount in deltas:
+            totals[user_id] += amount
+        BalanceDelta.objects.filter(id__in=[delta_id for delta_id, _, _ in deltas]).delete()
+        totals = {user_id: total for user_id, total in totals.items() if total}
+        if totals:
+            self.filter(user_id__in=totals).update(
+                balance=Case(
+                    *[When(user_id=user_id, then=F("balance") + total) for user_id, total in totals.items()],
+                    output_field=models.IntegerField()
+                )
+            )
+        return len(deltas)
+
+
 class UserBalance(TimeStampedModel):
     """
-    사용자 잔액 모델: 사용자가 보유한 잔액을 저장하는 테이블입니다.
+    사용자 잔액 모델: 사용자가 보유한 잔액(스냅숏)을 저장하는 테이블입니다.
+    판매 대금은 BalanceDelta에 쌓였다가 주기적으로 합산되므로 현재 잔액은 UserBalance.objects.balance_of()로 읽는다.
     """
     user = models.OneToOneField("users.User", on_delete=models.PROTECT, verbose_name='사용자')
     balance = models.PositiveIntegerField(default=0, verbose_name='잔액')
 
+    objects = UserBalanceManager()
+
     class Meta:
         verbose_name_plural = '사용자 보유 잔액'
+
+
+class BalanceDelta(models.Model):
+    """
+    잔액 증감 기록 모델: 체결 시 판매자의 잔액 행을 바로 갱신하지 않고 증감액만 추가하는 테이블입니다.
+    인기 판매자의 잔액 행 하나에 동시 체결이 몰려 직렬화되지 않도록 하며, compact_balances 명령어나
+    BalanceCompactor(users.balances)가 주기적으로 UserBalance에 합산하고 지운다.
+    """
+    user = models.ForeignKey("users.User", on_delete=models.PROTECT, db_index=False, verbose_name='사용자')
+    amount = models.IntegerField(verbose_name='증감액')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 날짜')
+
+    class Meta:
+        verbose_name_plural = '사용자 잔액 증감 기록'
+        indexes = [
+            models.Index(fields=["user", "id"], name="users_balancedelta_user_idx"),
+        ]
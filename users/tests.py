@@ -1,3 +1,133 @@
-from django.test import TestCase
+import io
+import unittest.mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_auth.utils import jwt_encode
+from rest_framework.test import APIClient
+from rest_framework_jwt.settings import api_settings
+
+from django.core.management import call_command
+
+from cards.models import Card, CardPossesionStatus
+from users.authentication import revocation_cache
+from users.hashers import password_hash_executor
+from users.balances import balance_compactor
+from users.models import BalanceDelta, User, UserBalance
+
+
+class StatelessJSONWebTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        revocation_cache.clear()
+        self.user = User.objects.create_user("seller@test.com", "seller", "password")
+        self.card = Card.objects.create(name="card")
+        CardPossesionStatus.objects.create(user=self.user, card=self.card, quantity=10)
+
+    def sell(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"JWT {token}")
+        return client.post(f"/cards/{self.card.id}/sells", {"price": 1000, "quantity": 1}, format="json")
+
+    def test_login_token_carries_nickname(self):
+        response = APIClient().post("/users/login", {"email": "seller@test.com", "password": "password"}, format="json")
+
+        payload = api_settings.JWT_DECODE_HANDLER(response.json()["token"])
+        self.assertEqual((payload["user_id"], payload["nickname"]), (self.user.id, "seller"))
+
+    def test_write_path_does_not_load_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.sell(jwt_encode(self.user))
+
+        self.assertFalse([query for query in queries if 'FROM "users_user"' in query["sql"]])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["userId"], self.user.id)
+
+    def test_invalid_tokens_are_rejected(self):
+        self.assertEqual(self.sell("invalid").status_code, 401)
+        self.assertEqual(self.sell(jwt_encode(self.user) + "x").status_code, 401)
+
+    @override_settings(JWT_REVOCATION_CHECK_TTL=60)
+    def test_revocation_check_rejects_missing_user(self):
+        removed = User(id=self.user.id + 100, email="removed@test.com", nickname="removed")
+
+        self.assertEqual(self.sell(jwt_encode(removed)).status_code, 401)
+        self.assertEqual(self.sell(jwt_encode(self.user)).status_code, 201)
+
+
+class LoginHashingTest(TestCase):
+    def login(self, password="password"):
+        return APIClient().post("/users/login", {"email": "user@test.com", "password": password}, format="json")
+
+    def test_login_rehashes_password_with_current_cost(self):
+        with override_settings(PASSWORD_HASHING={"PBKDF2_ITERATIONS": 1000}):
+            user = User.objects.create_user("user@test.com", "user", "password")
+
+        with override_settings(PASSWORD_HASHING={"PBKDF2_ITERATIONS": 2000}):
+            self.assertEqual(self.login("wrong").status_code, 422)
+            response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        password = User.objects.get(id=user.id).password
+        self.assertTrue(password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(User.objects.get(id=user.id).check_password("password"))
+
+    def test_login_is_throttled_when_hash_queue_is_full(self):
+        User.objects.create_user("user@test.com", "user", "password")
+        password_hash_executor.start()
+
+        with unittest.mock.patch.object(password_hash_executor._slots, "acquire", return_value=False):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["default_code"], "LoginThrottled")
+        self.assertEqual(self.login().status_code, 200)
+
+
+class BalanceDeltaTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user("seller@test.com", "seller", "password")
+        self.buyer = User.objects.create_user("buyer@test.com", "buyer", "password")
+        self.card = Card.objects.create(name="card")
+        CardPossesionStatus.objects.create(user=self.seller, card=self.card, quantity=10)
+        UserBalance.objects.filter(user=self.buyer).update(balance=10000)
+
+    def trade(self, seller, buyer, price=1000):
+        for user, path, data in ((seller, "sells", {"price": price, "quantity": 1}), (buyer, "buys", {})):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(f"/cards/{self.card.id}/{path}", data, format="json")
+            self.assertEqual(response.status_code, 201)
+
+    def test_seller_credit_is_pending_until_compacted(self):
+        self.trade(self.seller, self.buyer)
+        self.trade(self.seller, self.buyer)
+
+        self.assertEqual(UserBalance.objects.get(user=self.seller).balance, 0)
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 2400)
+        self.assertEqual(UserBalance.objects.balance_of(self.buyer.id), 10000 - 2400)
+
+        call_command("compact_balances", stdout=io.StringIO())
+
+        self.assertFalse(BalanceDelta.objects.exists())
+        self.assertEqual(UserBalance.objects.get(user=self.seller).balance, 2400)
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 2400)
+
+    def test_buyer_spends_pending_credits(self):
+        # 판매 대금(증감 기록)만으로 잔액이 충분하면 합산한 뒤 차감한다
+        CardPossesionStatus.objects.create(user=self.buyer, card=self.card, quantity=1)
+        UserBalance.objects.filter(user=self.seller).update(balance=10000)
+        self.trade(self.buyer, self.seller)
+        UserBalance.objects.filter(user=self.buyer).update(balance=0)
+        UserBalance.objects.filter(user=self.seller).update(balance=0)
+        self.trade(self.seller, self.buyer, price=500)
+
+        self.assertEqual(UserBalance.objects.get(user=self.buyer).balance, 1200 - 600)
+        self.assertFalse(BalanceDelta.objects.filter(user=self.buyer).exists())
+        self.assertEqual(UserBalance.objects.balance_of(self.seller.id), 600)
+
+    def test_compactor_thread_is_off_by_default(self):
+        balance_compactor.start()
+
+        self.assertIsNone(balance_compactor._thread)
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from users.exceptions import NotExistData, InvalidData
+from users.hashers import password_hash_executor
 from users.models import User
 
 
@@ -23,8 +24,10 @@ class LoginView(APIView):
                 }
             )
 
-        # 비밀번호 확인
-        check_password = user.check_password(password)
+        # 비밀번호 확인(해시 계산은 스레드 풀에서 실행, 해시 설정이 바뀌었으면 새 해시로 저장)
+        check_password, rehashed = password_hash_executor.verify(password, user.password)
+        if rehashed is not None:
+            User.objects.filter(id=user.id).update(password=rehashed)
         if not check_password:
             raise InvalidData(
                 **{
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class UtilitiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utilities'
+
+    def ready(self):
+        from utilities.sqlite import apply_pragmas
+
+        connection_created.connect(apply_pragmas, dispatch_uid="apply_sqlite_pragmas")
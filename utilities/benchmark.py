@@ -0,0 +1,50 @@
+"""
+벤치마크 관리 명령어에서 공통으로 사용하는 시간 측정 및 결과 요약 함수입니다.
+"""
+import time
+
+
+def percentile(samples, percent):
+    """
+    정렬된 표본의 percent 백분위 값(최근접 순위 방식)
+    """
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, round(percent / 100 * len(samples) + 0.5) - 1))
+    return samples[index]
+
+
+def measure(func, repeat):
+    """
+    func를 repeat번 호출하며 호출별 소요 시간(초)을 반환한다.
+    """
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+def summarize(samples, elapsed=None):
+    """
+    소요 시간 표본의 p50/p95/p99(ms)와 초당 처리량. elapsed가 없으면 표본 합계로 처리량을 계산한다.
+    """
+    ordered = sorted(samples)
+    elapsed = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "count": len(ordered),
+        "p50": percentile(ordered, 50) * 1000,
+        "p95": percentile(ordered, 95) * 1000,
+        "p99": percentile(ordered, 99) * 1000,
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+    }
+
+
+def format_summary(label, samples, elapsed=None):
+    summary = summarize(samples, elapsed)
+    return (
+        f"{label:<40} n={summary['count']:<7} "
+        f"p50={summary['p50']:8.3f}ms p95={summary['p95']:8.3f}ms p99={summary['p99']:8.3f}ms "
+        f"{summary['rps']:10.1f} req/s"
+    )
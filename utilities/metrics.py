@@ -0,0 +1,148 @@
+"""
+요청별 SQL 쿼리 수/DB 시간/직렬화 시간/뷰 시간을 모으는 프로세스 내부 히스토그램입니다.
+utilities.middleware.RequestMetricsMiddleware가 기록하고, /metrics에서 Prometheus 텍스트 형식으로 읽습니다.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+# 초 단위 구간(Prometheus 기본값)과 쿼리 수 구간
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+Metric = namedtuple("Metric", ["name", "help", "buckets"])
+
+REQUEST_METRICS = {
+    "view": Metric("http_request_duration_seconds", "미들웨어 기준 요청 처리 시간", DURATION_BUCKETS),
+    "db": Metric("http_request_db_duration_seconds", "요청 중 SQL 실행 시간 합계", DURATION_BUCKETS),
+    "serializer": Metric(
+        "http_request_serializer_duration_seconds", "요청 중 serializer.data 생성 시간 합계", DURATION_BUCKETS
+    ),
+    "queries": Metric("http_request_db_queries", "요청 중 실행한 SQL 쿼리 수", QUERY_BUCKETS),
+}
+
+
+class RequestStats:
+    """
+    요청 하나의 측정값(current_stats로 현재 요청의 측정값을 찾는다)
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started_at
+            self.queries += 1
+
+
+current_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def timed_data(data):
+    """
+    serializer.data 프로퍼티의 생성 시간을 현재 요청의 측정값에 더한다(중첩 호출은 바깥 호출만 측정).
+    """
+
+    def wrapper(serializer):
+        stats = current_stats.get()
+        if stats is None:
+            return data.fget(serializer)
+        stats._serializer_depth += 1
+        started_at = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            stats._serializer_depth -= 1
+            if not stats._serializer_depth:
+                stats.serializer += time.perf_counter() - started_at
+
+    wrapper.timed = True
+    return property(wrapper)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._histograms = {}
+            self._requests = {}
+
+    def observe(self, method, route, status_code, stats, elapsed):
+        values = {
+            "view": elapsed,
+            "db": stats.db,
+            "serializer": stats.serializer,
+            "queries": stats.queries,
+        }
+        with self._lock:
+            for key, value in values.items():
+                histogram = self._histograms.get((key, method, route))
+                if histogram is None:
+                    histogram = self._histograms[(key, method, route)] = Histogram(REQUEST_METRICS[key].buckets)
+                histogram.observe(value)
+            status_key = (method, route, status_code)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+
+    def render(self):
+        """
+        Prometheus 텍스트 형식(0.0.4)
+        """
+        with self._lock:
+            histograms = sorted(
+                (key, method, route, list(histogram.counts), histogram.sum)
+                for (key, method, route), histogram in self._histograms.items()
+            )
+            requests = sorted(self._requests.items())
+
+        lines = [
+            "# HELP http_requests_total 응답 상태별 요청 수",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in requests:
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{escape(route)}",status="{status_code}"}} {count}'
+            )
+
+        for key, metric in REQUEST_METRICS.items():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} histogram")
+            for _, method, route, counts, total in (row for row in histograms if row[0] == key):
+                labels = f'method="{method}",route="{escape(route)}"'
+                cumulative = 0
+                for bound, count in zip((*metric.buckets, "+Inf"), counts):
+                    cumulative += count
+                    lines.append(f'{metric.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{metric.name}_sum{{{labels}}} {total}")
+                lines.append(f"{metric.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,29 @@
+"""
+응답 JSON 인코딩: orjson이 설치되어 있으면 사용하고, 없으면 표준 json 모듈로 DRF JSONRenderer와 같은
+형태(공백 없는 구분자, 유니코드 그대로)의 바이트를 만든다.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def render_json(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    dict/list/str/int 등 기본 타입으로만 구성된 응답 데이터(ValuesSerializer 결과)용 렌더러
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return render_json(data)
@@ -0,0 +1,55 @@
+"""
+목록 응답용 .values() 기반 직렬화: 필드 객체 없이 필요한 컬럼만 한 번의 쿼리로 조회해 dict 목록을 만든다.
+DRF ModelSerializer와 같은 응답 형태를 유지해야 하며, 날짜/시간은 DRF DateTimeField와 같은 ISO 8601
+문자열(현재 시간대 기준, UTC는 Z)로 변환한다.
+"""
+from django.utils import timezone
+
+
+def datetime_representation(value, tz):
+    if timezone.is_aware(value):
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class ValuesSerializer:
+    """
+    fields: (응답 키, ORM 조회 경로, 변환 함수 또는 None) 목록. 변환 함수는 None이 아닌 값과 현재 시간대를
+    받는다(시간대는 목록마다 한 번만 조회).
+    """
+    fields = ()
+
+    @classmethod
+    def rows(cls, queryset):
+        return cls._represent(queryset.values_list(*[lookup for _, lookup, _ in cls.fields]))
+
+    @classmethod
+    def dict_rows(cls, rows):
+        """
+        이미 조회한 dict 목록(ORM 조회 경로가 키)을 같은 형태로 변환한다(여러 테이블에서 읽어 합친 목록용).
+        """
+        lookups = [lookup for _, lookup, _ in cls.fields]
+        return cls._represent([row[lookup] for lookup in lookups] for row in rows)
+
+    @classmethod
+    def _represent(cls, values_list):
+        keys = [key for key, _, _ in cls.fields]
+        converters = [
+            (index, convert) for index, (_, _, convert) in enumerate(cls.fields) if convert is not None
+        ]
+
+        if not converters:
+            return [dict(zip(keys, values)) for values in values_list]
+
+        tz = timezone.get_current_timezone()
+        rows = []
+        for values in values_list:
+            values = list(values)
+            for index, convert in converters:
+                if values[index] is not None:
+                    values[index] = convert(values[index], tz)
+            rows.append(dict(zip(keys, values)))
+        return rows
@@ -0,0 +1,49 @@
+"""
+SQLite 연결 설정(PRAGMA)과 잠금 오류 재시도입니다.
+
+- 새 DB 연결마다(connection_created) settings.SQLITE_PRAGMAS를 적용한다. WAL 모드에서는 읽기가 쓰기 트랜잭션을
+  기다리지 않고, busy_timeout 동안은 잠금이 풀리기를 기다린 뒤 "database is locked"를 발생시킨다.
+- busy_timeout을 넘기거나 WAL에서 읽던 트랜잭션이 쓰기로 바뀌며 충돌하면(SQLITE_BUSY) 기다리지 않고 바로
+  오류가 나므로, 체결 트랜잭션(cards.orders)은 retry_on_busy로 트랜잭션 전체를 다시 실행한다.
+"""
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+BUSY_MESSAGES = ("database is locked", "database is busy")
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    connection_created 수신자: SQLite 연결에 SQLITE_PRAGMAS를 순서대로 적용한다.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_busy(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc) for message in BUSY_MESSAGES)
+
+
+def retry_on_busy(func):
+    """
+    SQLite 잠금 오류가 나면 settings.SQLITE_BUSY_RETRIES번까지 지수 백오프(+지터) 후 func를 다시 실행한다.
+    이미 트랜잭션 안에서 호출된 경우에는 바깥 트랜잭션을 다시 실행해야 하므로 재시도하지 않는다.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = getattr(settings, "SQLITE_BUSY_RETRIES", 0)
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == retries or not is_busy(exc) or transaction.get_connection().in_atomic_block:
+                    raise
+            time.sleep(random.uniform(0.5, 1) * 0.01 * 2 ** attempt)
+    return wrapper
@@ -1,3 +1,85 @@
-from django.test import TestCase
+import re
+import unittest.mock
 
-# Create your tests here.
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from cards.models import Card, CardPossesionStatus
+from users.models import User
+from utilities.metrics import metrics_registry
+from utilities.renderers import render_json
+from utilities.sqlite import retry_on_busy
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        metrics_registry.clear()
+        self.card = Card.objects.create(name="card")
+        self.user = User.objects.create_user("seller@test.com", "seller", "password")
+        CardPossesionStatus.objects.create(user=self.user, card=self.card, quantity=10)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def sell(self):
+        return self.client.post(f"/cards/{self.card.id}/sells", {"quantity": 1, "price": 1000}, format="json")
+
+    @override_settings(REQUEST_METRICS=True)
+    def test_server_timing_and_metrics(self):
+        response = self.sell()
+
+        self.assertEqual(response.status_code, 201)
+        server_timing = response["Server-Timing"]
+        queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', server_timing).group(1))
+        self.assertGreater(queries, 0)
+        self.assertRegex(server_timing, r"serializer;dur=[\d.]+")
+        self.assertRegex(server_timing, r"view;dur=[\d.]+")
+
+        body = self.client.get("/metrics").content.decode()
+        labels = 'method="POST",route="cards/<int:card_id>/sells"'
+        self.assertIn(f'http_requests_total{{{labels},status="201"}} 1', body)
+        self.assertIn(f"http_request_db_queries_count{{{labels}}} 1", body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', body)
+        self.assertIn("# TYPE http_request_serializer_duration_seconds histogram", body)
+
+    def test_disabled(self):
+        response = self.sell()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+class RenderJsonTest(TestCase):
+    def test_same_bytes_as_drf_renderer(self):
+        data = [{"id": 1, "nickname": "판매자", "selledAt": None, "createdAt": "2024-01-01T09:00:00+09:00"}]
+
+        self.assertEqual(render_json(data), JSONRenderer().render(data))
+        with unittest.mock.patch("utilities.renderers.orjson", None):
+            self.assertEqual(render_json(data), JSONRenderer().render(data))
+
+
+class SQLiteTuningTest(TestCase):
+    def test_pragmas_are_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -65536)
+
+
+@override_settings(SQLITE_BUSY_RETRIES=2)
+class RetryOnBusyTest(SimpleTestCase):
+    def test_busy_error_is_retried(self):
+        func = unittest.mock.Mock(side_effect=[OperationalError("database is locked"), "done"])
+
+        self.assertEqual(retry_on_busy(func)(), "done")
+        self.assertEqual(func.call_count, 2)
+
+    def test_other_errors_and_exhausted_retries_are_raised(self):
+        for error, calls in ((OperationalError("no such table: x"), 1), (OperationalError("database is locked"), 3)):
+            func = unittest.mock.Mock(side_effect=error)
+            with self.assertRaises(OperationalError):
+                retry_on_busy(func)()
+            self.assertEqual(func.call_count, calls)
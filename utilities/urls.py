@@ -0,0 +1,7 @@
+from django.urls import path
+
+from utilities.views import metrics
+
+urlpatterns = [
+    path("metrics", metrics),
+]
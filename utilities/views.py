@@ -1,3 +1,13 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import Http404, HttpResponse
 
-# Create your views here.
+from utilities.metrics import metrics_registry
+
+
+def metrics(request):
+    """
+    요청 측정값 히스토그램(Prometheus 텍스트 형식). settings.REQUEST_METRICS가 꺼져 있으면 404
+    """
+    if not getattr(settings, "REQUEST_METRICS", False):
+        raise Http404()
+    return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")